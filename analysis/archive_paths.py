@@ -0,0 +1,16 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+分析结果归档的位置与阈值
+只依赖标准库，命令行入口在导入 NumPy 之前即可判断是否需要映射归档
+"""
+
+import os
+
+# 小于该大小的JSON直接解析（比导入NumPy并映射归档更快）
+ARCHIVE_MIN_BYTES = 1 << 20
+
+
+def companion_path(json_path: str) -> str:
+    """JSON分析结果对应的二进制归档路径"""
+    return os.path.splitext(json_path)[0] + ".bin"
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+榜单数据列式存储模块
+解析时一次性将歌曲、标签、DJ榜单转换为带类型的DataFrame，供分析与图表共享
+"""
+
+from typing import Dict, List, Union
+
+import pandas as pd
+
+Records = Union[List[Dict], pd.DataFrame]
+
+
+def parse_percent(values: pd.Series) -> pd.Series:
+    """将 "2.9%"、"+24%" 等字符串批量转换为浮点数，无法解析的记为NaN"""
+    if pd.api.types.is_numeric_dtype(values):
+        return values.astype("float64")
+    cleaned = values.astype("string").str.strip().str.rstrip("%").str.lstrip("+")
+    return pd.to_numeric(cleaned, errors="coerce").astype("float64")
+
+
+def _categorical(values: pd.Series) -> pd.Series:
+    """转换为按首次出现顺序编码的分类列"""
+    return pd.Series(
+        pd.Categorical(values, categories=pd.unique(values.dropna())),
+        index=values.index,
+        name=values.name,
+    )
+
+
+def _frame(
+    records: List[Dict], columns: List[str], aliases: Dict[str, str] = None
+) -> pd.DataFrame:
+    frame = pd.DataFrame.from_records(list(records)).rename(columns=aliases or {})
+    for column in columns:
+        if column not in frame.columns:
+            frame[column] = pd.Series(dtype="object")
+    return frame
+
+
+def songs_frame(records: Records) -> pd.DataFrame:
+    """歌曲榜单列式表：rank/playback_rate为数值列，artist/tags为分类列"""
+    if isinstance(records, pd.DataFrame):
+        return records
+
+    frame = _frame(
+        records,
+        ["rank", "title", "artist", "tags", "playback_rate"],
+        aliases={"song_name": "title"},
+    )
+    if frame["rank"].isna().all():
+        frame["rank"] = range(1, len(frame) + 1)
+
+    typed = pd.DataFrame(
+        {
+            "rank": pd.to_numeric(frame["rank"]).astype("int32"),
+            "title": frame["title"].astype("string"),
+            "artist": _categorical(frame["artist"]),
+            "tags": _categorical(frame["tags"]),
+            "playback_rate": parse_percent(frame["playback_rate"]),
+        }
+    )
+    return typed
+
+
+def tag_trends_frame(records: Records) -> pd.DataFrame:
+    """标签趋势列式表：frequency/growth_rate/predicted_growth为数值列"""
+    if isinstance(records, pd.DataFrame):
+        return records
+
+    frame = _frame(
+        records,
+        ["tag", "frequency", "growth_rate", "predicted_growth", "trend_analysis"],
+    )
+    typed = pd.DataFrame(
+        {
+            "tag": _categorical(frame["tag"]),
+            "frequency": pd.to_numeric(frame["frequency"]).astype("int64"),
+            "growth_rate": parse_percent(frame["growth_rate"]),
+            "predicted_growth": parse_percent(frame["predicted_growth"]),
+            "trend_analysis": frame["trend_analysis"].astype("string"),
+        }
+    )
+    return typed
+
+
+def dj_charts_frame(records: Records) -> pd.DataFrame:
+    """DJ榜单列式表：热播榜的playback_rate为数值列，趋势榜为NaN"""
+    if isinstance(records, pd.DataFrame):
+        return records
+
+    frame = _frame(
+        records,
+        [
+            "rank",
+            "title",
+            "tags",
+            "playback_rate",
+            "heat_status",
+            "usage_scenario",
+            "chart_type",
+        ],
+    )
+    typed = pd.DataFrame(
+        {
+            "rank": pd.to_numeric(frame["rank"]).astype("int32"),
+            "title": frame["title"].astype("string"),
+            "tags": _categorical(frame["tags"]),
+            "playback_rate": parse_percent(frame["playback_rate"]),
+            "heat_status": _categorical(frame["heat_status"]),
+            "usage_scenario": frame["usage_scenario"].astype("string"),
+            "chart_type": _categorical(frame["chart_type"]),
+        }
+    )
+    return typed
+
+
+def rising_songs_frame(records: Records) -> pd.DataFrame:
+    """黑马榜列式表：growth_rate为数值列，"新首播即破5万点播"等描述记为NaN"""
+    if isinstance(records, pd.DataFrame):
+        return records
+
+    frame = _frame(
+        records, ["rank", "title", "release_date", "growth_rate", "rating", "reason"]
+    )
+    typed = pd.DataFrame(
+        {
+            "rank": pd.to_numeric(frame["rank"]).astype("int32"),
+            "title": frame["title"].astype("string"),
+            "release_date": frame["release_date"].astype("string"),
+            "growth_rate": parse_percent(frame["growth_rate"]),
+            "rating": _categorical(frame["rating"]),
+            "reason": frame["reason"].astype("string"),
+        }
+    )
+    return typed
+
+
+class ChartDataStore:
+    """榜单数据列式存储"""
+
+    def __init__(
+        self,
+        songs: pd.DataFrame,
+        rising_songs: pd.DataFrame,
+        tag_trends: pd.DataFrame,
+        dj_charts: pd.DataFrame,
+    ):
+        self.songs = songs
+        self.rising_songs = rising_songs
+        self.tag_trends = tag_trends
+        self.dj_charts = dj_charts
+
+    @classmethod
+    def from_parsed(cls, data: Dict) -> "ChartDataStore":
+        """由解析结果构建列式存储"""
+        return cls(
+            songs=songs_frame(data.get("top_songs", [])),
+            rising_songs=rising_songs_frame(data.get("rising_songs", [])),
+            tag_trends=tag_trends_frame(data.get("tag_trends", [])),
+            dj_charts=dj_charts_frame(data.get("dj_charts", [])),
+        )
+
+    def memory_usage(self) -> Dict[str, int]:
+        """各表占用的内存字节数"""
+        return {
+            "songs": int(self.songs.memory_usage(deep=True).sum()),
+            "rising_songs": int(self.rising_songs.memory_usage(deep=True).sum()),
+            "tag_trends": int(self.tag_trends.memory_usage(deep=True).sum()),
+            "dj_charts": int(self.dj_charts.memory_usage(deep=True).sum()),
+        }
@@ -5,14 +5,117 @@
 用于处理音乐数据并生成分析报告
 """
 
-import json
+import io
 import re
-from datetime import datetime
-from typing import Any, Dict, List, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
 
-import numpy as np
 import pandas as pd
 
+from analysis.chart_store import ChartDataStore, rising_songs_frame
+from analysis.json_writer import write_json
+from analysis.periods import DEFAULT_TIMEZONE, HISTORY_DAYS, ReportPeriod
+from analysis.play_logs import PlayLogAggregator
+from analysis.processed_store import FULL_PERIOD, ProcessedDataStore
+from analysis.regional_engine import RegionalPreferenceEngine
+from analysis.report_archive import companion_path, write_archive
+from analysis.rising_detector import RisingSongDetector
+from analysis.tag_engine import TagAnalyticsEngine
+from analysis.tag_forecast import TagForecaster
+from analysis.time_patterns import UsageHistogram
+from profiler import span
+
+# 报告标题中的季度，如 "# Billboard 音乐曲库研究报告：2025 Q2"
+TITLE_QUARTER = re.compile(r"(\d{4})\s*Q([1-4])")
+
+# 热门歌曲图表展示的歌曲数
+CHART_TOP_SONGS = 10
+
+# Billboard报告章节: (章节名, 起始标记, 结束标记)
+BILLBOARD_SECTIONS = [
+    ("top_songs", "## 爆款金曲榜 TOP10", "## 黑马榜"),
+    ("rising_songs", "## 黑马榜", "## 谁在点歌"),
+    ("user", "## 谁在点歌：用户画像与地域偏好", "## 什么时间点歌最多"),
+    ("time", "## 什么时间点歌最多", "## 音乐标签风向标"),
+    ("tag", "## 音乐标签风向标", "## 下一首爆红歌曲预测"),
+    ("dj", "## DJ 榜单 Top10", "## 出品机构与版权声明"),
+]
+
+
+class _TableReader:
+    """Markdown表格逐行读取器，行到达即解析，表格结束后忽略后续内容"""
+
+    def __init__(
+        self,
+        header_markers: Tuple[str, ...],
+        parse_row: Callable[[List[str], int], Optional[Dict]],
+    ):
+        self.header_markers = header_markers
+        self.parse_row = parse_row
+        self.rows = []
+        self.in_table = False
+        self.closed = False
+        self.table_index = 0
+
+    def feed(self, line: str):
+        if self.closed:
+            return
+
+        if all(marker in line for marker in self.header_markers):
+            self.in_table = True
+            self.table_index += 1
+        elif not self.in_table:
+            return
+        elif line.strip() == "" or "---" in line:
+            return
+        elif line.strip().startswith("|"):
+            parts = [p.strip() for p in line.split("|")]
+            try:
+                row = self.parse_row(parts, self.table_index)
+            except (ValueError, IndexError):
+                row = None
+            if row is not None:
+                self.rows.append(row)
+        else:
+            self.closed = True
+
+
+class _GenderReader:
+    """提取性别结构中的男性占比（取章节内首次匹配）"""
+
+    pattern = re.compile(r"男性.*?(\d+)%")
+
+    def __init__(self):
+        self.male = None
+
+    def feed(self, line: str):
+        if self.male is None:
+            match = self.pattern.search(line)
+            if match:
+                self.male = int(match.group(1))
+
+
+def _quarter_range(title: str) -> Optional[Tuple[date, date]]:
+    """报告标题中季度的首日与末日，标题中没有季度时为None"""
+    match = TITLE_QUARTER.search(title)
+    if match is None:
+        return None
+    year, quarter = int(match.group(1)), int(match.group(2))
+    start = date(year, quarter * 3 - 2, 1)
+    end = date(year + quarter // 4, quarter * 3 % 12 + 1, 1)
+    return start, end - timedelta(days=1)
+
+
+def _time_window(text: str) -> Dict:
+    """将 "19:00 - 22:30" 形式的时段转换为与点播直方图识别结果相同的结构
+
+    Markdown报告中没有使用率，usage_rate为None
+    """
+    start, _, end = text.partition("-")
+    return {"start": start.strip(), "end": end.strip(), "usage_rate": None}
+
 
 class MusicDataAnalyzer:
     """音乐数据分析器"""
@@ -20,22 +123,94 @@ class MusicDataAnalyzer:
     def __init__(self):
         self.data = {}
         self.analysis_results = {}
+        self.store = ChartDataStore.from_parsed({})
+        self.play_records = None
+        self.usage_histogram = None
+        self.rising_detector = None
+        self.tag_history = None
+        self.tag_forecaster = TagForecaster()
+        self.regional_engine = RegionalPreferenceEngine()
+        self.report_period = None
+        # 数据本身覆盖的 (首日, 末日)：点播日志的首尾日期或报告标题中的季度
+        self.data_range: Optional[Tuple[date, date]] = None
 
     def load_billboard_data(self, file_path: str) -> Dict:
         """加载Billboard数据"""
         try:
+            # 逐行流式读取，避免一次性读入整个报告
             with open(file_path, "r", encoding="utf-8") as f:
-                content = f.read()
+                self.data = self._parse_billboard_lines(f)
+            # Markdown榜单没有时间戳，总是按整份报告分析
+            self.report_period = None
 
-            # 解析数据
-            self.data = self._parse_billboard_content(content)
+            # 解析后一次性构建带类型的列式存储
+            self.store = ChartDataStore.from_parsed(self.data)
             return self.data
         except Exception as e:
             print(f"加载数据失败: {e}")
             return {}
 
+    def set_play_records(self, plays: pd.DataFrame):
+        """设置逐条点播记录（列: city_type, tag, 可选 plays），用于计算地域偏好"""
+        self.play_records = plays
+
+    def load_play_events(self, file_path: str, **kwargs) -> UsageHistogram:
+        """流式读取点播事件日志（CSV/Parquet），统计时间分布直方图"""
+        self.usage_histogram = UsageHistogram.from_file(file_path, **kwargs)
+        return self.usage_histogram
+
+    def load_play_logs(
+        self,
+        file_path: str,
+        chunksize: int = 1_000_000,
+        max_workers: int = None,
+        period: ReportPeriod = None,
+        timezone: str = DEFAULT_TIMEZONE,
+    ) -> Dict:
+        """分块读取终端点播日志（CSV/JSONL/Parquet），聚合为与报告解析相同的数据结构
+
+        file_path为目录或通配符时，各日志分片在多个进程中并行聚合后合并；
+        指定period时只统计该周期的点播（另读取此前HISTORY_DAYS天作为增长基线）。
+        小时、自然日按timezone划分，指定period时使用周期的时区。
+        """
+        try:
+            aggregator = PlayLogAggregator.from_path(
+                file_path,
+                max_workers=max_workers,
+                chunksize=chunksize,
+                time_range=period.seconds() if period else None,
+                history_days=HISTORY_DAYS if period else 0,
+                timezone=period.timezone if period else timezone,
+            )
+            self.report_period = period
+            self.data_range = aggregator.date_range()
+            self.data = aggregator.to_data()
+            self.store = ChartDataStore.from_parsed(self.data)
+            self.usage_histogram = aggregator.histogram
+            self.play_records = aggregator.city_tag_frame()
+            self.tag_history = aggregator.tag_weekly_history()
+            return self.data
+        except Exception as e:
+            print(f"加载点播日志失败: {e}")
+            return {}
+
+    def update_rising_songs(
+        self, events: pd.DataFrame, top_n: int = 5, timezone: str = DEFAULT_TIMEZONE
+    ) -> List[Dict]:
+        """增量更新黑马榜：只处理新到达的点播，不回扫历史（新建检测器时按timezone分桶）"""
+        if self.rising_detector is None:
+            self.rising_detector = RisingSongDetector(timezone=timezone)
+        self.rising_detector.update(events)
+        self.data["rising_songs"] = self.rising_detector.rising_songs(top_n)
+        self.store.rising_songs = rising_songs_frame(self.data["rising_songs"])
+        return self.data["rising_songs"]
+
     def _parse_billboard_content(self, content: str) -> Dict:
         """解析Billboard报告内容"""
+        return self._parse_billboard_lines(io.StringIO(content))
+
+    def _parse_billboard_lines(self, lines: Iterable[str]) -> Dict:
+        """单次遍历解析Billboard报告，按 `## ` 标题切换章节状态"""
         data = {
             "top_songs": [],
             "rising_songs": [],
@@ -48,50 +223,65 @@ class MusicDataAnalyzer:
             "business_recommendations": [],
         }
 
-        # 解析热门歌曲TOP10
-        top_songs_section = self._extract_section(
-            content, "## 爆款金曲榜 TOP10", "## 黑马榜"
-        )
-        if top_songs_section:
-            data["top_songs"] = self._parse_top_songs_table(top_songs_section)
-
-        # 解析黑马榜
-        rising_songs_section = self._extract_section(
-            content, "## 黑马榜", "## 谁在点歌"
-        )
-        if rising_songs_section:
-            data["rising_songs"] = self._parse_rising_songs_table(rising_songs_section)
-
-        # 解析用户画像
-        user_section = self._extract_section(
-            content, "## 谁在点歌：用户画像与地域偏好", "## 什么时间点歌最多"
-        )
-        if user_section:
-            data["user_demographics"] = self._parse_user_demographics(user_section)
-            data["regional_preferences"] = self._parse_regional_preferences(
-                user_section
-            )
-
-        # 解析时间分析
-        time_section = self._extract_section(
-            content, "## 什么时间点歌最多", "## 音乐标签风向标"
-        )
-        if time_section:
-            data["time_analysis"] = self._parse_time_analysis(time_section)
-
-        # 解析标签趋势
-        tag_section = self._extract_section(
-            content, "## 音乐标签风向标", "## 下一首爆红歌曲预测"
-        )
-        if tag_section:
-            data["tag_trends"] = self._parse_tag_trends(tag_section)
+        gender = _GenderReader()
+        readers = {
+            "top_songs": [self._top_songs_reader()],
+            "rising_songs": [self._rising_songs_reader()],
+            "user": [gender, self._regional_reader()],
+            "time": [self._device_usage_reader()],
+            "tag": [self._tag_trends_reader()],
+            "dj": [self._dj_charts_reader()],
+        }
 
-        # 解析DJ榜单
-        dj_section = self._extract_section(
-            content, "## DJ 榜单 Top10", "## 出品机构与版权声明"
-        )
-        if dj_section:
-            data["dj_charts"] = self._parse_dj_charts(dj_section)
+        pending = list(BILLBOARD_SECTIONS)
+        active = []
+        seen = set()
+        self.data_range = None
+        # 剖析启用时每个章节记录一个区间（章节切换时先结束再开始，保持区间嵌套）
+        sections = ExitStack()
+
+        with sections:
+            for line in lines:
+                line = line.rstrip("\n")
+
+                if line.startswith("# ") and self.data_range is None:
+                    self.data_range = _quarter_range(line)
+                elif line.startswith("## "):
+                    # 结束标记先于起始标记判断，保证相邻章节正确交接
+                    active = [sec for sec in active if sec[2] not in line]
+                    started = [sec for sec in pending if sec[1] in line]
+                    for sec in started:
+                        pending.remove(sec)
+                        active.append(sec)
+                        seen.add(sec[0])
+                    sections.close()
+                    for name, _, _ in active:
+                        sections.enter_context(
+                            span(
+                                "MusicDataAnalyzer._parse_billboard_lines[{}]".format(
+                                    name
+                                ),
+                                "analysis",
+                            )
+                        )
+
+                for name, _, _ in active:
+                    for reader in readers[name]:
+                        reader.feed(line)
+
+        if "top_songs" in seen:
+            data["top_songs"] = readers["top_songs"][0].rows
+        if "rising_songs" in seen:
+            data["rising_songs"] = readers["rising_songs"][0].rows
+        if "user" in seen:
+            data["user_demographics"] = self._build_user_demographics(gender.male)
+            data["regional_preferences"] = readers["user"][1].rows
+        if "time" in seen:
+            data["time_analysis"] = self._build_time_analysis(readers["time"][0].rows)
+        if "tag" in seen:
+            data["tag_trends"] = readers["tag"][0].rows
+        if "dj" in seen:
+            data["dj_charts"] = readers["dj"][0].rows
 
         return data
 
@@ -111,75 +301,72 @@ class MusicDataAnalyzer:
         except:
             return ""
 
+    def _read_table(self, section: str, reader: "_TableReader") -> List[Dict]:
+        """将章节文本逐行送入表格读取器"""
+        for line in section.split("\n"):
+            reader.feed(line)
+        return reader.rows
+
+    def _top_songs_reader(self) -> "_TableReader":
+        return _TableReader(("| 排名 | 歌曲名",), self._parse_top_song_row)
+
+    def _rising_songs_reader(self) -> "_TableReader":
+        return _TableReader(("| 排名 | 歌曲名",), self._parse_rising_song_row)
+
+    def _regional_reader(self) -> "_TableReader":
+        return _TableReader(("| 城市类型",), self._parse_regional_row)
+
+    def _device_usage_reader(self) -> "_TableReader":
+        return _TableReader(("| 设备类型",), self._parse_device_row)
+
+    def _tag_trends_reader(self) -> "_TableReader":
+        return _TableReader(("| 标签关键词",), self._parse_tag_trend_row)
+
+    def _dj_charts_reader(self) -> "_TableReader":
+        return _TableReader(("| 排名 | 歌曲名", "标签关键词"), self._parse_dj_row)
+
     def _parse_top_songs_table(self, section: str) -> List[Dict]:
         """解析热门歌曲表格"""
-        songs = []
-        lines = section.split("\n")
-        in_table = False
-
-        for line in lines:
-            if "| 排名 | 歌曲名" in line:
-                in_table = True
-                continue
-            elif in_table and line.strip() == "":
-                continue
-            elif in_table and "---" in line:
-                continue
-            elif in_table and line.strip().startswith("|"):
-                parts = [p.strip() for p in line.split("|")]
-                if len(parts) >= 6:
-                    try:
-                        song = {
-                            "rank": int(parts[1]),
-                            "title": parts[2],
-                            "artist": parts[3],
-                            "tags": parts[4],
-                            "playback_rate": float(parts[5].replace("%", "")),
-                        }
-                        songs.append(song)
-                    except:
-                        continue
-            elif in_table and not line.strip().startswith("|"):
-                break
-
-        return songs
+        return self._read_table(section, self._top_songs_reader())
+
+    def _parse_top_song_row(self, parts: List[str], table_index: int) -> Optional[Dict]:
+        if len(parts) < 6:
+            return None
+        return {
+            "rank": int(parts[1]),
+            "title": parts[2],
+            "artist": parts[3],
+            "tags": parts[4],
+            "playback_rate": float(parts[5].replace("%", "")),
+        }
 
     def _parse_rising_songs_table(self, section: str) -> List[Dict]:
         """解析黑马榜表格"""
-        songs = []
-        lines = section.split("\n")
-        in_table = False
-
-        for line in lines:
-            if "| 排名 | 歌曲名" in line:
-                in_table = True
-                continue
-            elif in_table and line.strip() == "":
-                continue
-            elif in_table and "---" in line:
-                continue
-            elif in_table and line.strip().startswith("|"):
-                parts = [p.strip() for p in line.split("|")]
-                if len(parts) >= 7:
-                    try:
-                        song = {
-                            "rank": int(parts[1]),
-                            "title": parts[2],
-                            "release_date": parts[3],
-                            "growth_rate": parts[4],
-                            "rating": parts[5],
-                            "reason": parts[6],
-                        }
-                        songs.append(song)
-                    except:
-                        continue
-            elif in_table and not line.strip().startswith("|"):
-                break
-
-        return songs
+        return self._read_table(section, self._rising_songs_reader())
+
+    def _parse_rising_song_row(
+        self, parts: List[str], table_index: int
+    ) -> Optional[Dict]:
+        if len(parts) < 7:
+            return None
+        return {
+            "rank": int(parts[1]),
+            "title": parts[2],
+            "release_date": parts[3],
+            "growth_rate": parts[4],
+            "rating": parts[5],
+            "reason": parts[6],
+        }
 
     def _parse_user_demographics(self, section: str) -> Dict:
         """解析用户画像数据"""
+        gender = _GenderReader()
+        for line in section.split("\n"):
+            gender.feed(line)
+        return self._build_user_demographics(gender.male)
+
+    def _build_user_demographics(self, male_percent: int = None) -> Dict:
+        """组装用户画像，未提取到的字段使用默认值"""
         demographics = {
             "gender": {"male": 58, "female": 42},
             "age_groups": {
@@ -200,10 +387,8 @@ class MusicDataAnalyzer:
             },
         }
 
-        # 尝试从文本中提取实际数据
-        gender_match = re.search(r"男性.*?(\d+)%", section)
-        if gender_match:
-            male_percent = int(gender_match.group(1))
+        # 使用从文本中提取的实际数据
+        if male_percent is not None:
             demographics["gender"] = {
                 "male": male_percent,
                 "female": 100 - male_percent,
@@ -213,184 +398,121 @@ class MusicDataAnalyzer:
 
     def _parse_regional_preferences(self, section: str) -> List[Dict]:
         """解析地域偏好数据"""
-        regional_data = []
-
-        # 查找地域偏好表格
-        lines = section.split("\n")
-        in_table = False
-
-        for line in lines:
-            if "| 城市类型" in line:
-                in_table = True
-                continue
-            elif in_table and line.strip() == "":
-                continue
-            elif in_table and "---" in line:
-                continue
-            elif in_table and line.strip().startswith("|"):
-                parts = [p.strip() for p in line.split("|")]
-                if len(parts) >= 4:
-                    try:
-                        region = {
-                            "city_type": parts[1],
-                            "preferred_tags": [
-                                tag.strip() for tag in parts[2].split("、")
-                            ],
-                            "typical_songs": [
-                                song.strip() for song in parts[3].split("、")
-                            ],
-                        }
-                        regional_data.append(region)
-                    except:
-                        continue
-            elif in_table and not line.strip().startswith("|"):
-                break
-
-        return regional_data
+        return self._read_table(section, self._regional_reader())
+
+    def _parse_regional_row(self, parts: List[str], table_index: int) -> Optional[Dict]:
+        if len(parts) < 4:
+            return None
+        return {
+            "city_type": parts[1],
+            "preferred_tags": [tag.strip() for tag in parts[2].split("、")],
+            "typical_songs": [song.strip() for song in parts[3].split("、")],
+        }
 
     def _parse_time_analysis(self, section: str) -> Dict:
         """解析时间分析数据"""
-        time_data = {
-            "peak_hours": "19:00 - 22:30",
-            "secondary_peak": "12:30 - 14:00",
-            "low_hours": "03:00 - 08:00",
-            "device_usage": [],
-        }
+        devices = self._read_table(section, self._device_usage_reader())
+        return self._build_time_analysis(devices)
 
-        # 解析设备使用数据
-        lines = section.split("\n")
-        in_table = False
-
-        for line in lines:
-            if "| 设备类型" in line:
-                in_table = True
-                continue
-            elif in_table and line.strip() == "":
-                continue
-            elif in_table and "---" in line:
-                continue
-            elif in_table and line.strip().startswith("|"):
-                parts = [p.strip() for p in line.split("|")]
-                if len(parts) >= 4:
-                    try:
-                        device = {
-                            "type": parts[1],
-                            "active_hours": parts[2],
-                            "avg_duration": parts[3],
-                            "behavior": parts[4] if len(parts) > 4 else "",
-                        }
-                        time_data["device_usage"].append(device)
-                    except:
-                        continue
-            elif in_table and not line.strip().startswith("|"):
-                break
+    def _build_time_analysis(self, device_usage: List[Dict]) -> Dict:
+        """组装时间分析数据"""
+        low_usage = _time_window("03:00 - 08:00")
+        return {
+            "peak_hours": _time_window("19:00 - 22:30"),
+            "secondary_peak": _time_window("12:30 - 14:00"),
+            "low_hours": low_usage,
+            "low_usage": low_usage,
+            "device_usage": device_usage,
+        }
 
-        return time_data
+    def _parse_device_row(self, parts: List[str], table_index: int) -> Optional[Dict]:
+        if len(parts) < 4:
+            return None
+        return {
+            "type": parts[1],
+            "active_hours": parts[2],
+            "avg_duration": parts[3],
+            "behavior": parts[4] if len(parts) > 4 else "",
+        }
 
     def _parse_tag_trends(self, section: str) -> List[Dict]:
         """解析标签趋势数据"""
-        trends = []
-        lines = section.split("\n")
-        in_table = False
-
-        for line in lines:
-            if "| 标签关键词" in line:
-                in_table = True
-                continue
-            elif in_table and line.strip() == "":
-                continue
-            elif in_table and "---" in line:
-                continue
-            elif in_table and line.strip().startswith("|"):
-                parts = [p.strip() for p in line.split("|")]
-                if len(parts) >= 5:
-                    try:
-                        trend = {
-                            "tag": parts[1],
-                            "frequency": int(parts[2]),
-                            "growth_rate": parts[3],
-                            "trend_analysis": parts[4],
-                        }
-                        trends.append(trend)
-                    except:
-                        continue
-            elif in_table and not line.strip().startswith("|"):
-                break
+        return self._read_table(section, self._tag_trends_reader())
 
-        return trends
+    def _parse_tag_trend_row(
+        self, parts: List[str], table_index: int
+    ) -> Optional[Dict]:
+        if len(parts) < 5:
+            return None
+        return {
+            "tag": parts[1],
+            "frequency": int(parts[2]),
+            "growth_rate": parts[3],
+            "trend_analysis": parts[4],
+        }
 
     def _parse_dj_charts(self, section: str) -> List[Dict]:
         """解析DJ榜单数据"""
-        dj_songs = []
-        lines = section.split("\n")
-        in_table = False
-        current_table = 0  # 0: 第一个榜单, 1: 第二个榜单
-
-        for line in lines:
-            if "| 排名 | 歌曲名" in line and "标签关键词" in line:
-                in_table = True
-                current_table += 1
-                continue
-            elif in_table and line.strip() == "":
-                continue
-            elif in_table and "---" in line:
-                continue
-            elif in_table and line.strip().startswith("|"):
-                parts = [p.strip() for p in line.split("|")]
-                if len(parts) >= 5:
-                    try:
-                        if current_table == 1:
-                            # 第一个榜单：有具体播放率
-                            song = {
-                                "rank": int(parts[1]),
-                                "title": parts[2],
-                                "tags": parts[3],
-                                "playback_rate": parts[4],
-                                "usage_scenario": parts[5] if len(parts) > 5 else "",
-                                "chart_type": "hot_chart",
-                            }
-                        else:
-                            # 第二个榜单：有热度状态
-                            song = {
-                                "rank": int(parts[1]),
-                                "title": parts[2],
-                                "tags": parts[3],
-                                "heat_status": parts[4],
-                                "usage_scenario": parts[5] if len(parts) > 5 else "",
-                                "chart_type": "trending_chart",
-                            }
-                        dj_songs.append(song)
-                    except:
-                        continue
-            elif in_table and not line.strip().startswith("|"):
-                break
-
-        return dj_songs
+        return self._read_table(section, self._dj_charts_reader())
+
+    def _parse_dj_row(self, parts: List[str], table_index: int) -> Optional[Dict]:
+        if len(parts) < 5:
+            return None
+        if table_index == 1:
+            # 第一个榜单：有具体播放率
+            return {
+                "rank": int(parts[1]),
+                "title": parts[2],
+                "tags": parts[3],
+                "playback_rate": parts[4],
+                "usage_scenario": parts[5] if len(parts) > 5 else "",
+                "chart_type": "hot_chart",
+            }
+        # 第二个榜单：有热度状态
+        return {
+            "rank": int(parts[1]),
+            "title": parts[2],
+            "tags": parts[3],
+            "heat_status": parts[4],
+            "usage_scenario": parts[5] if len(parts) > 5 else "",
+            "chart_type": "trending_chart",
+        }
 
     def analyze_top_songs(self) -> Dict:
         """分析热门歌曲数据"""
-        if not self.data.get("top_songs"):
+        songs = self.store.songs
+        if songs.empty:
             return self._get_default_top_songs_analysis()
 
-        songs = self.data["top_songs"]
         analysis = {
             "total_songs": len(songs),
-            "avg_playback_rate": sum(s["playback_rate"] for s in songs) / len(songs),
+            "avg_playback_rate": float(songs["playback_rate"].mean()),
             "emotion_dominated": True,
             "top_emotions": ["怀旧", "emo", "深情", "伤感"],
             "emotion_breakdown": {},
         }
 
-        # 统计情绪标签
-        emotion_counts = {}
-        for song in songs:
-            tags = song.get("tags", "").split("/")
-            for tag in tags:
-                tag = tag.strip()
-                if tag:
-                    emotion_counts[tag] = emotion_counts.get(tag, 0) + 1
+        # 统计情绪标签：基于稀疏关联矩阵的向量化标签分析
+        engine = TagAnalyticsEngine().fit(songs["tags"], songs["playback_rate"])
+        tag_summary = engine.summary()
+
+        analysis["emotion_breakdown"] = tag_summary["tag_frequencies"]
+        analysis["emotion_shares"] = tag_summary["emotion_shares"]
+        analysis["tag_cooccurrence"] = tag_summary["tag_cooccurrence"]
 
-        analysis["emotion_breakdown"] = emotion_counts
+        # 图表展示的榜单前列歌曲（直接取自列式存储，缺失值记为None）
+        top = songs.nsmallest(CHART_TOP_SONGS, "rank")
+        analysis["top_songs"] = [
+            {
+                "rank": int(rank),
+                "title": str(title),
+                "artist": None if pd.isna(artist) else str(artist),
+                "playback_rate": None if pd.isna(rate) else round(float(rate), 3),
+            }
+            for rank, title, artist, rate in zip(
+                top["rank"], top["title"], top["artist"], top["playback_rate"]
+            )
+        ]
 
         return analysis
 
@@ -436,8 +558,36 @@ class MusicDataAnalyzer:
             },
         )
 
-    def analyze_regional_trends(self) -> List[Dict]:
+    def analyze_regional_trends(self, max_tags: int = 10) -> List[Dict]:
         """分析地域偏好趋势"""
+        regional = self._get_regional_preferences()
+        if self.play_records is None or self.play_records.empty:
+            return regional
+
+        # 由点播记录计算市场占有率与各城市等级的标签偏好强度
+        matrix, market_share = self.regional_engine.aggregate_plays(self.play_records)
+        typical_songs = {
+            region["city_type"]: region.get("typical_songs", []) for region in regional
+        }
+
+        trends = []
+        for city_type, strengths in matrix.iterrows():
+            top = strengths[strengths > 0].nlargest(max_tags)
+            trends.append(
+                {
+                    "city_type": city_type,
+                    "preferred_tags": top.index.tolist(),
+                    "typical_songs": typical_songs.get(city_type, []),
+                    "market_share": float(market_share[city_type]),
+                    "tag_strengths": {
+                        tag: round(float(value), 4) for tag, value in top.items()
+                    },
+                }
+            )
+        return trends
+
+    def _get_regional_preferences(self) -> List[Dict]:
+        """获取解析出的地域偏好，缺失时使用默认数据"""
         return self.data.get(
             "regional_preferences",
             [
@@ -470,12 +620,23 @@ class MusicDataAnalyzer:
 
     def analyze_time_patterns(self) -> Dict:
         """分析时间使用模式"""
+        time_data = self._get_time_analysis()
+        if self.usage_histogram is None or self.usage_histogram.total_events == 0:
+            return time_data
+
+        # 由点播事件直方图自动识别高峰与低谷时段
+        return {**time_data, **self.usage_histogram.summary()}
+
+    def _get_time_analysis(self) -> Dict:
+        """获取解析出的时间分析，缺失时使用默认数据"""
         time_data = self.data.get("time_analysis", {})
         if not time_data:
+            low_usage = _time_window("03:00 - 08:00")
             return {
-                "peak_hours": "19:00 - 22:30",
-                "secondary_peak": "12:30 - 14:00",
-                "low_hours": "03:00 - 08:00",
+                "peak_hours": _time_window("19:00 - 22:30"),
+                "secondary_peak": _time_window("12:30 - 14:00"),
+                "low_hours": low_usage,
+                "low_usage": low_usage,
                 "device_usage": [
                     {
                         "type": "商业KTV",
@@ -506,7 +667,15 @@ class MusicDataAnalyzer:
         return time_data
 
     def analyze_tag_trends(self) -> List[Dict]:
-        """分析标签趋势"""
+        """分析标签趋势，growth_rate 与 predicted_growth 为预测模型给出的数值(%)"""
+        return self.tag_forecaster.apply(self._get_tag_trends(), self.tag_history)
+
+    def set_tag_history(self, history: pd.DataFrame):
+        """设置 标签×周 点播量历史，用于拟合标签增长预测"""
+        self.tag_history = history
+
+    def _get_tag_trends(self) -> List[Dict]:
+        """获取解析出的标签趋势，缺失时使用默认数据"""
         trends = self.data.get("tag_trends", [])
         if not trends:
             return [
@@ -596,6 +765,7 @@ class MusicDataAnalyzer:
                 "generated_at": datetime.now().isoformat(),
                 "data_source": "Billboard音乐曲库研究报告2025Q2",
                 "version": "1.0",
+                "period": self.report_period.to_dict() if self.report_period else None,
             },
             "executive_summary": {
                 "key_findings": [
@@ -630,75 +800,58 @@ class MusicDataAnalyzer:
 
         return report
 
-    def save_analysis_results(self, output_path: str):
-        """保存分析结果"""
-        report = self.generate_comprehensive_report()
-
-        with open(output_path, "w", encoding="utf-8") as f:
-            json.dump(report, f, ensure_ascii=False, indent=2)
+    def save_analysis_results(
+        self,
+        output_path: str,
+        report: Dict = None,
+        compact: bool = False,
+        max_workers: int = 4,
+    ):
+        """保存分析结果
+
+        report为已生成的分析报告（省略时重新生成）；compact为True时JSON不缩进。
+        JSON与二进制归档在后台线程中依次写出，同时写出processed目录的结构化数据
+        """
+        if report is None:
+            report = self.generate_comprehensive_report()
+
+        def write_report():
+            write_json(report, output_path, compact)
+            # 可内存映射的二进制伴随文件，读取单个章节无需解析整个JSON；
+            # 必须在JSON之后写出，load_analysis 只使用不旧于JSON的归档
+            write_archive(report, companion_path(output_path))
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            report_write = executor.submit(write_report)
+            # 同时保存结构化数据到processed目录
+            self._save_structured_data(max_workers=max_workers)
+            report_write.result()
 
         print(f"分析结果已保存到: {output_path}")
 
-        # 同时保存结构化数据到processed目录
-        self._save_structured_data()
-
-    def _save_structured_data(self):
-        """保存结构化数据到processed目录"""
-        import os
-
-        # 创建processed目录
-        processed_dir = "data/processed"
-        os.makedirs(processed_dir, exist_ok=True)
-
-        # 保存热门歌曲数据
-        if self.data.get("top_songs"):
-            with open(f"{processed_dir}/top_songs.json", "w", encoding="utf-8") as f:
-                json.dump(self.data["top_songs"], f, ensure_ascii=False, indent=2)
-
-        # 保存黑马榜数据
-        if self.data.get("rising_songs"):
-            with open(f"{processed_dir}/rising_songs.json", "w", encoding="utf-8") as f:
-                json.dump(self.data["rising_songs"], f, ensure_ascii=False, indent=2)
-
-        # 保存用户画像数据
-        if self.data.get("user_demographics"):
-            with open(
-                f"{processed_dir}/user_demographics.json", "w", encoding="utf-8"
-            ) as f:
-                json.dump(
-                    self.data["user_demographics"], f, ensure_ascii=False, indent=2
-                )
-
-        # 保存地域偏好数据
-        if self.data.get("regional_preferences"):
-            with open(
-                f"{processed_dir}/regional_preferences.json", "w", encoding="utf-8"
-            ) as f:
-                json.dump(
-                    self.data["regional_preferences"], f, ensure_ascii=False, indent=2
-                )
-
-        # 保存时间分析数据
-        if self.data.get("time_analysis"):
-            with open(
-                f"{processed_dir}/time_analysis.json", "w", encoding="utf-8"
-            ) as f:
-                json.dump(self.data["time_analysis"], f, ensure_ascii=False, indent=2)
-
-        # 保存标签趋势数据
-        if self.data.get("tag_trends"):
-            with open(f"{processed_dir}/tag_trends.json", "w", encoding="utf-8") as f:
-                json.dump(self.data["tag_trends"], f, ensure_ascii=False, indent=2)
-
-        # 保存DJ榜单数据
-        if self.data.get("dj_charts"):
-            with open(f"{processed_dir}/dj_charts.json", "w", encoding="utf-8") as f:
-                json.dump(self.data["dj_charts"], f, ensure_ascii=False, indent=2)
-
-        print("结构化数据已保存到 data/processed/ 目录")
+    def _save_structured_data(
+        self, processed_dir: str = "data/processed", max_workers: int = 1
+    ):
+        """按 年/季度/周 分区追加保存结构化数据到processed目录"""
+        store = ProcessedDataStore(processed_dir)
+        if self.report_period is not None:
+            snapshot, period = self.report_period.last_day, self.report_period.name
+        elif self.data_range is not None:
+            # 完整流程按数据本身的末日分区，重跑同一份数据总是写入同一分区
+            snapshot, period = self.data_range[1], FULL_PERIOD
+        else:
+            # 数据中没有任何日期信息时只能按运行日期分区
+            snapshot, period = date.today(), FULL_PERIOD
+        entries = store.append_all(self.data, snapshot, period, max_workers)
+
+        print(
+            f"结构化数据已保存到 {processed_dir}/ 目录"
+            f"（{len(entries)} 个数据集，分区 {store.partition(snapshot)}）"
+        )
 
 
 if __name__ == "__main__":
+    # 在项目根目录以模块方式运行: python -m analysis.data_analyzer
     analyzer = MusicDataAnalyzer()
 
     # 加载数据
@@ -708,6 +861,6 @@ if __name__ == "__main__":
     report = analyzer.generate_comprehensive_report()
 
     # 保存结果
-    analyzer.save_analysis_results("analysis/comprehensive_analysis.json")
+    analyzer.save_analysis_results("analysis/comprehensive_analysis.json", report)
 
     print("数据分析完成！")
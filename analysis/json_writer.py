@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+JSON写出模块
+安装了 orjson 时用其编码（比标准库快一个数量级），否则回退到标准库 json；
+输出与 json.dump(ensure_ascii=False, indent=2) 一致（orjson 将NaN写为null），
+也可选紧凑格式；文件先写临时文件再原子替换，读取方不会看到写了一半的结果
+"""
+
+import contextlib
+import json
+import os
+import uuid
+from typing import Any, BinaryIO, Iterator
+
+try:
+    import orjson
+except ImportError:  # orjson 为可选依赖
+    orjson = None
+
+
+def dumps(value: Any, compact: bool = False, use_orjson: bool = True) -> bytes:
+    """编码为UTF-8 JSON字节串；compact为True时不缩进、不加空格"""
+    if orjson is not None and use_orjson:
+        option = orjson.OPT_NON_STR_KEYS
+        if not compact:
+            option |= orjson.OPT_INDENT_2
+        try:
+            return orjson.dumps(value, option=option)
+        except TypeError:
+            # orjson 不支持的值（超出64位的整数等）交给标准库处理
+            pass
+    if compact:
+        text = json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+    else:
+        text = json.dumps(value, ensure_ascii=False, indent=2)
+    return text.encode("utf-8")
+
+
+@contextlib.contextmanager
+def atomic_open(path: str) -> Iterator[BinaryIO]:
+    """以二进制写方式打开path的临时文件，正常退出时原子替换为path
+
+    临时文件名带随机后缀并以独占方式创建，多个进程同时写同一路径互不干扰
+    （最后完成替换的结果生效）；写入出错时删除临时文件，原文件保持不变
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    temp_path = "{}.{}.tmp".format(path, uuid.uuid4().hex)
+    try:
+        with open(temp_path, "xb") as f:
+            yield f
+        os.replace(temp_path, path)
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(temp_path)
+        raise
+
+
+def write_json(value: Any, path: str, compact: bool = False):
+    """原子写出JSON文件"""
+    data = dumps(value, compact)
+    with atomic_open(path) as f:
+        f.write(data)
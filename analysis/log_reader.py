@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+点播日志读取模块
+按固定大小分块读取CSV、JSONL或Parquet点播日志
+"""
+
+import glob
+import os
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+import pandas as pd
+
+from analysis.periods import DEFAULT_TIMEZONE
+
+EPOCH = pd.Timestamp("1970-01-01")
+
+HOUR_SECONDS = 3600
+
+
+def utc_seconds(timestamps: pd.Series, timezone: str = DEFAULT_TIMEZONE) -> pd.Series:
+    """时间戳列转换为UTC秒：数值视为UTC秒，不带时区的时间文本视为timezone的本地时间"""
+    if pd.api.types.is_numeric_dtype(timestamps):
+        return timestamps.astype("int64")
+    times = pd.to_datetime(timestamps)
+    if times.dt.tz is None:
+        times = times.dt.tz_localize(
+            timezone, ambiguous="NaT", nonexistent="shift_forward"
+        )
+    return (times.dt.tz_convert(None) - EPOCH) // pd.Timedelta("1s")
+
+
+def local_times(timestamps: pd.Series, timezone: str = DEFAULT_TIMEZONE) -> pd.Series:
+    """时间戳列转换为timezone的本地时间（不带时区），数值与时间文本的规则同 utc_seconds"""
+    if pd.api.types.is_numeric_dtype(timestamps):
+        times = pd.to_datetime(timestamps, unit="s", utc=True)
+    else:
+        times = pd.to_datetime(timestamps)
+    if times.dt.tz is None:
+        return times
+    return times.dt.tz_convert(timezone).dt.tz_localize(None)
+
+
+def local_seconds(seconds: pd.Series, timezone: str = DEFAULT_TIMEZONE) -> pd.Series:
+    """UTC秒转换为timezone的本地挂钟秒数（按本地自然日、周分桶用）"""
+    return (local_times(seconds, timezone) - EPOCH) // pd.Timedelta("1s")
+
+
+def _seconds(value, timezone: str) -> Optional[int]:
+    """Parquet统计值（整数秒或时间戳）转换为UTC秒，无法比较的类型返回None"""
+    if isinstance(value, (int, float)):
+        return int(value)
+    if hasattr(value, "timestamp"):
+        value = pd.Timestamp(value)
+        if value.tzinfo is None:
+            # 与 utc_seconds 一致：不带时区的时间为本地时间
+            value = value.tz_localize(
+                timezone, ambiguous=True, nonexistent="shift_forward"
+            )
+        return int(value.timestamp())
+    return None
+
+
+def _row_groups_in_range(
+    parquet_file, column: str, time_range: Tuple[int, int], timezone: str
+) -> Optional[List[int]]:
+    """根据行组的最小/最大时间戳统计筛选可能落在 [start, end) 内的行组
+
+    缺少统计信息或时间戳为字符串时返回None（读取全部行组）。
+    """
+    if column not in parquet_file.schema_arrow.names:
+        return None
+    index = parquet_file.schema_arrow.get_field_index(column)
+    start, end = time_range
+    selected = []
+    for group in range(parquet_file.metadata.num_row_groups):
+        statistics = parquet_file.metadata.row_group(group).column(index).statistics
+        if statistics is None or not statistics.has_min_max:
+            return None
+        low = _seconds(statistics.min, timezone)
+        high = _seconds(statistics.max, timezone)
+        if low is None or high is None:
+            return None
+        # 放宽一小时：夏令时切换时本地时间对应的UTC时刻有一小时的不确定
+        if high + HOUR_SECONDS >= start and low - HOUR_SECONDS < end:
+            selected.append(group)
+    return selected
+
+
+def iter_log_chunks(
+    path: str,
+    columns: List[str],
+    chunksize: int = 1_000_000,
+    time_range: Tuple[int, int] = None,
+    timezone: str = DEFAULT_TIMEZONE,
+) -> Iterator[pd.DataFrame]:
+    """按块读取点播日志，只保留需要的列（日志中不存在的列会被忽略）
+
+    time_range为UTC秒级区间 [start, end)，Parquet日志会跳过整个行组都不在区间内的部分；
+    其余行仍需调用方按时间戳过滤。不带时区的时间戳按timezone的本地时间比较。
+    """
+    extension = os.path.splitext(path)[1].lower()
+
+    if extension == ".parquet":
+        import pyarrow.parquet as pq
+
+        parquet_file = pq.ParquetFile(path)
+        available = [c for c in columns if c in parquet_file.schema_arrow.names]
+        row_groups = (
+            _row_groups_in_range(parquet_file, "timestamp", time_range, timezone)
+            if time_range
+            else None
+        )
+        if row_groups == []:
+            return
+        for batch in parquet_file.iter_batches(
+            batch_size=chunksize, columns=available, row_groups=row_groups
+        ):
+            yield batch.to_pandas()
+    elif extension in (".jsonl", ".json"):
+        for chunk in pd.read_json(path, lines=True, chunksize=chunksize):
+            yield chunk[[c for c in columns if c in chunk.columns]]
+    else:
+        header = pd.read_csv(path, nrows=0).columns
+        available = [c for c in columns if c in header]
+        yield from pd.read_csv(path, usecols=available, chunksize=chunksize)
+
+
+def expand_log_paths(path: str, extensions: Iterable[str]) -> List[str]:
+    """将日志目录或通配符展开为分片文件列表（按文件名排序），单个文件原样返回"""
+    if os.path.isdir(path):
+        candidates = [os.path.join(path, name) for name in os.listdir(path)]
+    elif glob.has_magic(path):
+        candidates = glob.glob(path)
+    else:
+        return [path]
+
+    extensions = tuple(extensions)
+    return sorted(
+        candidate
+        for candidate in candidates
+        if os.path.isfile(candidate) and candidate.lower().endswith(extensions)
+    )
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+报告周期模块
+将周报/月报/季报换算为自然周、自然月、自然季度的时间窗口，
+只依赖标准库，命令行解析参数时即可使用
+"""
+
+from datetime import date, datetime, timedelta, tzinfo
+from typing import Dict, Tuple
+
+try:
+    from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+except ImportError:  # Python 3.8
+    ZoneInfo = ZoneInfoNotFoundError = None
+
+# 报告周期 -> 中文名称
+PERIODS = {"weekly": "周报", "monthly": "月报", "quarterly": "季报"}
+
+# 计算增长率所需的周期前历史天数（只参与按日聚合的增长基线与标签周历史）
+HISTORY_DAYS = 28
+
+# 点播时间戳按该时区划分小时、自然日与报告周期（终端主要分布在中国大陆）
+DEFAULT_TIMEZONE = "Asia/Shanghai"
+
+
+def get_timezone(name: str) -> tzinfo:
+    """时区名称（IANA，如 Asia/Shanghai）对应的tzinfo，未知时区抛出ValueError"""
+    if ZoneInfo is None:
+        from dateutil import tz
+
+        zone = tz.gettz(name)
+    else:
+        try:
+            zone = ZoneInfo(name)
+        except (ZoneInfoNotFoundError, ValueError):
+            zone = None
+    if zone is None:
+        raise ValueError(
+            "不支持的时区: {}（例如 {}、UTC）".format(name, DEFAULT_TIMEZONE)
+        )
+    return zone
+
+
+class ReportPeriod:
+    """报告周期：as_of 之前最近一个完整的自然周（周一至周日）、自然月或自然季度
+
+    区间为左闭右开的 [start, end)；调度器在周一、每月1日、每季度首日运行时，
+    正好对应刚结束的上一周、上一月、上一季度。日期边界为 timezone 时区的零点。
+    """
+
+    def __init__(self, kind: str, as_of: date = None, timezone: str = DEFAULT_TIMEZONE):
+        if kind not in PERIODS:
+            raise ValueError(
+                "不支持的报告周期: {}（可选 {}）".format(kind, ", ".join(PERIODS))
+            )
+        self.kind = kind
+        self.timezone = timezone
+        self.tzinfo = get_timezone(timezone)
+        self.as_of = as_of or datetime.now(self.tzinfo).date()
+        self.start, self.end = self._window(kind, self.as_of)
+
+    @staticmethod
+    def _window(kind: str, as_of: date) -> Tuple[date, date]:
+        if kind == "weekly":
+            end = as_of - timedelta(days=as_of.weekday())
+            return end - timedelta(days=7), end
+        if kind == "monthly":
+            end = as_of.replace(day=1)
+            return (end - timedelta(days=1)).replace(day=1), end
+        end = as_of.replace(month=(as_of.month - 1) // 3 * 3 + 1, day=1)
+        start = (end - timedelta(days=1)).replace(day=1)
+        return start.replace(month=(start.month - 1) // 3 * 3 + 1), end
+
+    @classmethod
+    def parse(
+        cls, kind: str, as_of: str = None, timezone: str = DEFAULT_TIMEZONE
+    ) -> "ReportPeriod":
+        """由命令行参数构造，as_of 格式为 YYYY-MM-DD"""
+        return cls(
+            kind,
+            datetime.strptime(as_of, "%Y-%m-%d").date() if as_of else None,
+            timezone,
+        )
+
+    @property
+    def last_day(self) -> date:
+        return self.end - timedelta(days=1)
+
+    @property
+    def tag(self) -> str:
+        """用于文件名的周期标识，与调度器的报告命名一致"""
+        if self.kind == "weekly":
+            return "{:%Y%m%d}_{:%Y%m%d}".format(self.start, self.last_day)
+        if self.kind == "monthly":
+            return "{:%Y%m}".format(self.start)
+        return "{}Q{}".format(self.start.year, (self.start.month - 1) // 3 + 1)
+
+    @property
+    def name(self) -> str:
+        """周期名称，如 weekly_20250623_20250629"""
+        return "{}_{}".format(self.kind, self.tag)
+
+    @property
+    def label(self) -> str:
+        return "{:%Y年%m月%d日} - {:%Y年%m月%d日}".format(self.start, self.last_day)
+
+    def seconds(self, history_days: int = 0) -> Tuple[int, int]:
+        """时间窗口（本地零点）对应的UTC秒级时间戳区间 [start, end)，可向前扩展history_days天"""
+        start = self.start - timedelta(days=history_days)
+        return tuple(
+            int(datetime.combine(day, datetime.min.time(), self.tzinfo).timestamp())
+            for day in (start, self.end)
+        )
+
+    def to_dict(self) -> Dict:
+        return {
+            "type": self.kind,
+            "name": PERIODS[self.kind],
+            "start": self.start.isoformat(),
+            "end": self.last_day.isoformat(),
+            "label": self.label,
+            "timezone": self.timezone,
+        }
@@ -0,0 +1,600 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+点播日志聚合模块
+分块读取终端点播日志并增量聚合为与Billboard报告解析结果相同结构的数据
+"""
+
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from analysis.log_reader import (
+    expand_log_paths,
+    iter_log_chunks,
+    local_seconds,
+    utc_seconds,
+)
+from analysis.periods import DEFAULT_TIMEZONE
+from analysis.time_patterns import UsageHistogram
+from analysis.topk_sketch import ALL_CITIES, ALL_WINDOWS, TopKSketch
+
+# 点播日志字段：title/artist/tags 为歌曲信息，tags以"/"分隔；
+# plays 为该行代表的点播次数（缺省为1），duration 为演唱时长（秒）
+PLAY_LOG_COLUMNS = [
+    "timestamp",
+    "title",
+    "artist",
+    "tags",
+    "city_type",
+    "device",
+    "plays",
+    "duration",
+    "release_date",
+]
+
+# 复核榜单计数只需读取的字段（榜单分段与歌曲键），列式日志可少读标签、设备等列
+RECHECK_COLUMNS = ["timestamp", "title", "artist", "city_type", "plays"]
+
+# 按点播日志处理的原始数据文件扩展名
+PLAY_LOG_EXTENSIONS = (".csv", ".jsonl", ".json", ".parquet")
+
+DAY_SECONDS = 24 * 3600
+
+
+def _add(total: Optional[pd.Series], partial: pd.Series) -> pd.Series:
+    """按索引累加两个计数序列"""
+    if total is None:
+        return partial
+    return total.add(partial, fill_value=0)
+
+
+def _format_duration(seconds: float) -> str:
+    """将秒数格式化为 "1h45m" / "58m" """
+    minutes = int(round(seconds / 60))
+    if minutes >= 60:
+        return f"{minutes // 60}h{minutes % 60}m"
+    return f"{minutes}m"
+
+
+def _format_growth(rate: float) -> str:
+    return f"{rate:+.0f}%"
+
+
+def rising_song_record(
+    rank: int,
+    title: str,
+    growth: float,
+    recent: float,
+    baseline: float,
+    period: str,
+    release_date: str = "",
+) -> Dict:
+    """黑马榜条目，与报告解析出的 rising_songs 字段一致
+
+    growth为增长率(%)，recent为最近周期点播量，baseline为此前同长度周期的平均点播量。
+    """
+    stars = int(min(5, max(1, 1 + growth // 50)))
+    return {
+        "rank": rank,
+        "title": title,
+        "release_date": release_date,
+        "growth_rate": _format_growth(growth),
+        "rating": "⭐" * stars,
+        "reason": "近{}点播{:.0f}次，为此前同期均值的{:.1f}倍".format(
+            period, recent, recent / baseline
+        ),
+    }
+
+
+def _aggregate_shard(
+    path: str,
+    chunksize: int,
+    sketch_options: Dict = None,
+    time_range: Tuple[int, int] = None,
+    history_days: int = 0,
+    timezone: str = DEFAULT_TIMEZONE,
+) -> "PlayLogAggregator":
+    """在子进程中将单个日志分片归约为部分聚合结果"""
+    return PlayLogAggregator.from_file(
+        path,
+        chunksize=chunksize,
+        sketch_options=sketch_options,
+        time_range=time_range,
+        history_days=history_days,
+        timezone=timezone,
+    )
+
+
+def _count_shard(
+    path: str,
+    chunksize: int,
+    keys: np.ndarray,
+    sketch_options: Dict = None,
+    time_range: Tuple[int, int] = None,
+    history_days: int = 0,
+    timezone: str = DEFAULT_TIMEZONE,
+) -> pd.Series:
+    """在子进程中精确统计单个日志分片里待复核榜单键的点播次数"""
+    aggregator = PlayLogAggregator(sketch_options, time_range, history_days, timezone)
+    chunks = (
+        aggregator._in_read_range(aggregator._prepare(chunk))
+        for chunk in iter_log_chunks(
+            path, RECHECK_COLUMNS, chunksize, aggregator.read_range, timezone
+        )
+    )
+    return aggregator.charts.exact_counts(chunks, keys)
+
+
+def _map_shards(task, paths: List[str], max_workers: int, *args):
+    """对每个分片执行 task(path, *args)，按完成顺序逐个产出结果
+
+    只有一个分片或一个进程时在当前进程中依次执行
+    """
+    workers = max_workers or min(len(paths), os.cpu_count() or 1)
+    if workers <= 1 or len(paths) <= 1:
+        for path in paths:
+            yield task(path, *args)
+        return
+
+    executor = ProcessPoolExecutor(
+        max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+    )
+    with executor:
+        futures = [executor.submit(task, path, *args) for path in paths]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def aggregate_shards(
+    paths: Sequence[str],
+    max_workers: int = None,
+    chunksize: int = 1_000_000,
+    sketch_options: Dict = None,
+    time_range: Tuple[int, int] = None,
+    history_days: int = 0,
+    timezone: str = DEFAULT_TIMEZONE,
+) -> "PlayLogAggregator":
+    """多进程并行聚合日志分片
+
+    每个子进程只返回按标签/城市等级/设备/日聚合后的部分结果与热门榜单草图，
+    主进程按完成顺序依次合并；合并满足结合律，结果与分片顺序无关。
+    """
+    options = (sketch_options, time_range, history_days, timezone)
+    total = PlayLogAggregator(*options)
+    for partial in _map_shards(
+        _aggregate_shard, list(paths), max_workers, chunksize, *options
+    ):
+        total.merge(partial)
+    return total
+
+
+class PlayLogAggregator:
+    """点播日志增量聚合器
+
+    只保留按标签、城市等级、设备与日聚合后的计数；歌曲维度的榜单
+    （爆款金曲榜、黑马榜、各城市等级的典型歌曲）都由固定内存的 TopKSketch 给出，
+    内存占用取决于标签规模与草图容量，与日志行数和曲库规模无关。
+    设置time_range（UTC秒级区间 [start, end)）时只统计该报告窗口内的点播，
+    窗口前history_days天的点播只计入标签按日聚合与榜单草图的窗口，作为增长率基线。
+    小时、自然日与榜单窗口按timezone的本地时间划分。
+    """
+
+    def __init__(
+        self,
+        sketch_options: Dict = None,
+        time_range: Tuple[int, int] = None,
+        history_days: int = 0,
+        timezone: str = DEFAULT_TIMEZONE,
+    ):
+        self.tag_day_plays = None  # (tag, day) -> plays
+        self.city_tag_plays = None  # (city_type, tag) -> plays
+        self.device_stats = None  # device -> [plays, duration, sessions]
+        self.histogram = UsageHistogram(timezone)
+        # 按城市等级×时间窗口的热播榜/趋势榜草图，参数见 TopKSketch
+        self.charts = TopKSketch(
+            timezone=timezone,
+            period_start=time_range[0] if time_range else None,
+            **(sketch_options or {}),
+        )
+        self.total_plays = 0
+        self.sketch_options = sketch_options
+        self.time_range = time_range
+        self.history_days = history_days
+        self.timezone = timezone
+
+    @property
+    def read_range(self) -> Optional[Tuple[int, int]]:
+        """需要读取的时间区间：报告窗口加上之前的历史天数"""
+        if self.time_range is None:
+            return None
+        start, end = self.time_range
+        return start - self.history_days * DAY_SECONDS, end
+
+    def _in_read_range(self, chunk: pd.DataFrame) -> pd.DataFrame:
+        if self.time_range is None:
+            return chunk
+        start, end = self.read_range
+        return chunk[(chunk["seconds"] >= start) & (chunk["seconds"] < end)]
+
+    def _in_window(self, chunk: pd.DataFrame) -> pd.DataFrame:
+        if self.time_range is None:
+            return chunk
+        start, end = self.time_range
+        return chunk[(chunk["seconds"] >= start) & (chunk["seconds"] < end)]
+
+    def _prepare(self, chunk: pd.DataFrame) -> pd.DataFrame:
+        """补齐缺省列，计算UTC秒级时间戳与本地自然日"""
+        chunk = chunk.copy()
+        chunk["plays"] = chunk["plays"] if "plays" in chunk else 1
+        if "artist" not in chunk:
+            chunk["artist"] = ""
+        if "tags" not in chunk:
+            chunk["tags"] = ""
+        chunk["tags"] = chunk["tags"].fillna("")
+
+        chunk["seconds"] = utc_seconds(chunk["timestamp"], self.timezone)
+        chunk["day"] = local_seconds(chunk["seconds"], self.timezone) // DAY_SECONDS
+        return chunk
+
+    def update(self, chunk: pd.DataFrame):
+        """聚合一块点播日志"""
+        chunk = self._in_read_range(self._prepare(chunk))
+        self._update_daily(chunk)
+        # 榜单草图同样读取历史点播，作为趋势榜与黑马榜的基线
+        self.charts.update(chunk)
+
+        chunk = self._in_window(chunk)
+        if chunk.empty:
+            return
+
+        self.total_plays += int(chunk["plays"].sum())
+        self.histogram.update(chunk["timestamp"], chunk.get("device"), chunk["plays"])
+
+        # 地域维度
+        if "city_type" in chunk:
+            self.city_tag_plays = _add(
+                self.city_tag_plays,
+                self._explode_tags(
+                    chunk.groupby(["city_type", "tags"], sort=False)["plays"].sum()
+                ),
+            )
+
+        # 设备维度
+        if "device" in chunk:
+            if "duration" not in chunk:
+                chunk["duration"] = np.nan
+            stats = chunk.groupby("device", sort=False).agg(
+                plays=("plays", "sum"),
+                duration=("duration", "sum"),
+                sessions=("duration", "count"),
+            )
+            self.device_stats = (
+                stats
+                if self.device_stats is None
+                else self.device_stats.add(stats, fill_value=0)
+            )
+
+    def _update_daily(self, chunk: pd.DataFrame):
+        """按日聚合标签点播（包含报告窗口前的历史点播）"""
+        if chunk.empty:
+            return
+
+        # 先按标签组合聚合，每种组合只拆分一次
+        self.tag_day_plays = _add(
+            self.tag_day_plays,
+            self._explode_tags(
+                chunk.groupby(["tags", "day"], sort=False)["plays"].sum()
+            ),
+        )
+
+    @staticmethod
+    def _explode_tags(grouped: pd.Series) -> pd.Series:
+        """将以"tags"为一级索引的计数拆分到单个标签"""
+        frame = grouped.rename("plays").reset_index()
+        frame["tag"] = frame["tags"].astype(str).str.split("/")
+        frame = frame.explode("tag")
+        frame["tag"] = frame["tag"].str.strip()
+        frame = frame[frame["tag"] != ""]
+        keys = [name if name != "tags" else "tag" for name in grouped.index.names]
+        return frame.groupby(keys, sort=False)["plays"].sum()
+
+    def merge(self, other: "PlayLogAggregator") -> "PlayLogAggregator":
+        """合并另一个聚合器的部分结果（结合律成立，可用于分片并行）"""
+        for name in ("tag_day_plays", "city_tag_plays"):
+            theirs = getattr(other, name)
+            if theirs is not None:
+                setattr(self, name, _add(getattr(self, name), theirs))
+        if other.device_stats is not None:
+            self.device_stats = (
+                other.device_stats
+                if self.device_stats is None
+                else self.device_stats.add(other.device_stats, fill_value=0)
+            )
+        self.histogram.merge(other.histogram)
+        self.charts.merge(other.charts)
+        self.total_plays += other.total_plays
+        return self
+
+    @classmethod
+    def from_file(
+        cls,
+        path: str,
+        chunksize: int = 1_000_000,
+        sketch_options: Dict = None,
+        time_range: Tuple[int, int] = None,
+        history_days: int = 0,
+        timezone: str = DEFAULT_TIMEZONE,
+    ) -> "PlayLogAggregator":
+        """流式读取点播日志文件"""
+        aggregator = cls(sketch_options, time_range, history_days, timezone)
+        for chunk in iter_log_chunks(
+            path, PLAY_LOG_COLUMNS, chunksize, aggregator.read_range, timezone
+        ):
+            aggregator.update(chunk)
+        return aggregator
+
+    @classmethod
+    def from_path(
+        cls,
+        path: str,
+        max_workers: int = None,
+        chunksize: int = 1_000_000,
+        sketch_options: Dict = None,
+        recheck: bool = True,
+        time_range: Tuple[int, int] = None,
+        history_days: int = 0,
+        timezone: str = DEFAULT_TIMEZONE,
+    ) -> "PlayLogAggregator":
+        """读取单个日志文件，或并行聚合目录/通配符下的全部日志分片
+
+        recheck为True时再读取一遍日志，对各榜单最终上榜歌曲的点播次数精确复核
+        （与聚合一样按分片并行读取）；time_range与history_days见类说明。
+        """
+        shards = expand_log_paths(path, PLAY_LOG_EXTENSIONS)
+        if not shards:
+            raise FileNotFoundError(f"未找到点播日志分片: {path}")
+        aggregator = aggregate_shards(
+            shards,
+            max_workers=max_workers,
+            chunksize=chunksize,
+            sketch_options=sketch_options,
+            time_range=time_range,
+            history_days=history_days,
+            timezone=timezone,
+        )
+        if recheck:
+            aggregator.recheck_charts(
+                shards, chunksize=chunksize, max_workers=max_workers
+            )
+        return aggregator
+
+    def recheck_charts(
+        self,
+        paths: Sequence[str],
+        chunksize: int = 1_000_000,
+        top_n: int = 10,
+        max_workers: int = None,
+    ):
+        """再次读取日志，精确统计各榜单前top_n首（及其基线窗口）的点播次数
+
+        只统计待复核的键；多个分片时在进程池中分别计数后相加
+        """
+        tracked = self.charts.recheck_targets(top_n)
+        if tracked is None:
+            return
+        keys = tracked["key"].to_numpy(dtype=np.uint64)
+        options = (
+            self.sketch_options,
+            self.time_range,
+            self.history_days,
+            self.timezone,
+        )
+        exact = pd.Series(0, index=pd.Index(keys), dtype="int64")
+        for counts in _map_shards(
+            _count_shard, list(paths), max_workers, chunksize, keys, *options
+        ):
+            exact = exact.add(counts, fill_value=0)
+        self.charts.apply_counts(tracked, exact)
+
+    def _growth(self, day_plays: pd.Series, window_days: int = 7) -> pd.DataFrame:
+        """最近window_days天相对此前同长度周期均值的增长率"""
+        keys = [name for name in day_plays.index.names if name != "day"]
+        days = day_plays.index.get_level_values("day")
+        periods = (days.max() - days.min() + 1 - window_days) / window_days
+        is_recent = days > days.max() - window_days
+
+        total = day_plays.groupby(level=keys, sort=False).sum()
+        recent = (
+            day_plays[is_recent]
+            .groupby(level=keys, sort=False)
+            .sum()
+            .reindex(total.index, fill_value=0)
+        )
+        baseline = (total - recent) / periods if periods > 0 else total * np.nan
+        growth = (recent - baseline) / baseline.where(baseline > 0) * 100
+        return pd.DataFrame(
+            {
+                "total": total,
+                "period": self._period_total(day_plays).reindex(
+                    total.index, fill_value=0
+                ),
+                "recent": recent,
+                "baseline": baseline,
+                "growth": growth,
+            }
+        )
+
+    def _period_total(self, day_plays: pd.Series) -> pd.Series:
+        """报告窗口内的点播合计（未设置窗口时为全部日期）"""
+        keys = [name for name in day_plays.index.names if name != "day"]
+        if self.time_range is not None:
+            days = day_plays.index.get_level_values("day")
+            first_day = local_seconds(pd.Series([self.time_range[0]]), self.timezone)
+            day_plays = day_plays[days >= first_day[0] // DAY_SECONDS]
+        return day_plays.groupby(level=keys).sum()
+
+    def top_songs(self, top_n: int = 10) -> List[Dict]:
+        """爆款金曲榜：报告周期内全部城市等级的热播榜"""
+        return [
+            {
+                "rank": song["rank"],
+                "title": song["title"],
+                "artist": song["artist"],
+                "tags": song["tags"],
+                "playback_rate": round(song["plays"] / self.total_plays * 100, 1),
+            }
+            for song in self.charts.hot_chart(ALL_CITIES, ALL_WINDOWS, top_n)
+        ]
+
+    def rising_songs(self, top_n: int = 5, min_baseline: float = 10) -> List[Dict]:
+        """黑马榜：最近一个自然周相对此前各完整周均值增长最快的歌曲"""
+        top = self.charts.rising(top_n, min_baseline)
+        return [
+            rising_song_record(
+                rank,
+                row["title"],
+                row["growth"],
+                row["recent"],
+                row["baseline"],
+                period="{}天".format(self.charts.window_days),
+                release_date=(
+                    "" if pd.isna(row["release_date"]) else str(row["release_date"])
+                ),
+            )
+            for rank, row in enumerate(top.to_dict("records"), start=1)
+        ]
+
+    def tag_trends(self, top_n: int = 10) -> List[Dict]:
+        """标签涨幅趋势榜"""
+        growth = self._growth(self.tag_day_plays)
+        top = growth.nlargest(top_n, "period")
+        return [
+            {
+                "tag": tag,
+                "frequency": int(row["period"]),
+                "growth_rate": (
+                    _format_growth(row["growth"]) if pd.notna(row["growth"]) else ""
+                ),
+                "trend_analysis": "",
+            }
+            for tag, row in top.iterrows()
+        ]
+
+    def tag_weekly_history(self) -> pd.DataFrame:
+        """标签×周点播量矩阵，周按数据最后一天向前对齐，不足7天的最早一周被舍弃"""
+        if self.tag_day_plays is None:
+            return pd.DataFrame()
+        days = self.tag_day_plays.index.get_level_values("day")
+        weeks_ago = (days.max() - days) // 7
+        weekly = (
+            self.tag_day_plays.groupby(
+                [self.tag_day_plays.index.get_level_values("tag"), -weeks_ago]
+            )
+            .sum()
+            .unstack(fill_value=0)
+        )
+        if (days.max() - days.min() + 1) % 7:
+            weekly = weekly.iloc[:, 1:]
+        weekly.index.name = "tag"
+        weekly.columns.name = "week"
+        return weekly
+
+    def city_tag_frame(self) -> pd.DataFrame:
+        """城市等级×标签点播记录，可直接用于地域偏好引擎"""
+        if self.city_tag_plays is None:
+            return pd.DataFrame(columns=["city_type", "tag", "plays"])
+        return self.city_tag_plays.rename("plays").reset_index()
+
+    def regional_preferences(self, top_n: int = 3) -> List[Dict]:
+        """各城市等级的高频标签与典型歌曲"""
+        if self.city_tag_plays is None:
+            return []
+
+        top_tags = (
+            self.city_tag_plays.sort_values(ascending=False, kind="stable")
+            .groupby(level="city_type", sort=False)
+            .head(top_n)
+        )
+        tier_plays = self.city_tag_plays.groupby(level="city_type").sum()
+
+        return [
+            {
+                "city_type": city_type,
+                "preferred_tags": top_tags.xs(
+                    city_type, level="city_type"
+                ).index.tolist(),
+                "typical_songs": [
+                    song["title"]
+                    for song in self.charts.hot_chart(city_type, ALL_WINDOWS, top_n)
+                ],
+                "market_share": round(
+                    float(tier_plays[city_type]) / float(tier_plays.sum()) * 100, 2
+                ),
+            }
+            for city_type in tier_plays.sort_values(ascending=False).index
+        ]
+
+    def time_analysis(self) -> Dict:
+        """时间分布与设备使用情况"""
+        time_data = self.histogram.summary()
+        windows = self.histogram.device_windows()
+
+        device_usage = []
+        if self.device_stats is not None:
+            for device, stats in self.device_stats.sort_values(
+                "plays", ascending=False
+            ).iterrows():
+                window = windows.get(device)
+                device_usage.append(
+                    {
+                        "type": device,
+                        "active_hours": (
+                            f"{window['start']} - {window['end']}" if window else ""
+                        ),
+                        "avg_duration": (
+                            _format_duration(stats["duration"] / stats["sessions"])
+                            if stats["sessions"]
+                            else None
+                        ),
+                        "behavior": "",
+                    }
+                )
+
+        time_data["device_usage"] = device_usage
+        return time_data
+
+    def date_range(self) -> Optional[Tuple[date, date]]:
+        """统计范围内点播的首尾本地日期（不含历史基线），没有点播时为None"""
+        if not self.total_plays:
+            return None
+        first_day = self.charts.first_day
+        if self.time_range is not None:
+            start = local_seconds(pd.Series([self.time_range[0]]), self.timezone)[0]
+            first_day = max(first_day, start // DAY_SECONDS)
+        return tuple(
+            date(1970, 1, 1) + timedelta(days=int(day))
+            for day in (first_day, self.charts.last_day)
+        )
+
+    def to_data(self) -> Dict:
+        """生成与 MusicDataAnalyzer.data 相同结构的数据"""
+        if not self.total_plays:
+            return {}
+        return {
+            "top_songs": self.top_songs(),
+            "rising_songs": self.rising_songs(),
+            "regional_preferences": self.regional_preferences(),
+            "time_analysis": self.time_analysis(),
+            "tag_trends": self.tag_trends(),
+            "dj_charts": [],
+            "chart_rankings": self.charts.charts(),
+            "chart_error_bounds": self.charts.error_bounds(),
+            "predictions": [],
+            "business_recommendations": [],
+        }
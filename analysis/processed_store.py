@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+分区结构化数据存储模块
+按 数据集/年/季度/周 分区以Parquet列式格式追加保存分析结果，
+每个文件登记到追加写入的清单索引，读取时只加载所需的分区与列
+"""
+
+import json
+import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Union
+
+import pandas as pd
+
+# 保存到processed目录的数据集（与 MusicDataAnalyzer.data 的键一致）
+PROCESSED_DATASETS = [
+    "top_songs",
+    "rising_songs",
+    "user_demographics",
+    "regional_preferences",
+    "time_analysis",
+    "tag_trends",
+    "dj_charts",
+    "chart_rankings",
+    "chart_error_bounds",
+]
+
+# 完整流程（未指定报告周期）的快照标记
+FULL_PERIOD = "full"
+
+
+def _parquet_writable(data_type) -> bool:
+    """Parquet能否保存该类型：不含无字段的结构（如全为空字典的列）"""
+    import pyarrow as pa
+
+    if data_type.num_fields == 0:
+        return not pa.types.is_struct(data_type)
+    return all(
+        _parquet_writable(data_type.field(i).type) for i in range(data_type.num_fields)
+    )
+
+
+class ProcessedDataStore:
+    """按时间分区的结构化数据存储
+
+    目录结构为 <root>/<数据集>/year=YYYY/quarter=N/week=WW/part-<uuid>.parquet，
+    年与周为快照日期的ISO年与ISO周序号，季度为该ISO周周四所在的季度。
+    每次保存在对应分区新增一个随机命名的文件（多个进程同时写入也不会冲突），已有文件从不改写；
+    <root>/manifest.jsonl 每行记录一个文件的数据集、分区、快照日期、报告周期与列。
+    列表型数据集（榜单等）每条记录一行，字典型数据集（用户画像等）保存为单行。
+    """
+
+    MANIFEST = "manifest.jsonl"
+
+    def __init__(self, root: str = "data/processed"):
+        self.root = root
+        self.manifest_path = os.path.join(root, self.MANIFEST)
+        self._manifest = []
+        self._manifest_size = 0
+
+    @staticmethod
+    def partition(snapshot: date) -> str:
+        """快照日期所属分区的相对路径（跨年的ISO周归入ISO年，如2024-12-30属于2025年第1周）"""
+        iso_year, iso_week, iso_weekday = snapshot.isocalendar()
+        thursday = snapshot + timedelta(days=4 - iso_weekday)
+        return "year={}/quarter={}/week={:02d}".format(
+            iso_year, (thursday.month - 1) // 3 + 1, iso_week
+        )
+
+    def manifest(self) -> List[Dict]:
+        """清单中的全部文件记录；清单只追加，按文件大小增量读取新行"""
+        try:
+            size = os.path.getsize(self.manifest_path)
+        except FileNotFoundError:
+            return []
+        if size < self._manifest_size:
+            self._manifest, self._manifest_size = [], 0
+        if size > self._manifest_size:
+            with open(self.manifest_path, "rb") as f:
+                f.seek(self._manifest_size)
+                new_lines = f.read(size - self._manifest_size)
+            complete = new_lines[: new_lines.rfind(b"\n") + 1]
+            self._manifest.extend(
+                json.loads(line) for line in complete.splitlines() if line.strip()
+            )
+            self._manifest_size += len(complete)
+        return self._manifest
+
+    def append(
+        self,
+        dataset: str,
+        value: Union[List[Dict], Dict],
+        snapshot: date,
+        period: str = FULL_PERIOD,
+    ) -> Optional[Dict]:
+        """在快照日期所在分区追加一个数据文件，返回清单记录（数据为空时不写入）"""
+        entry = self._write_part(dataset, value, snapshot, period)
+        if entry is not None:
+            self._record([entry])
+        return entry
+
+    def _write_part(
+        self, dataset: str, value: Union[List[Dict], Dict], snapshot: date, period: str
+    ) -> Optional[Dict]:
+        """写出一个数据文件并返回其清单记录（尚未写入清单）"""
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        if not value:
+            return None
+        shape = "records" if isinstance(value, list) else "object"
+        rows = value if shape == "records" else [value]
+
+        # 列为所有记录字段的并集，部分记录缺少的字段读取时再去掉
+        columns = list(dict.fromkeys(key for row in rows for key in row))
+        sparse_columns = [
+            column for column in columns if any(column not in row for row in rows)
+        ]
+        values = {column: [row.get(column) for row in rows] for column in columns}
+        arrays, json_columns = {}, []
+        for column in columns:
+            try:
+                array = pa.array(values[column])
+            except (pa.ArrowInvalid, pa.ArrowTypeError):
+                # 同一列类型不一致（如数值与文本混用）
+                array = None
+            if array is None or not _parquet_writable(array.type):
+                # 无法以原生类型保存的列（含空字典等无字段结构）按JSON文本保存
+                array = pa.array(
+                    [json.dumps(value, ensure_ascii=False) for value in values[column]]
+                )
+                json_columns.append(column)
+            arrays[column] = array
+        table = pa.table(arrays)
+
+        partition = self.partition(snapshot)
+        directory = os.path.join(self.root, dataset, partition)
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, "part-{}.parquet".format(uuid.uuid4().hex))
+        temp_path = path + ".tmp"
+        try:
+            pq.write_table(table, temp_path, compression="zstd")
+        except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+            # 其余Parquet不支持的嵌套类型：整表按JSON文本重写
+            json_columns = columns
+            table = pa.table(
+                {
+                    column: [
+                        json.dumps(value, ensure_ascii=False)
+                        for value in values[column]
+                    ]
+                    for column in columns
+                }
+            )
+            pq.write_table(table, temp_path, compression="zstd")
+        os.replace(temp_path, path)
+
+        return {
+            "dataset": dataset,
+            "path": os.path.relpath(path, self.root),
+            "partition": partition,
+            "snapshot": snapshot.isoformat(),
+            "period": period,
+            "period_type": period.split("_", 1)[0],
+            "shape": shape,
+            "rows": table.num_rows,
+            "columns": table.column_names,
+            "json_columns": json_columns,
+            "sparse_columns": sparse_columns,
+            "written_at": datetime.now().isoformat(timespec="seconds"),
+        }
+
+    def entries(
+        self,
+        dataset: str,
+        start: date = None,
+        end: date = None,
+        period_type: str = None,
+    ) -> List[Dict]:
+        """按快照日期区间 [start, end] 与报告周期类型筛选清单记录（按写入顺序）"""
+        start = start.isoformat() if start else ""
+        end = end.isoformat() if end else "9999"
+        return [
+            entry
+            for entry in self.manifest()
+            if entry["dataset"] == dataset
+            and start <= entry["snapshot"] <= end
+            and (period_type is None or entry["period_type"] == period_type)
+        ]
+
+    def _read_table(self, entry: Dict, columns: Iterable[str] = None):
+        """读取一个数据文件的指定列（文件中不存在的列会被忽略）"""
+        import pyarrow.parquet as pq
+
+        if columns is not None:
+            columns = [column for column in columns if column in entry["columns"]]
+            if not columns:
+                return None
+        return pq.read_table(
+            os.path.join(self.root, entry["path"]), columns=columns, memory_map=True
+        )
+
+    def read(
+        self,
+        dataset: str,
+        columns: Iterable[str] = None,
+        start: date = None,
+        end: date = None,
+        period_type: str = None,
+    ) -> pd.DataFrame:
+        """读取多个快照的指定列，附加 snapshot 与 period 列，便于跨年查询历史
+
+        只打开清单中快照日期落在区间内的文件，且只读取所需的列
+        """
+        columns = list(columns) if columns is not None else None
+        frames = []
+        for entry in self.entries(dataset, start, end, period_type):
+            table = self._read_table(entry, columns)
+            if table is None:
+                continue
+            frame = table.to_pandas()
+            for column in entry["json_columns"]:
+                if column in frame:
+                    frame[column] = frame[column].map(json.loads)
+            frame.insert(0, "snapshot", pd.Timestamp(entry["snapshot"]))
+            frame.insert(1, "period", entry["period"])
+            frames.append(frame)
+        if not frames:
+            return pd.DataFrame(columns=["snapshot", "period"] + (columns or []))
+        return pd.concat(frames, ignore_index=True)
+
+    def _record(self, entries: List[Dict]):
+        """将数据文件记录追加到清单（数据文件已写完后才登记）"""
+        with open(self.manifest_path, "a", encoding="utf-8") as f:
+            f.write(
+                "".join(
+                    json.dumps(entry, ensure_ascii=False) + "\n" for entry in entries
+                )
+            )
+
+    def append_all(
+        self,
+        data: Dict,
+        snapshot: date,
+        period: str = FULL_PERIOD,
+        max_workers: int = 1,
+    ) -> List[Dict]:
+        """追加保存分析数据中的全部结构化数据集
+
+        max_workers大于1时在线程池中并发写出各数据集（Parquet编码与压缩不占用GIL），
+        全部写完后按数据集顺序一次性登记到清单
+        """
+
+        def write(dataset: str) -> Optional[Dict]:
+            return self._write_part(dataset, data.get(dataset), snapshot, period)
+
+        if max_workers > 1:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                entries = list(executor.map(write, PROCESSED_DATASETS))
+        else:
+            entries = [write(dataset) for dataset in PROCESSED_DATASETS]
+        entries = [entry for entry in entries if entry]
+        if entries:
+            self._record(entries)
+        return entries
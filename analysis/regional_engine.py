@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+地域偏好分析模块
+由解析出的地域偏好或逐条点播记录构建城市等级×标签偏好矩阵与市场占有率
+"""
+
+import hashlib
+import json
+from typing import Dict, List, Tuple
+
+import pandas as pd
+
+from analysis.lru import LRUCache
+
+
+class RegionalPreferenceEngine:
+    """地域偏好引擎，聚合结果按输入内容哈希缓存（最多cache_size项，按最近使用淘汰）"""
+
+    def __init__(self, cache_size: int = 32):
+        self._cache = LRUCache(cache_size)
+
+    def _cached(self, key: str, compute):
+        return self._cache.get_or_compute(key, compute)
+
+    def preference_matrix(self, regional_data: List[Dict]) -> pd.DataFrame:
+        """城市等级×标签偏好强度矩阵（0-1，每行最大值为1）
+
+        记录中带有 tag_strengths 时直接使用；否则按 preferred_tags 的排列顺序
+        赋予递减权重，排第一的标签强度为1。
+        """
+        key = hashlib.sha1(
+            json.dumps(regional_data, ensure_ascii=False, sort_keys=True).encode()
+        ).hexdigest()
+        return self._cached(
+            "records:" + key, lambda: self._matrix_from_records(regional_data)
+        )
+
+    def _matrix_from_records(self, regional_data: List[Dict]) -> pd.DataFrame:
+        rows = pd.DataFrame(regional_data)
+        if rows.empty:
+            return pd.DataFrame()
+
+        tiers = pd.Index(rows["city_type"]).unique()
+        if "tag_strengths" in rows and rows["tag_strengths"].notna().all():
+            matrix = pd.DataFrame(
+                rows["tag_strengths"].tolist(), index=rows["city_type"]
+            ).fillna(0.0)
+            return matrix.groupby(level=0, sort=False).max().reindex(tiers)
+
+        long = rows[["city_type", "preferred_tags"]].explode("preferred_tags")
+        long = long.dropna(subset=["preferred_tags"])
+        position = long.groupby(level=0).cumcount()
+        size = long.groupby(level=0)["preferred_tags"].transform("size")
+        long["strength"] = (size - position) / size
+
+        matrix = long.pivot_table(
+            index="city_type",
+            columns="preferred_tags",
+            values="strength",
+            aggfunc="max",
+            fill_value=0.0,
+            sort=False,
+        )
+        matrix.columns.name = None
+        return matrix.reindex(tiers).fillna(0.0)
+
+    def aggregate_plays(self, plays: pd.DataFrame) -> Tuple[pd.DataFrame, pd.Series]:
+        """由点播记录聚合偏好矩阵与市场占有率
+
+        plays每行为一个(城市等级, 标签)的点播，列为 city_type、tag，
+        可选 plays 列表示该行的点播次数（缺省为1）。
+        返回 (偏好强度矩阵, 各城市等级市场占有率%)。
+        """
+        key = hashlib.sha1(
+            pd.util.hash_pandas_object(plays, index=False).to_numpy().tobytes()
+        ).hexdigest()
+        return self._cached("plays:" + key, lambda: self._aggregate_plays(plays))
+
+    def _aggregate_plays(self, plays: pd.DataFrame) -> Tuple[pd.DataFrame, pd.Series]:
+        weights = plays["plays"] if "plays" in plays else pd.Series(1, plays.index)
+        counts = (
+            weights.groupby(
+                [plays["city_type"], plays["tag"]], sort=False, observed=True
+            )
+            .sum()
+            .unstack(fill_value=0)
+        )
+        counts.columns.name = None
+
+        tier_totals = counts.sum(axis=1)
+        shares = counts.div(tier_totals.where(tier_totals > 0), axis=0).fillna(0.0)
+        row_max = shares.max(axis=1)
+        matrix = shares.div(row_max.where(row_max > 0), axis=0).fillna(0.0)
+
+        total = tier_totals.sum()
+        market_share = (tier_totals / total * 100).round(2) if total else tier_totals
+        return matrix, market_share
+
+    @staticmethod
+    def top_tags(matrix: pd.DataFrame, limit: int) -> List[str]:
+        """按各城市等级偏好强度之和选出最突出的标签，保持原列顺序"""
+        if matrix.empty:
+            return []
+        totals = matrix.sum(axis=0)
+        keep = totals.index.isin(totals.nlargest(limit, keep="first").index)
+        return matrix.columns[keep].tolist()
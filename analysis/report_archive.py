@@ -0,0 +1,372 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+分析结果二进制归档模块
+为 comprehensive_analysis.json 生成可内存映射的二进制伴随文件：
+数值列表以零拷贝NumPy视图为底层存储，字符串表与记录按需解码，打开归档只需解析一个小索引
+"""
+
+import json
+import mmap
+import os
+import struct
+from collections.abc import Mapping, Sequence
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+from analysis.archive_paths import ARCHIVE_MIN_BYTES, companion_path
+from analysis.json_writer import atomic_open
+
+MAGIC = b"MWPA\x01\x00\x00\x00"
+HEADER = struct.Struct("<8sQQ")  # 魔数, 索引偏移, 索引长度
+ALIGNMENT = 8
+
+# 长度不少于该值的列表才写入二进制区，较小的结构直接保存在索引中
+MIN_BINARY_LENGTH = 16
+
+
+class _ArchiveWriter:
+    """按8字节对齐追加二进制数据块"""
+
+    def __init__(self, f):
+        self.f = f
+        self.offset = HEADER.size
+
+    def add(self, data: bytes) -> int:
+        padding = -self.offset % ALIGNMENT
+        self.f.write(b"\0" * padding)
+        self.offset += padding
+        start = self.offset
+        self.f.write(data)
+        self.offset += len(data)
+        return start
+
+    def numbers(self, values: List) -> Any:
+        """整数或浮点列表写为数值数组，类型混杂或越界时返回None"""
+        if all(type(value) is int for value in values):
+            dtype = "<i8"
+        elif all(type(value) is float for value in values):
+            dtype = "<f8"
+        else:
+            return None
+        try:
+            array = np.asarray(values, dtype=dtype)
+        except OverflowError:
+            return None
+        return {"a": [dtype, self.add(array.tobytes()), len(values)]}
+
+    def strings(self, values: List[str]) -> Dict:
+        """字符串列表写为 偏移数组 + UTF-8数据块"""
+        encoded = [value.encode("utf-8") for value in values]
+        offsets = np.zeros(len(encoded) + 1, dtype="<i8")
+        np.cumsum([len(item) for item in encoded], out=offsets[1:])
+        return {
+            "s": [
+                self.add(offsets.tobytes()),
+                len(encoded),
+                self.add(b"".join(encoded)),
+            ]
+        }
+
+    def encode(self, value: Any) -> Tuple[Dict, bool]:
+        """编码为索引节点，返回 (节点, 子树是否引用了二进制区)"""
+        if isinstance(value, dict):
+            children = {key: self.encode(child) for key, child in value.items()}
+            if any(binary for _, binary in children.values()):
+                return {"d": {key: node for key, (node, _) in children.items()}}, True
+            return {"v": value}, False
+
+        if isinstance(value, list):
+            if len(value) >= MIN_BINARY_LENGTH:
+                node = self._encode_long_list(value)
+                if node is not None:
+                    return node, True
+            children = [self.encode(child) for child in value]
+            if any(binary for _, binary in children):
+                return {"l": [node for node, _ in children]}, True
+            return {"v": value}, False
+
+        return {"v": value}, False
+
+    def _encode_long_list(self, values: List) -> Any:
+        if all(type(value) is str for value in values):
+            return self.strings(values)
+        if all(type(value) is list for value in values):
+            # 列表的列表（如每首歌的标签列表）展平后保存，另存每项的起止偏移
+            flat = [item for value in values for item in value]
+            node, binary = self._encode_column(flat)
+            if not binary:
+                return None
+            offsets = np.zeros(len(values) + 1, dtype="<i8")
+            np.cumsum([len(value) for value in values], out=offsets[1:])
+            return {"n": [self.add(offsets.tobytes()), len(values), node]}
+        if all(isinstance(value, dict) for value in values):
+            keys = list(values[0])
+            if all(list(value) == keys for value in values):
+                # 字段一致的记录按列保存
+                columns = {}
+                for key in keys:
+                    column = [value[key] for value in values]
+                    node, _ = self._encode_column(column)
+                    columns[key] = node
+                return {"r": [len(values), columns]}
+            return None
+        return self.numbers(values)
+
+    def _encode_column(self, values: List) -> Tuple[Dict, bool]:
+        """记录的一列或展平后的列表：不受最小长度限制，尽量写入二进制区"""
+        if values and all(type(value) is str for value in values):
+            return self.strings(values), True
+        node = self.numbers(values) if values else None
+        if node is None and values and all(type(value) is list for value in values):
+            node = self._encode_long_list(values)
+        if node is not None:
+            return node, True
+        return self.encode(values)
+
+
+def write_archive(report: Dict, path: str):
+    """写出二进制归档（先写临时文件再原子替换，已映射的旧文件不受影响）"""
+    with atomic_open(path) as f:
+        f.write(HEADER.pack(MAGIC, 0, 0))
+        writer = _ArchiveWriter(f)
+        node, _ = writer.encode(report)
+        index = json.dumps(node, ensure_ascii=False).encode("utf-8")
+        index_offset = writer.add(index)
+        f.seek(0)
+        f.write(HEADER.pack(MAGIC, index_offset, len(index)))
+
+
+class _Archive:
+    """已映射的归档文件"""
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            self.buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, index_offset, index_length = HEADER.unpack_from(self.buffer, 0)
+        if magic != MAGIC:
+            raise ValueError(f"不是分析结果归档文件: {path}")
+        self.root = json.loads(
+            self.buffer[index_offset : index_offset + index_length].decode("utf-8")
+        )
+
+    def decode(self, node: Dict) -> Any:
+        kind, payload = next(iter(node.items()))
+        if kind == "v":
+            return payload
+        if kind == "d":
+            return ArchiveMapping(self, payload)
+        if kind == "l":
+            return [self.decode(child) for child in payload]
+        if kind == "a":
+            dtype, offset, length = payload
+            return NumberArray(
+                np.frombuffer(self.buffer, dtype=dtype, count=length, offset=offset)
+            )
+        if kind == "s":
+            return StringTable(self, *payload)
+        if kind == "r":
+            return RecordTable(self, *payload)
+        if kind == "n":
+            return NestedList(self, *payload)
+        raise ValueError(f"未知的归档节点类型: {kind}")
+
+
+def to_python(value: Any) -> Any:
+    """将归档中的惰性对象完整转换为普通的字典、列表与标量"""
+    if isinstance(value, Mapping):
+        return {key: to_python(child) for key, child in value.items()}
+    if isinstance(value, NumberArray):
+        return value.values.tolist()
+    if isinstance(value, (list, StringTable, RecordTable, NestedList)):
+        return [to_python(child) for child in value]
+    return value
+
+
+class ArchiveMapping(Mapping):
+    """归档中的字典节点，子节点在首次访问时解码"""
+
+    def __init__(self, archive: _Archive, nodes: Dict[str, Dict]):
+        self._archive = archive
+        self._nodes = nodes
+        self._values = {}
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in self._values:
+            self._values[key] = self._archive.decode(self._nodes[key])
+        return self._values[key]
+
+    def __iter__(self):
+        return iter(self._nodes)
+
+    def __len__(self) -> int:
+        return len(self._nodes)
+
+    def __reduce__(self):
+        # 传给子进程（如并行绘图）时转换为普通字典
+        return dict, (to_python(self),)
+
+
+class NumberArray(Sequence):
+    """数值列表：行为与普通列表一致（元素为Python标量），
+    NumPy/pandas/matplotlib 通过 __array__ 直接使用映射的数组"""
+
+    def __init__(self, values: np.ndarray):
+        self.values = values
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self.values[index].tolist()
+        return self.values[index].item()
+
+    def __iter__(self):
+        return iter(self.values.tolist())
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def __array__(self, dtype=None, copy=None):
+        if dtype is None or np.dtype(dtype) == self.values.dtype:
+            return self.values.copy() if copy else self.values
+        return self.values.astype(dtype)
+
+    def __reduce__(self):
+        return list, (self.values.tolist(),)
+
+
+class StringTable(Sequence):
+    """字符串列表：按下标从映射的UTF-8数据块中解码单个字符串"""
+
+    def __init__(self, archive: _Archive, offsets: int, length: int, data: int):
+        self._buffer = archive.buffer
+        self._offsets = np.frombuffer(
+            archive.buffer, dtype="<i8", count=length + 1, offset=offsets
+        )
+        self._data = data
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        start, end = self._offsets[index : index + 2] + self._data
+        return self._buffer[start:end].decode("utf-8")
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __reduce__(self):
+        return list, (list(self),)
+
+
+class NestedList(Sequence):
+    """列表的列表：第i项为展平数据中 [offsets[i], offsets[i+1]) 的部分"""
+
+    def __init__(self, archive: _Archive, offsets: int, length: int, flat: Dict):
+        self._offsets = np.frombuffer(
+            archive.buffer, dtype="<i8", count=length + 1, offset=offsets
+        )
+        self._flat = archive.decode(flat)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        start, end = self._offsets[index : index + 2]
+        return to_python(self._flat[start:end])
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __reduce__(self):
+        return list, (list(self),)
+
+
+class RecordTable(Sequence):
+    """字段一致的记录列表，按列保存；按下标访问时才组装单条记录"""
+
+    def __init__(self, archive: _Archive, length: int, columns: Dict[str, Dict]):
+        self._archive = archive
+        self._length = length
+        self._nodes = columns
+        self._columns = {}
+
+    @property
+    def keys(self) -> List[str]:
+        return list(self._nodes)
+
+    def column(self, key: str) -> Any:
+        """单列数据：数值列为零拷贝NumPy视图，字符串列为 StringTable"""
+        if key not in self._columns:
+            column = self._archive.decode(self._nodes[key])
+            if isinstance(column, NumberArray):
+                column = column.values
+            self._columns[key] = column
+        return self._columns[key]
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError(index)
+        record = {}
+        for key in self._nodes:
+            value = self.column(key)[index]
+            record[key] = value.item() if isinstance(value, np.generic) else value
+        return record
+
+    def __len__(self) -> int:
+        return self._length
+
+    def to_frame(self):
+        """转换为DataFrame（数值列直接使用映射的数组）"""
+        import pandas as pd
+
+        columns = {}
+        for key in self._nodes:
+            column = self.column(key)
+            columns[key] = column if isinstance(column, np.ndarray) else list(column)
+        return pd.DataFrame(columns)
+
+    def __reduce__(self):
+        return list, (list(self),)
+
+
+def open_archive(path: str) -> ArchiveMapping:
+    """内存映射打开二进制归档，返回惰性解码的顶层字典"""
+    archive = _Archive(path)
+    root = archive.decode(archive.root)
+    return root if isinstance(root, Mapping) else ArchiveMapping(archive, {})
+
+
+def load_analysis(json_path: str = "analysis/comprehensive_analysis.json") -> Any:
+    """读取分析结果：JSON较大且二进制归档不旧于JSON时直接映射归档，否则解析JSON"""
+    archive_path = companion_path(json_path)
+    try:
+        archive_mtime = os.stat(archive_path).st_mtime_ns
+    except FileNotFoundError:
+        archive_mtime = None
+    try:
+        json_stat = os.stat(json_path)
+        json_mtime, json_size = json_stat.st_mtime_ns, json_stat.st_size
+    except FileNotFoundError:
+        if archive_mtime is None:
+            raise
+        json_mtime, json_size = 0, ARCHIVE_MIN_BYTES
+
+    if (
+        archive_mtime is not None
+        and archive_mtime >= json_mtime
+        and json_size >= ARCHIVE_MIN_BYTES
+    ):
+        return open_archive(archive_path)
+    with open(json_path, "r", encoding="utf-8") as f:
+        return json.load(f)
@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+黑马榜增量检测模块
+以按时间分桶的环形缓冲区保存每首歌的滚动点播量，新点播到达时只更新对应分桶，
+无需回扫历史即可重新计算最近窗口相对基线窗口的增长率
+"""
+
+import os
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from analysis.log_reader import local_seconds, utc_seconds
+from analysis.periods import DEFAULT_TIMEZONE
+from analysis.play_logs import rising_song_record
+
+HOUR_SECONDS = 3600
+
+
+class RisingSongDetector:
+    """增量黑马榜检测器
+
+    环形缓冲区为 歌曲×分桶 的计数矩阵，覆盖最近 recent_buckets + baseline_buckets 个分桶。
+    最近窗口与基线窗口的点播合计随分桶滚动增量维护：
+    每批新点播的更新代价与新点播数成正比，每滚动一个分桶只需一次按列的向量运算。
+    内存约为 歌曲数 × 分桶数 × 4 字节。
+    分桶按timezone的本地时间划分（按天分桶时以本地零点为界），head_time 为本地时间。
+    """
+
+    def __init__(
+        self,
+        bucket_seconds: int = HOUR_SECONDS,
+        recent_buckets: int = 24,
+        baseline_buckets: int = 24 * 7,
+        timezone: str = DEFAULT_TIMEZONE,
+    ):
+        self.bucket_seconds = bucket_seconds
+        self.timezone = timezone
+        self.recent_buckets = recent_buckets
+        self.baseline_buckets = baseline_buckets
+        self.n_buckets = recent_buckets + baseline_buckets
+        if recent_buckets < 1 or baseline_buckets < 1:
+            raise ValueError("最近窗口与基线窗口至少各包含一个分桶")
+
+        self.songs = pd.MultiIndex.from_arrays([[], []], names=["title", "artist"])
+        self.ring = np.zeros((0, self.n_buckets), dtype=np.int32)
+        self.recent_plays = np.zeros(0, dtype=np.int64)
+        self.baseline_plays = np.zeros(0, dtype=np.int64)
+        self.release_dates = {}
+        self.head = None  # 最新分桶的绝对编号
+        self.late_events = 0
+
+    def _rows(self, titles: pd.Series, artists: pd.Series) -> np.ndarray:
+        """歌曲对应的行号，新歌曲追加到矩阵末尾"""
+        keys = pd.MultiIndex.from_arrays([titles, artists], names=self.songs.names)
+        rows = self.songs.get_indexer(keys)
+        missing = rows < 0
+        if missing.any():
+            new_songs = keys[missing].unique()
+            self.songs = self.songs.append(new_songs)
+            self._grow(len(self.songs))
+            rows[missing] = self.songs.get_indexer(keys[missing])
+        return rows
+
+    def _grow(self, size: int):
+        """按倍增方式扩充缓冲区行数"""
+        if size <= len(self.ring):
+            return
+        capacity = max(size, 2 * len(self.ring), 1024)
+        ring = np.zeros((capacity, self.n_buckets), dtype=np.int32)
+        ring[: len(self.ring)] = self.ring
+        self.ring = ring
+        for name in ("recent_plays", "baseline_plays"):
+            totals = np.zeros(capacity, dtype=np.int64)
+            current = getattr(self, name)
+            totals[: len(current)] = current
+            setattr(self, name, totals)
+
+    @property
+    def head_time(self) -> Optional[pd.Timestamp]:
+        """最新分桶的起始时间（本地时间，不带时区），尚未收到点播时为None"""
+        if self.head is None:
+            return None
+        return pd.Timestamp(self.head * self.bucket_seconds, unit="s")
+
+    def advance(self, timestamp):
+        """将时钟推进到timestamp所在分桶（没有新点播时也需按时推进）"""
+        self._advance_to(int(self._buckets(pd.Series([timestamp]))[0]))
+
+    def _buckets(self, timestamps: pd.Series) -> np.ndarray:
+        """时间戳所在分桶的绝对编号（按本地时间）"""
+        seconds = local_seconds(utc_seconds(timestamps, self.timezone), self.timezone)
+        return seconds.to_numpy(dtype=np.int64) // self.bucket_seconds
+
+    def _advance_to(self, bucket: int):
+        if self.head is None:
+            self.head = int(bucket)
+            return
+        steps = int(bucket) - self.head
+        if steps <= 0:
+            return
+        if steps >= self.n_buckets:
+            # 超过整个缓冲区跨度没有数据，所有窗口清零
+            self.ring[:] = 0
+            self.recent_plays[:] = 0
+            self.baseline_plays[:] = 0
+            self.head = int(bucket)
+            return
+
+        for head in range(self.head + 1, int(bucket) + 1):
+            # 过期分桶（head - n_buckets）与新分桶共用同一槽位，移出基线窗口后清零
+            expired = head % self.n_buckets
+            self.baseline_plays -= self.ring[:, expired]
+            self.ring[:, expired] = 0
+            # 离开最近窗口的分桶转入基线窗口
+            moved = (head - self.recent_buckets) % self.n_buckets
+            self.recent_plays -= self.ring[:, moved]
+            self.baseline_plays += self.ring[:, moved]
+        self.head = int(bucket)
+
+    def update(self, chunk: pd.DataFrame):
+        """累加一批新点播（列: timestamp, title, 可选 artist/plays/release_date）"""
+        if chunk.empty:
+            return
+        buckets = self._buckets(chunk["timestamp"])
+        self._advance_to(int(buckets.max()))
+
+        # 早于缓冲区跨度的迟到点播无法计入任何窗口
+        in_range = buckets > self.head - self.n_buckets
+        self.late_events += int((~in_range).sum())
+        chunk = chunk[in_range]
+        buckets = buckets[in_range]
+        if chunk.empty:
+            return
+
+        artists = chunk["artist"] if "artist" in chunk else pd.Series("", chunk.index)
+        rows = self._rows(chunk["title"], artists)
+        plays = (
+            chunk["plays"].to_numpy(dtype=np.int64)
+            if "plays" in chunk
+            else np.ones(len(chunk), dtype=np.int64)
+        )
+        np.add.at(self.ring, (rows, buckets % self.n_buckets), plays)
+
+        recent = buckets > self.head - self.recent_buckets
+        np.add.at(self.recent_plays, rows[recent], plays[recent])
+        np.add.at(self.baseline_plays, rows[~recent], plays[~recent])
+
+        if "release_date" in chunk:
+            for row, release in zip(rows, chunk["release_date"]):
+                if pd.notna(release):
+                    self.release_dates.setdefault(int(row), str(release))
+
+    def growth_rates(self, min_baseline: float = 10) -> pd.DataFrame:
+        """各歌曲最近窗口相对基线窗口同长度均值的增长率(%)"""
+        size = len(self.songs)
+        recent = self.recent_plays[:size].astype(np.float64)
+        baseline = (
+            self.baseline_plays[:size] * self.recent_buckets / self.baseline_buckets
+        )
+        with np.errstate(divide="ignore", invalid="ignore"):
+            growth = np.where(
+                baseline >= min_baseline, (recent - baseline) / baseline * 100, np.nan
+            )
+        return pd.DataFrame(
+            {"recent": recent, "baseline": baseline, "growth": growth},
+            index=self.songs,
+        )
+
+    def rising_songs(self, top_n: int = 5, min_baseline: float = 10) -> List[Dict]:
+        """当前黑马榜，字段与 data['rising_songs'] 一致"""
+        rates = self.growth_rates(min_baseline)
+        top = rates[rates["growth"] > 0].nlargest(top_n, "growth")
+        period = self._period_label(self.recent_buckets * self.bucket_seconds)
+        positions = self.songs.get_indexer(top.index)
+
+        return [
+            rising_song_record(
+                rank,
+                title,
+                row["growth"],
+                row["recent"],
+                row["baseline"],
+                period=period,
+                release_date=self.release_dates.get(int(position), ""),
+            )
+            for rank, (((title, _), row), position) in enumerate(
+                zip(top.iterrows(), positions), start=1
+            )
+        ]
+
+    @staticmethod
+    def _period_label(seconds: int) -> str:
+        if seconds % (24 * HOUR_SECONDS) == 0:
+            return f"{seconds // (24 * HOUR_SECONDS)}天"
+        if seconds % HOUR_SECONDS == 0:
+            return f"{seconds // HOUR_SECONDS}小时"
+        return f"{seconds // 60}分钟"
+
+    def save(self, path: str):
+        """保存检测器状态，供下一次定时任务继续增量更新"""
+        size = len(self.songs)
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        np.savez_compressed(
+            path,
+            config=np.array(
+                [self.bucket_seconds, self.recent_buckets, self.baseline_buckets]
+            ),
+            timezone=np.array(self.timezone),
+            head=np.array([-1 if self.head is None else self.head]),
+            titles=np.array(self.songs.get_level_values("title"), dtype=str),
+            artists=np.array(self.songs.get_level_values("artist"), dtype=str),
+            ring=self.ring[:size],
+            recent_plays=self.recent_plays[:size],
+            baseline_plays=self.baseline_plays[:size],
+            release_rows=np.array(list(self.release_dates.keys()), dtype=np.int64),
+            release_dates=np.array(list(self.release_dates.values()), dtype=str),
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "RisingSongDetector":
+        """加载保存的检测器状态"""
+        with np.load(path) as state:
+            bucket_seconds, recent_buckets, baseline_buckets = state["config"].tolist()
+            # 早期保存的状态没有时区字段，其分桶按UTC划分
+            timezone = str(state["timezone"]) if "timezone" in state else "UTC"
+            detector = cls(bucket_seconds, recent_buckets, baseline_buckets, timezone)
+            head = int(state["head"][0])
+            detector.head = None if head < 0 else head
+            detector.songs = pd.MultiIndex.from_arrays(
+                [state["titles"].tolist(), state["artists"].tolist()],
+                names=["title", "artist"],
+            )
+            detector.ring = state["ring"]
+            detector.recent_plays = state["recent_plays"]
+            detector.baseline_plays = state["baseline_plays"]
+            detector.release_dates = dict(
+                zip(state["release_rows"].tolist(), state["release_dates"].tolist())
+            )
+        return detector
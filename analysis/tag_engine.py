@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+标签共现与情绪结构分析模块
+基于稀疏的歌曲×标签关联矩阵，向量化计算标签频次、共现、提升度与播放加权占比
+"""
+
+from typing import Dict, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+
+class TagAnalyticsEngine:
+    """标签分析引擎
+
+    歌曲×标签关联矩阵以分解形式保存：每首歌对应一个标签组合编码，
+    组合×标签为稀疏的COO关联表。相同标签串的歌曲共享同一组合，
+    因此所有统计只需在组合层面按歌曲数加权计算一次。
+    """
+
+    def __init__(self, separator: str = "/"):
+        self.separator = separator
+        self.tags = pd.Index([])
+        self.n_songs = 0
+        self.combo_counts = np.zeros(0)
+        self.combo_weights = np.zeros(0)
+        self.entry_combo = np.zeros(0, dtype=np.int64)
+        self.entry_tag = np.zeros(0, dtype=np.int64)
+
+    def fit(
+        self,
+        song_tags: Union[Sequence[str], pd.Series],
+        weights: Union[Sequence[float], pd.Series, None] = None,
+    ) -> "TagAnalyticsEngine":
+        """构建关联矩阵，weights为每首歌的播放量或点播占比"""
+        song_tags = pd.Series(song_tags)
+        if not isinstance(song_tags.dtype, pd.CategoricalDtype):
+            song_tags = song_tags.astype(
+                pd.CategoricalDtype(pd.unique(song_tags.dropna()))
+            )
+
+        codes = song_tags.cat.codes.to_numpy()
+        valid = codes >= 0
+        n_combos = len(song_tags.cat.categories)
+        if weights is None:
+            weights = np.ones(len(codes))
+        weights = np.asarray(weights, dtype=np.float64)
+
+        self.n_songs = int(valid.sum())
+        self.combo_counts = np.bincount(codes[valid], minlength=n_combos)
+        self.combo_weights = np.bincount(
+            codes[valid], weights=weights[valid], minlength=n_combos
+        )
+
+        # 组合×标签关联表：每个组合只拆分一次，组合内重复标签去重
+        entries = pd.DataFrame(
+            {
+                "combo": np.arange(n_combos),
+                "tag": song_tags.cat.categories.astype(str)
+                .str.split(self.separator)
+                .tolist(),
+            }
+        ).explode("tag")
+        entries["tag"] = entries["tag"].str.strip()
+        entries = entries[entries["tag"].notna() & (entries["tag"] != "")]
+        entries = entries.drop_duplicates(["combo", "tag"])
+
+        tag_codes, self.tags = pd.factorize(entries["tag"])
+        self.entry_combo = entries["combo"].to_numpy(dtype=np.int64)
+        self.entry_tag = tag_codes.astype(np.int64)
+        return self
+
+    def tag_frequencies(self) -> pd.Series:
+        """每个标签出现的歌曲数，按首次出现顺序排列"""
+        counts = np.bincount(
+            self.entry_tag,
+            weights=self.combo_counts[self.entry_combo],
+            minlength=len(self.tags),
+        )
+        return pd.Series(counts.astype(np.int64), index=self.tags)
+
+    def weighted_shares(self) -> pd.Series:
+        """播放加权的标签占比：每首歌的权重在其标签间均分，合计为1"""
+        tags_per_combo = np.bincount(self.entry_combo, minlength=len(self.combo_counts))
+        per_entry = self.combo_weights[self.entry_combo] / tags_per_combo[
+            self.entry_combo
+        ].clip(min=1)
+        mass = np.bincount(self.entry_tag, weights=per_entry, minlength=len(self.tags))
+        total = mass.sum()
+        shares = mass / total if total > 0 else mass
+        return pd.Series(shares, index=self.tags).sort_values(
+            ascending=False, kind="stable"
+        )
+
+    def cooccurrence(self) -> pd.DataFrame:
+        """标签对共现次数与提升度 lift = P(a,b) / (P(a)P(b))"""
+        columns = ["tag_a", "tag_b", "count", "lift"]
+        entries = pd.DataFrame({"combo": self.entry_combo, "tag": self.entry_tag})
+        pairs = entries.merge(entries, on="combo", suffixes=("_a", "_b"))
+        pairs = pairs[pairs["tag_a"] < pairs["tag_b"]]
+        if pairs.empty or self.n_songs == 0:
+            return pd.DataFrame(columns=columns)
+
+        pair_counts = (
+            pd.Series(self.combo_counts[pairs["combo"].to_numpy()])
+            .groupby([pairs["tag_a"].to_numpy(), pairs["tag_b"].to_numpy()])
+            .sum()
+        )
+        tag_a = pair_counts.index.get_level_values(0).to_numpy()
+        tag_b = pair_counts.index.get_level_values(1).to_numpy()
+        counts = pair_counts.to_numpy().astype(np.float64)
+        frequencies = self.tag_frequencies().to_numpy().astype(np.float64)
+
+        result = pd.DataFrame(
+            {
+                "tag_a": self.tags[tag_a],
+                "tag_b": self.tags[tag_b],
+                "count": counts.astype(np.int64),
+                "lift": counts
+                * self.n_songs
+                / (frequencies[tag_a] * frequencies[tag_b]),
+            }
+        )
+        return result.sort_values(
+            ["count", "lift"], ascending=False, kind="stable"
+        ).reset_index(drop=True)
+
+    def summary(self, top_n: int = 10) -> Dict:
+        """汇总为可写入分析报告的结构"""
+        pairs = self.cooccurrence().head(top_n)
+        shares = self.weighted_shares().head(top_n)
+        return {
+            "tag_frequencies": {
+                tag: int(count) for tag, count in self.tag_frequencies().items()
+            },
+            "emotion_shares": {
+                tag: round(float(share), 4) for tag, share in shares.items()
+            },
+            "tag_cooccurrence": [
+                {
+                    "tags": [tag_a, tag_b],
+                    "count": int(count),
+                    "lift": round(float(lift), 3),
+                }
+                for tag_a, tag_b, count, lift in zip(
+                    pairs["tag_a"], pairs["tag_b"], pairs["count"], pairs["lift"]
+                )
+            ],
+        }
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+标签增长预测模块
+基于每周标签点播量历史，批量向量化拟合线性趋势或Holt指数平滑模型，
+计算当前环比增长率与下一周期预测增长率，结果按历史数据快照缓存
+"""
+
+import hashlib
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+from analysis.chart_store import parse_percent
+from analysis.lru import LRUCache
+
+
+class TagForecaster:
+    """标签增长预测器
+
+    history为 标签×周 的点播量矩阵（列按时间先后排列）。
+    所有标签在同一组NumPy运算中拟合，数千个标签也只需一次矩阵计算；
+    相同的历史快照与参数只拟合一次，最多缓存cache_size个快照的结果。
+    """
+
+    def __init__(
+        self,
+        method: str = "holt",
+        horizon: int = 1,
+        alpha: float = 0.5,
+        beta: float = 0.3,
+        damping: float = 0.9,
+        window: int = 12,
+        cache_size: int = 16,
+    ):
+        if method not in ("holt", "linear"):
+            raise ValueError(f"不支持的预测方法: {method}")
+        self.method = method
+        self.horizon = horizon
+        self.alpha = alpha
+        self.beta = beta
+        self.damping = damping
+        self.window = window
+        self._cache = LRUCache(cache_size)
+
+    def _snapshot_key(self, history: pd.DataFrame) -> str:
+        digest = hashlib.sha1()
+        digest.update(pd.util.hash_pandas_object(history, index=True).to_numpy())
+        digest.update(np.asarray(history.columns.astype(str), dtype=str).tobytes())
+        digest.update(
+            repr(
+                (
+                    self.method,
+                    self.horizon,
+                    self.alpha,
+                    self.beta,
+                    self.damping,
+                    self.window,
+                )
+            ).encode()
+        )
+        return digest.hexdigest()
+
+    def forecast(self, history: pd.DataFrame) -> pd.DataFrame:
+        """返回每个标签的 growth_rate（最近一周环比%）与 predicted_growth（预测%）"""
+        return self._cache.get_or_compute(
+            self._snapshot_key(history), lambda: self._fit(history)
+        )
+
+    def _fit(self, history: pd.DataFrame) -> pd.DataFrame:
+        values = history.to_numpy(dtype=np.float64)[:, -self.window :]
+        if values.shape[1] < 2:
+            nan = np.full(len(history), np.nan)
+            return pd.DataFrame(
+                {"growth_rate": nan, "predicted_growth": nan}, index=history.index
+            )
+
+        last, previous = values[:, -1], values[:, -2]
+        if self.method == "linear":
+            level, forecast = self._linear(values)
+        else:
+            level, forecast = self._holt(values)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            growth = np.where(previous > 0, (last - previous) / previous * 100, np.nan)
+            predicted = np.where(level > 0, (forecast - level) / level * 100, np.nan)
+        return pd.DataFrame(
+            {
+                "growth_rate": np.round(growth, 1),
+                "predicted_growth": np.round(predicted, 1),
+            },
+            index=history.index,
+        )
+
+    def _linear(self, values: np.ndarray):
+        """最小二乘线性趋势：返回最近一周的拟合值与horizon周后的预测值"""
+        steps = values.shape[1]
+        x = np.arange(steps, dtype=np.float64)
+        x_centered = x - x.mean()
+        slope = (
+            (values - values.mean(axis=1, keepdims=True))
+            @ x_centered
+            / (x_centered @ x_centered)
+        )
+        level = values.mean(axis=1) + slope * x_centered[-1]
+        return level, level + slope * self.horizon
+
+    def _holt(self, values: np.ndarray):
+        """阻尼Holt线性指数平滑：按时间步迭代，每一步对所有标签向量化更新"""
+        level = values[:, 0].copy()
+        trend = values[:, 1] - values[:, 0]
+        for step in range(1, values.shape[1]):
+            previous_level = level
+            level = self.alpha * values[:, step] + (1 - self.alpha) * (
+                previous_level + self.damping * trend
+            )
+            trend = (
+                self.beta * (level - previous_level)
+                + (1 - self.beta) * self.damping * trend
+            )
+        damped = sum(self.damping**step for step in range(1, self.horizon + 1))
+        return level, np.maximum(level + damped * trend, 0.0)
+
+    def apply(self, trends: List[Dict], history: pd.DataFrame = None) -> List[Dict]:
+        """为标签趋势记录填充数值型 growth_rate 与 predicted_growth
+
+        没有历史时，由记录中的当前频次与环比增长率还原上一周期与本周期两个点。
+        """
+        if not trends:
+            return []
+        if history is None:
+            history = self.history_from_trends(trends)
+
+        result = self.forecast(history)
+        enriched = []
+        for trend in trends:
+            tag = trend["tag"]
+            record = dict(trend)
+            if tag in result.index:
+                growth, predicted = result.loc[tag, ["growth_rate", "predicted_growth"]]
+                if pd.notna(growth):
+                    record["growth_rate"] = float(growth)
+                if pd.notna(predicted):
+                    record["predicted_growth"] = float(predicted)
+            enriched.append(record)
+        return enriched
+
+    @staticmethod
+    def history_from_trends(trends: List[Dict]) -> pd.DataFrame:
+        """由 (频次, 环比增长率) 还原两期历史"""
+        frame = pd.DataFrame(trends).drop_duplicates("tag")
+        current = pd.to_numeric(frame["frequency"], errors="coerce").to_numpy()
+        growth = parse_percent(frame["growth_rate"]).to_numpy()
+        previous = current / (1 + growth / 100)
+        return pd.DataFrame(
+            {"previous": previous, "current": current}, index=frame["tag"].astype(str)
+        ).dropna()
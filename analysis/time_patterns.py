@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+点播时间分布模块
+分块读取点播事件时间戳，向量化统计小时/星期/设备直方图并识别高峰与低谷时段
+"""
+
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from analysis.log_reader import iter_log_chunks, local_times
+from analysis.periods import DEFAULT_TIMEZONE
+
+
+class UsageHistogram:
+    """点播时间直方图，内存占用与事件数量无关
+
+    小时与星期按timezone的本地时间统计（终端日志为UTC秒级时间戳）
+    """
+
+    def __init__(self, timezone: str = DEFAULT_TIMEZONE):
+        self.timezone = timezone
+        self.hourly = np.zeros(24, dtype=np.int64)
+        self.weekday = np.zeros(7, dtype=np.int64)
+        self.weekday_hourly = np.zeros((7, 24), dtype=np.int64)
+        self.device_hourly = {}
+        self.total_events = 0
+
+    def update(
+        self,
+        timestamps: pd.Series,
+        devices: Optional[pd.Series] = None,
+        weights: Optional[pd.Series] = None,
+    ):
+        """累加一块点播事件"""
+        times = local_times(timestamps, self.timezone)
+        valid = times.notna().to_numpy()
+        hours = times.dt.hour.to_numpy()[valid].astype(np.int64)
+        days = times.dt.dayofweek.to_numpy()[valid].astype(np.int64)
+        counts = (
+            np.ones(len(hours), dtype=np.int64)
+            if weights is None
+            else np.asarray(weights)[valid].astype(np.int64)
+        )
+
+        self.hourly += np.bincount(hours, weights=counts, minlength=24).astype(np.int64)
+        self.weekday += np.bincount(days, weights=counts, minlength=7).astype(np.int64)
+        self.weekday_hourly += (
+            np.bincount(days * 24 + hours, weights=counts, minlength=7 * 24)
+            .astype(np.int64)
+            .reshape(7, 24)
+        )
+        self.total_events += int(counts.sum())
+
+        if devices is not None:
+            device_codes, device_names = pd.factorize(np.asarray(devices)[valid])
+            per_device = np.bincount(
+                device_codes * 24 + hours,
+                weights=counts,
+                minlength=len(device_names) * 24,
+            ).reshape(len(device_names), 24)
+            for name, row in zip(device_names, per_device.astype(np.int64)):
+                self.device_hourly[name] = self.device_hourly.get(name, 0) + row
+
+    def merge(self, other: "UsageHistogram") -> "UsageHistogram":
+        """合并另一份直方图（用于分片并行统计）"""
+        self.hourly += other.hourly
+        self.weekday += other.weekday
+        self.weekday_hourly += other.weekday_hourly
+        self.total_events += other.total_events
+        for name, row in other.device_hourly.items():
+            self.device_hourly[name] = self.device_hourly.get(name, 0) + row
+        return self
+
+    @classmethod
+    def from_file(
+        cls,
+        path: str,
+        timestamp_column: str = "timestamp",
+        device_column: str = "device",
+        weight_column: str = "plays",
+        chunksize: int = 1_000_000,
+        timezone: str = DEFAULT_TIMEZONE,
+    ) -> "UsageHistogram":
+        """流式读取点播日志（CSV/JSONL/Parquet）构建直方图"""
+        histogram = cls(timezone)
+        columns = [timestamp_column, device_column, weight_column]
+        for chunk in iter_log_chunks(path, columns, chunksize):
+            histogram.update(
+                chunk[timestamp_column],
+                chunk.get(device_column),
+                chunk.get(weight_column),
+            )
+        return histogram
+
+    def usage_rates(self) -> np.ndarray:
+        """各小时使用率（相对最高小时，0-1）"""
+        peak = self.hourly.max()
+        return self.hourly / peak if peak > 0 else self.hourly.astype(np.float64)
+
+    def _window(self, rates: np.ndarray, center: int, mask: np.ndarray) -> Dict:
+        """以center为中心向两侧扩展满足mask的连续小时（跨零点循环）"""
+        start = end = center
+        for _ in range(23):
+            if not mask[(start - 1) % 24] or (start - 1) % 24 == end:
+                break
+            start = (start - 1) % 24
+        for _ in range(23):
+            if not mask[(end + 1) % 24] or (end + 1) % 24 == start:
+                break
+            end = (end + 1) % 24
+
+        hours = [(start + i) % 24 for i in range((end - start) % 24 + 1)]
+        return {
+            "start": f"{start:02d}:00",
+            "end": f"{(end + 1) % 24:02d}:00",
+            "usage_rate": round(float(rates[hours].mean()) * 100, 1),
+            "hours": hours,
+        }
+
+    def detect_windows(
+        self,
+        peak_threshold: float = 0.8,
+        secondary_ratio: float = 0.9,
+        low_threshold: float = 0.2,
+    ) -> Dict:
+        """识别高峰、次高峰与低谷时段"""
+        rates = self.usage_rates()
+        peak = self._window(rates, int(rates.argmax()), rates >= peak_threshold)
+
+        # 次高峰：高峰时段之外的最高局部极大值
+        outside = np.ones(24, dtype=bool)
+        outside[peak["hours"]] = False
+        local_max = (rates >= np.roll(rates, 1)) & (rates >= np.roll(rates, -1))
+        candidates = np.flatnonzero(outside & local_max & (rates > 0))
+        secondary = None
+        if len(candidates):
+            center = int(candidates[rates[candidates].argmax()])
+            secondary = self._window(
+                rates, center, outside & (rates >= rates[center] * secondary_ratio)
+            )
+
+        center = int(rates.argmin())
+        low = self._window(
+            rates, center, rates <= max(low_threshold, float(rates[center]))
+        )
+
+        windows = {"peak_hours": peak, "secondary_peak": secondary, "low_usage": low}
+        for window in windows.values():
+            if window:
+                window.pop("hours")
+        return windows
+
+    def device_windows(self, threshold: float = 0.5) -> Dict[str, Dict]:
+        """各设备的活跃时段"""
+        windows = {}
+        for name, row in self.device_hourly.items():
+            peak = row.max()
+            if peak == 0:
+                continue
+            rates = row / peak
+            window = self._window(rates, int(rates.argmax()), rates >= threshold)
+            window.pop("hours")
+            windows[name] = window
+        return windows
+
+    def summary(self) -> Dict:
+        """汇总为时间分析字段"""
+        windows = self.detect_windows()
+        return {
+            "peak_hours": windows["peak_hours"],
+            "secondary_peak": windows["secondary_peak"],
+            # 模板读取low_usage，low_hours保持与解析数据相同的字段名
+            "low_hours": windows["low_usage"],
+            "low_usage": windows["low_usage"],
+            "hourly_usage": [round(float(rate), 4) for rate in self.usage_rates()],
+            "weekday_usage": self.weekday.tolist(),
+            "device_hourly": {
+                str(name): row.tolist() for name, row in self.device_hourly.items()
+            },
+            "total_events": self.total_events,
+        }
@@ -0,0 +1,525 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+热门榜单近似统计模块
+以Count-Min草图估计点播次数、按估计值截断的固定容量候选表跟踪热门歌曲，
+在固定内存内按城市等级与时间窗口生成热播榜/趋势榜/黑马榜，并可对最终上榜歌曲精确复核
+"""
+
+import math
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from analysis.log_reader import local_seconds
+from analysis.periods import DEFAULT_TIMEZONE
+
+# 汇总所有城市等级的分段名
+ALL_CITIES = "全部"
+# 汇总报告周期内所有窗口的分段名（该分段的热播榜即整个周期的爆款金曲榜）
+ALL_WINDOWS = "全部"
+
+DAY_SECONDS = 24 * 3600
+# 1970-01-05 是周一：窗口从该日起按 window_days 划分，与 ReportPeriod 的自然周对齐
+MONDAY_DAY = 4
+
+SEGMENT_COLUMNS = ["city_type", "window"]
+SONG_COLUMNS = ["title", "artist"]
+# 候选表随歌曲保存的信息（取首次出现的值）
+INFO_COLUMNS = ["tags", "release_date"]
+CANDIDATE_COLUMNS = SEGMENT_COLUMNS + SONG_COLUMNS + INFO_COLUMNS + ["key", "plays"]
+
+
+class CountMinSketch:
+    """Count-Min草图：估计值不低于真实值，且以概率1-delta不超过真实值+epsilon×总量"""
+
+    def __init__(self, epsilon: float = 1e-4, delta: float = 1e-3, seed: int = 2025):
+        self.epsilon = epsilon
+        self.delta = delta
+        self.seed = seed
+        # 宽度取不小于e/epsilon的2的幂，便于用乘法移位哈希
+        self.width_bits = max(1, math.ceil(math.log2(math.e / epsilon)))
+        self.depth = max(1, math.ceil(math.log(1 / delta)))
+        self.table = np.zeros((self.depth, 1 << self.width_bits), dtype=np.int64)
+        multipliers = np.random.default_rng(seed).integers(
+            1, np.iinfo(np.int64).max, size=self.depth, dtype=np.int64
+        )
+        self.multipliers = multipliers.astype(np.uint64) | np.uint64(1)
+        self.total = 0
+
+    def _columns(self, keys: np.ndarray) -> np.ndarray:
+        """各行的列下标，形状 (depth, len(keys))"""
+        with np.errstate(over="ignore"):
+            hashed = keys[None, :] * self.multipliers[:, None]
+        return (hashed >> np.uint64(64 - self.width_bits)).astype(np.int64)
+
+    def update(self, keys: np.ndarray, counts: np.ndarray):
+        """累加一批键的计数（同一批内的键可以重复）"""
+        counts = np.asarray(counts, dtype=np.int64)
+        columns = self._columns(keys)
+        for row in range(self.depth):
+            np.add.at(self.table[row], columns[row], counts)
+        self.total += int(counts.sum())
+
+    def estimate(self, keys: np.ndarray) -> np.ndarray:
+        """估计各键的计数"""
+        if len(keys) == 0:
+            return np.zeros(0, dtype=np.int64)
+        columns = self._columns(keys)
+        return self.table[np.arange(self.depth)[:, None], columns].min(axis=0)
+
+    def merge(self, other: "CountMinSketch") -> "CountMinSketch":
+        """合并同参数的草图"""
+        if (self.table.shape, self.seed) != (other.table.shape, other.seed):
+            raise ValueError("Count-Min草图参数不一致，无法合并")
+        self.table += other.table
+        self.total += other.total
+        return self
+
+    @property
+    def error_bound(self) -> float:
+        """单个估计值的高估上界（概率1-delta）"""
+        return self.epsilon * self.total
+
+
+def _song_keys(frame: pd.DataFrame, columns: List[str]) -> np.ndarray:
+    """按指定列计算64位哈希键"""
+    return pd.util.hash_pandas_object(frame[columns], index=False).to_numpy()
+
+
+class TopKSketch:
+    """按城市等级×时间窗口分段的热门歌曲草图
+
+    所有分段共用一个Count-Min草图（键为 分段+歌曲 的哈希），
+    每个分段只保留capacity首估计点播最高的候选歌曲，内存与点播量和曲库规模无关。
+    候选表每次按草图估计值重新排序截断（不是Space-Saving的最小项替换），
+    候选歌曲的计数误差即草图的误差上界。
+    时间窗口按timezone的本地日期划分，从周一零点起算（与 ReportPeriod 的自然周一致）；
+    同时记录数据覆盖的首尾日期，趋势榜只比较数据完整覆盖的上一窗口。
+    设置period_start（UTC秒）时，此前的点播只作为趋势基线：
+    不计入 ALL_WINDOWS 分段，所在窗口也不单独出榜。
+    """
+
+    def __init__(
+        self,
+        capacity: int = 100,
+        window_days: int = 7,
+        epsilon: float = 1e-4,
+        delta: float = 1e-3,
+        seed: int = 2025,
+        timezone: str = DEFAULT_TIMEZONE,
+        period_start: int = None,
+    ):
+        self.capacity = capacity
+        self.window_days = window_days
+        self.timezone = timezone
+        self.period_start = period_start
+        self.sketch = CountMinSketch(epsilon=epsilon, delta=delta, seed=seed)
+        self.candidates = None
+        self.segment_totals = None
+        self.exact = False
+        # 数据覆盖的本地日期范围（自1970-01-01起的天数），用于判断窗口是否完整
+        self.first_day = None
+        self.last_day = None
+
+    def _days(self, chunk: pd.DataFrame) -> pd.Series:
+        """点播所在的本地日期（自1970-01-01起的天数）"""
+        return local_seconds(chunk["seconds"], self.timezone) // DAY_SECONDS
+
+    def _window_start(self, days: pd.Series) -> pd.Series:
+        """日期所在窗口的起始日：自周一起每 window_days 天一个窗口"""
+        return (days - MONDAY_DAY) // self.window_days * self.window_days + MONDAY_DAY
+
+    def _window_name(self, day: int) -> str:
+        """日期所在窗口的名称（起始日 YYYY-MM-DD）"""
+        start = self._window_start(day) * DAY_SECONDS
+        return pd.Timestamp(start, unit="s").strftime("%Y-%m-%d")
+
+    def _segments(self, chunk: pd.DataFrame) -> pd.DataFrame:
+        """按 城市等级×窗口×歌曲 预聚合点播，并追加"全部"城市等级与报告周期合计"""
+        start = self._window_start(self._days(chunk)) * DAY_SECONDS
+        frame = pd.DataFrame(
+            {
+                "city_type": (
+                    chunk["city_type"].astype(str)
+                    if "city_type" in chunk
+                    else ALL_CITIES
+                ),
+                "window": pd.to_datetime(start, unit="s").dt.strftime("%Y-%m-%d"),
+                "title": chunk["title"],
+                "artist": chunk["artist"],
+                "plays": chunk["plays"],
+            }
+        )
+        if self.period_start is not None:
+            frame["in_period"] = chunk["seconds"] >= self.period_start
+        if "city_type" in chunk:
+            frame = pd.concat([frame, frame.assign(city_type=ALL_CITIES)])
+
+        keys = SEGMENT_COLUMNS + SONG_COLUMNS
+        period_keys = ["city_type"] + SONG_COLUMNS
+        if self.period_start is None:
+            windows = frame.groupby(keys, sort=False)["plays"].sum().reset_index()
+            period = windows.groupby(period_keys, sort=False)["plays"].sum()
+        else:
+            # 先按是否在报告周期内预聚合，窗口分段与周期合计都从预聚合结果汇总
+            grouped = (
+                frame.groupby(keys + ["in_period"], sort=False)["plays"]
+                .sum()
+                .reset_index()
+            )
+            windows = grouped.groupby(keys, sort=False)["plays"].sum().reset_index()
+            period = (
+                grouped[grouped["in_period"]]
+                .groupby(period_keys, sort=False)["plays"]
+                .sum()
+            )
+        period = period.reset_index().assign(window=ALL_WINDOWS)
+        return pd.concat([windows, period[keys + ["plays"]]], ignore_index=True)
+
+    @staticmethod
+    def _song_info(chunk: pd.DataFrame) -> pd.DataFrame:
+        """块内各歌曲首次出现时的标签与发行日期"""
+        info = chunk.drop_duplicates(SONG_COLUMNS)
+        return pd.DataFrame(
+            {
+                "title": info["title"],
+                "artist": info["artist"],
+                "tags": info["tags"].fillna("") if "tags" in info else "",
+                "release_date": (
+                    info["release_date"] if "release_date" in info else ""
+                ),
+            }
+        )
+
+    def update(self, chunk: pd.DataFrame):
+        """累加一块点播日志（需含 seconds/title/artist/tags/plays 列）"""
+        if chunk.empty:
+            return
+        days = self._days(chunk)
+        self._cover(int(days.min()), int(days.max()))
+        counts = self._segments(chunk)
+        counts["key"] = _song_keys(counts, SEGMENT_COLUMNS + SONG_COLUMNS)
+        self.sketch.update(counts["key"].to_numpy(), counts["plays"].to_numpy())
+        self._add_totals(counts.groupby(SEGMENT_COLUMNS)["plays"].sum())
+        self._refresh(counts, self._song_info(chunk))
+
+    def _cover(self, first_day: Optional[int], last_day: Optional[int]):
+        """扩展数据覆盖的日期范围"""
+        if first_day is None:
+            return
+        if self.first_day is None:
+            self.first_day, self.last_day = first_day, last_day
+        else:
+            self.first_day = min(self.first_day, first_day)
+            self.last_day = max(self.last_day, last_day)
+
+    def coverage(self, window: str) -> float:
+        """窗口内有数据覆盖的天数占比（0~1）"""
+        if self.first_day is None:
+            return 0.0
+        start = int(pd.Timestamp(window).value // 10**9 // DAY_SECONDS)
+        end = start + self.window_days - 1
+        covered = min(end, self.last_day) - max(start, self.first_day) + 1
+        return max(covered, 0) / self.window_days
+
+    def _add_totals(self, totals: pd.Series):
+        """累加各分段的精确点播总量（分段数很少，可精确保存）"""
+        if self.segment_totals is None:
+            self.segment_totals = totals
+        else:
+            self.segment_totals = self.segment_totals.add(totals, fill_value=0)
+
+    def _refresh(self, incoming: pd.DataFrame, info: pd.DataFrame = None):
+        """将新出现的歌曲并入候选表，重新估计后每个分段只保留capacity首
+
+        incoming不含歌曲信息时由info补齐，只需为截断后新进入候选表的歌曲查找
+        """
+        candidates = (
+            incoming
+            if self.candidates is None
+            else pd.concat([self.candidates, incoming], ignore_index=True)
+        ).drop_duplicates("key")
+        keys = candidates["key"].to_numpy(dtype=np.uint64)
+        candidates["plays"] = self.sketch.estimate(keys)
+        candidates = (
+            candidates.sort_values("plays", ascending=False, kind="stable")
+            .groupby(SEGMENT_COLUMNS, sort=False)
+            .head(self.capacity)
+            .reset_index(drop=True)
+        )
+        if info is not None:
+            for column in INFO_COLUMNS:
+                if column not in candidates:
+                    candidates[column] = None
+            # 候选表中的标签从不为空（缺省为""），为空即尚未补齐
+            missing = candidates["tags"].isna().to_numpy()
+            filled = candidates.loc[missing, SONG_COLUMNS].merge(
+                info, on=SONG_COLUMNS, how="left"
+            )
+            candidates.loc[missing, INFO_COLUMNS] = filled[INFO_COLUMNS].to_numpy()
+        self.candidates = candidates[CANDIDATE_COLUMNS]
+        self.exact = False
+
+    def merge(self, other: "TopKSketch") -> "TopKSketch":
+        """合并另一个分片的草图"""
+        self.sketch.merge(other.sketch)
+        self._cover(other.first_day, other.last_day)
+        if other.candidates is not None:
+            self._add_totals(other.segment_totals)
+            self._refresh(other.candidates)
+        return self
+
+    def recheck(self, chunks: Iterable[pd.DataFrame], top_n: int = 10):
+        """对每个分段的前top_n首及其上一窗口、黑马榜前top_n首及其基线窗口做一次精确复核
+
+        chunks为同一批日志的第二次读取；只统计候选键，内存与候选表大小相当。
+        分片日志可分别用 exact_counts 计数（如在多个进程中），相加后交给 apply_counts。
+        """
+        tracked = self.recheck_targets(top_n)
+        if tracked is None:
+            return
+        keys = tracked["key"].to_numpy(dtype=np.uint64)
+        self.apply_counts(tracked, self.exact_counts(chunks, keys))
+
+    def recheck_targets(self, top_n: int = 10) -> Optional[pd.DataFrame]:
+        """需要精确复核的键，尚无数据时为None
+
+        包括各分段前top_n首及其上一窗口；最近窗口中参与黑马榜比较的歌曲
+        （热播前top_n首与估计增长最快的top_n首）另加上全部基线窗口，
+        复核后黑马榜只在这些精确计数之间比较。
+        """
+        if self.candidates is None:
+            return None
+        finalists = (
+            self.candidates.groupby(SEGMENT_COLUMNS, sort=False)
+            .head(top_n)
+            .reset_index(drop=True)
+        )
+        windows = finalists[finalists["window"] != ALL_WINDOWS]
+        tracked = [finalists, self._previous_window(windows)]
+
+        latest = self.latest_window()
+        contenders = pd.concat(
+            [
+                windows[
+                    (windows["city_type"] == ALL_CITIES) & (windows["window"] == latest)
+                ],
+                self.rising(top_n, min_baseline=0),
+            ],
+            ignore_index=True,
+        )
+        tracked.extend(
+            self._shift(contenders, window) for window in self.baseline_windows()
+        )
+        return pd.concat(tracked, ignore_index=True).drop_duplicates("key")
+
+    def exact_counts(
+        self, chunks: Iterable[pd.DataFrame], keys: np.ndarray
+    ) -> pd.Series:
+        """精确统计keys在chunks中的点播次数（以键为索引）"""
+        exact = pd.Series(0, index=pd.Index(keys), dtype="int64")
+        for chunk in chunks:
+            counts = self._segments(chunk)
+            counts["key"] = _song_keys(counts, SEGMENT_COLUMNS + SONG_COLUMNS)
+            counts = counts[np.isin(counts["key"].to_numpy(), keys)]
+            exact = exact.add(counts.groupby("key")["plays"].sum(), fill_value=0)
+        return exact
+
+    def apply_counts(self, tracked: pd.DataFrame, exact: pd.Series):
+        """以精确计数替换候选表，之后的榜单只使用精确值"""
+        tracked = tracked.copy()
+        keys = tracked["key"].to_numpy(dtype=np.uint64)
+        tracked["plays"] = exact.reindex(keys, fill_value=0).to_numpy().astype(np.int64)
+        self.candidates = (
+            tracked.sort_values("plays", ascending=False, kind="stable")
+            .groupby(SEGMENT_COLUMNS, sort=False)
+            .head(self.capacity)
+            .reset_index(drop=True)
+        )
+        self.exact = True
+
+    def _previous_window(self, songs: pd.DataFrame) -> pd.DataFrame:
+        """同一城市等级、同一歌曲在上一时间窗口的键"""
+        previous = songs.copy()
+        previous["window"] = (
+            pd.to_datetime(previous["window"]) - pd.Timedelta(days=self.window_days)
+        ).dt.strftime("%Y-%m-%d")
+        previous["key"] = _song_keys(previous, SEGMENT_COLUMNS + SONG_COLUMNS)
+        return previous
+
+    def _shift(self, songs: pd.DataFrame, window: str) -> pd.DataFrame:
+        """同一城市等级、同一歌曲在指定窗口的键"""
+        shifted = songs[CANDIDATE_COLUMNS].assign(window=window)
+        shifted["key"] = _song_keys(shifted, SEGMENT_COLUMNS + SONG_COLUMNS)
+        return shifted
+
+    def latest_window(self) -> Optional[str]:
+        """数据最后一天所在的窗口"""
+        if self.last_day is None:
+            return None
+        return self._window_name(self.last_day)
+
+    def baseline_windows(self) -> List[str]:
+        """最近窗口之前连续被数据完整覆盖的各窗口（由近及远），作为黑马榜的基线"""
+        latest = self.latest_window()
+        if latest is None:
+            return []
+        windows = []
+        start = pd.Timestamp(latest)
+        while True:
+            start -= pd.Timedelta(days=self.window_days)
+            window = start.strftime("%Y-%m-%d")
+            if self.coverage(window) < 1:
+                return windows
+            windows.append(window)
+
+    def _plays(self, songs: pd.DataFrame) -> np.ndarray:
+        """候选表中的计数优先，否则使用草图估计"""
+        known = self.candidates.set_index("key")["plays"]
+        keys = songs["key"].to_numpy(dtype=np.uint64)
+        found = known.reindex(keys)
+        if self.exact:
+            return found.fillna(0).to_numpy().astype(np.int64)
+        estimates = self.sketch.estimate(keys)
+        return np.where(found.isna(), estimates, found.fillna(0)).astype(np.int64)
+
+    def hot_chart(self, city_type: str, window: str, top_n: int = 10) -> List[Dict]:
+        """热播榜：分段内点播最多的歌曲"""
+        segment = self.candidates[
+            (self.candidates["city_type"] == city_type)
+            & (self.candidates["window"] == window)
+        ].head(top_n)
+        total = float(self.segment_totals.get((city_type, window), 0)) or 1.0
+        return [
+            {
+                "rank": rank,
+                "title": title,
+                "artist": artist,
+                "tags": tags,
+                "playback_rate": f"{plays / total * 100:.1f}%",
+                "plays": int(plays),
+                "usage_scenario": "",
+                "chart_type": "hot_chart",
+                "city_type": city_type,
+                "window": window,
+            }
+            for rank, (title, artist, tags, plays) in enumerate(
+                zip(
+                    segment["title"],
+                    segment["artist"],
+                    segment["tags"],
+                    segment["plays"],
+                ),
+                start=1,
+            )
+        ]
+
+    def trending_chart(
+        self, city_type: str, window: str, top_n: int = 10, min_previous: int = 10
+    ) -> List[Dict]:
+        """趋势榜：分段内相对上一窗口增长最快的歌曲
+
+        上一窗口未被数据完整覆盖时不出榜（否则残缺的基线会虚报增长）；
+        当前窗口只覆盖部分日期时按覆盖天数折算为整窗口点播后再比较。
+        """
+        segment = self.candidates[
+            (self.candidates["city_type"] == city_type)
+            & (self.candidates["window"] == window)
+        ]
+        previous_window = (
+            pd.Timestamp(window) - pd.Timedelta(days=self.window_days)
+        ).strftime("%Y-%m-%d")
+        coverage = self.coverage(window)
+        if segment.empty or coverage == 0 or self.coverage(previous_window) < 1:
+            return []
+        previous = self._plays(self._previous_window(segment))
+        current = segment["plays"].to_numpy() / coverage
+        growth = pd.Series(
+            (current - previous) / np.maximum(previous, 1) * 100,
+            index=segment.index,
+        )[previous >= min_previous]
+        top = segment.loc[growth[growth > 0].nlargest(top_n).index]
+
+        return [
+            {
+                "rank": rank,
+                "title": title,
+                "artist": artist,
+                "tags": tags,
+                "growth_rate": f"{growth[index]:+.0f}%",
+                "heat_status": "爆发增长" if growth[index] >= 100 else "潜力上升",
+                "usage_scenario": "",
+                "chart_type": "trending_chart",
+                "city_type": city_type,
+                "window": window,
+            }
+            for rank, (index, title, artist, tags) in enumerate(
+                zip(top.index, top["title"], top["artist"], top["tags"]), start=1
+            )
+        ]
+
+    def rising(
+        self, top_n: int = 5, min_baseline: float = 10, city_type: str = ALL_CITIES
+    ) -> pd.DataFrame:
+        """黑马榜：最近窗口相对此前各完整窗口均值增长最快的候选歌曲
+
+        最近窗口只覆盖部分日期时按覆盖天数折算为整窗口点播；
+        返回歌曲信息与 recent（最近窗口点播）、baseline（基线均值）、growth（增长率%）列。
+        """
+        columns = SONG_COLUMNS + INFO_COLUMNS + ["recent", "baseline", "growth"]
+        latest = self.latest_window()
+        baselines = self.baseline_windows()
+        if self.candidates is None or not baselines:
+            return pd.DataFrame(columns=columns)
+        segment = self.candidates[
+            (self.candidates["city_type"] == city_type)
+            & (self.candidates["window"] == latest)
+        ]
+        if segment.empty:
+            return pd.DataFrame(columns=columns)
+
+        recent = segment["plays"].to_numpy() / self.coverage(latest)
+        baseline = np.mean(
+            [self._plays(self._shift(segment, window)) for window in baselines], axis=0
+        )
+        growth = (recent - baseline) / np.where(baseline > 0, baseline, np.nan) * 100
+        frame = segment.assign(recent=recent, baseline=baseline, growth=growth)
+        frame = frame[(frame["baseline"] >= min_baseline) & (frame["growth"] > 0)]
+        return frame.nlargest(top_n, "growth")[columns].reset_index(drop=True)
+
+    def segments(self) -> List[Tuple[str, str]]:
+        """榜单的 (城市等级, 窗口) 分段：与报告周期重叠的各窗口，按窗口先后排列"""
+        if self.segment_totals is None:
+            return []
+        first = ""
+        if self.period_start is not None:
+            day = local_seconds(pd.Series([self.period_start]), self.timezone)[0]
+            first = self._window_name(day // DAY_SECONDS)
+        return sorted(
+            (
+                segment
+                for segment in self.segment_totals.index
+                if segment[1] != ALL_WINDOWS and segment[1] >= first
+            ),
+            key=lambda segment: segment[::-1],
+        )
+
+    def charts(self, top_n: int = 10) -> List[Dict]:
+        """各分段的热播榜与趋势榜"""
+        records = []
+        for city_type, window in self.segments():
+            records.extend(self.hot_chart(city_type, window, top_n))
+            records.extend(self.trending_chart(city_type, window, top_n))
+        return records
+
+    def error_bounds(self) -> Dict:
+        """近似误差说明：草图参数、单个估计值的高估上界与是否已精确复核"""
+        return {
+            "epsilon": self.sketch.epsilon,
+            "delta": self.sketch.delta,
+            "max_overestimate": round(self.sketch.error_bound, 1),
+            "capacity": self.capacity,
+            "exact": self.exact,
+        }
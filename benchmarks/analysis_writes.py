@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+分析结果写出吞吐基准
+对比原先的标准库 json.dump(indent=2) 与 json_writer（orjson、紧凑格式、原子替换）
+写出分析报告的吞吐，以及结构化数据集顺序写出与并发写出的耗时，结果以JSON输出
+"""
+
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date
+from typing import Callable, Dict, List
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(PROJECT_DIR)
+
+from analysis.json_writer import dumps, orjson, write_json
+from analysis.processed_store import PROCESSED_DATASETS, ProcessedDataStore
+
+TAGS = ["emo", "怀旧", "抖音", "粤语", "嗨歌", "对唱", "表白"]
+
+
+def synthetic_songs(count: int, seed: int = 0) -> List[Dict]:
+    """确定性生成的曲目记录，字段与点播日志聚合出的榜单一致"""
+    rng = random.Random(seed)
+    return [
+        {
+            "rank": index + 1,
+            "title": "歌曲{}".format(index),
+            "artist": "歌手{}".format(rng.randrange(count // 10 + 1)),
+            "plays": rng.randrange(1, 10**6),
+            "growth_rate": round(rng.uniform(-1, 5), 4),
+            "tags": rng.sample(TAGS, rng.randint(1, 3)),
+        }
+        for index in range(count)
+    ]
+
+
+def build_report(songs: int) -> Dict:
+    """以仓库中的分析结果为基础，附加指定数量的曲目记录模拟全曲库分析"""
+    path = os.path.join(PROJECT_DIR, "analysis", "comprehensive_analysis.json")
+    with open(path, "r", encoding="utf-8") as f:
+        report = json.load(f)
+    report["catalogue"] = synthetic_songs(songs)
+    return report
+
+
+def legacy_write(report: Dict, path: str):
+    """原先的写法：标准库缩进写出，直接覆盖目标文件"""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+def measure(action: Callable[[], None], repeat: int) -> float:
+    """重复执行并返回耗时中位数（秒）"""
+    seconds = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        action()
+        seconds.append(time.perf_counter() - started)
+    return statistics.median(seconds)
+
+
+def benchmark(songs: int = 200000, repeat: int = 3) -> Dict:
+    report = build_report(songs)
+    datasets = {
+        dataset: synthetic_songs(songs // len(PROCESSED_DATASETS), seed)
+        for seed, dataset in enumerate(PROCESSED_DATASETS)
+    }
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "comprehensive_analysis.json")
+        variants = {
+            "stdlib_indent": lambda: legacy_write(report, path),
+            "stdlib_compact": lambda: _write_bytes(
+                dumps(report, compact=True, use_orjson=False), path
+            ),
+            "writer_indent": lambda: write_json(report, path),
+            "writer_compact": lambda: write_json(report, path, compact=True),
+        }
+        writes = {}
+        for name, action in variants.items():
+            seconds = measure(action, repeat)
+            size = os.path.getsize(path)
+            writes[name] = {
+                "seconds": round(seconds, 3),
+                "bytes": size,
+                "mb_per_second": round(size / seconds / 1e6, 1),
+            }
+
+        structured = {}
+        for name, workers in (("sequential", 1), ("concurrent", 4)):
+            store = ProcessedDataStore(os.path.join(tmp, "processed_" + name))
+            seconds = measure(
+                lambda: store.append_all(datasets, date(2025, 6, 30), "full", workers),
+                repeat,
+            )
+            structured[name] = {"workers": workers, "seconds": round(seconds, 3)}
+
+    legacy = writes["stdlib_indent"]["seconds"]
+    return {
+        "python": sys.version.split()[0],
+        "orjson": orjson.__version__ if orjson is not None else None,
+        "cpu_count": os.cpu_count(),
+        "songs": songs,
+        "repeat": repeat,
+        "report_writes": writes,
+        "speedup": {
+            name: round(legacy / result["seconds"], 2)
+            for name, result in writes.items()
+        },
+        "structured_writes": structured,
+    }
+
+
+def _write_bytes(data: bytes, path: str):
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+def main():
+    """命令行入口: python benchmarks/analysis_writes.py [曲目数] [重复次数] [输出JSON路径]"""
+    songs = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    output_path = sys.argv[3] if len(sys.argv) > 3 else None
+
+    result = benchmark(songs, repeat)
+    for name, write in result["report_writes"].items():
+        print(
+            "{}: {:.3f}s，{:.1f} MB/s（{:.2f}x）".format(
+                name,
+                write["seconds"],
+                write["mb_per_second"],
+                result["speedup"][name],
+            ),
+            file=sys.stderr,
+        )
+
+    text = json.dumps(result, ensure_ascii=False, indent=2)
+    if output_path:
+        with open(output_path, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
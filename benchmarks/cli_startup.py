@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+命令行启动耗时基准
+以 python -X importtime 运行 main.py 的各个子命令，统计模块导入耗时与总耗时，
+结果以JSON输出，便于持续跟踪短命令的启动开销
+"""
+
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# (名称, main.py 参数)；只包含不依赖原始数据的短命令
+COMMANDS = [
+    ("help", ["help"]),
+    ("report_marketing", ["report", "marketing"]),
+    ("report_technical", ["report", "technical"]),
+    ("report_executive", ["report", "executive"]),
+]
+
+# 短命令启动预算（毫秒，不含解释器自身启动）
+BUDGET_MS = 100
+
+
+def parse_importtime(stderr: str) -> Dict[str, int]:
+    """解析 -X importtime 输出，返回顶层模块的累计导入耗时（微秒）"""
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        # 顶层导入没有缩进，子模块已计入其父模块的累计耗时
+        if not name[1:].startswith(" "):
+            modules[name.strip()] = int(cumulative)
+    return modules
+
+
+def run_once(args: List[str], workdir: str, baseline: bool = False) -> Dict:
+    """运行一次命令，返回墙钟耗时与各模块导入耗时"""
+    command = [sys.executable, "-X", "importtime"]
+    command += ["-c", "pass"] if baseline else ["main.py"] + args
+    started = time.perf_counter()
+    result = subprocess.run(command, cwd=workdir, capture_output=True, text=True)
+    wall_ms = (time.perf_counter() - started) * 1000
+    if result.returncode != 0:
+        raise RuntimeError("{} 运行失败:\n{}".format(args, result.stderr[-2000:]))
+    return {"wall_ms": wall_ms, "imports": parse_importtime(result.stderr)}
+
+
+def benchmark(repeat: int = 5) -> Dict:
+    """在项目的临时副本中测量各子命令，避免改写仓库中的报告与缓存"""
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = os.path.join(tmp, "project")
+        shutil.copytree(
+            PROJECT_DIR,
+            workdir,
+            ignore=shutil.ignore_patterns(".git", ".cache", "__pycache__", "backup"),
+        )
+        # 预热一次，使 .pyc 与模板字节码缓存就绪
+        run_once([], workdir, baseline=True)
+        baseline_runs = [run_once([], workdir, baseline=True) for _ in range(repeat)]
+        baseline_imports = baseline_runs[-1]["imports"]
+        interpreter_ms = statistics.median(run["wall_ms"] for run in baseline_runs)
+
+        results = {}
+        for name, args in COMMANDS:
+            run_once(args, workdir)
+            runs = [run_once(args, workdir) for _ in range(repeat)]
+            imports = {
+                module: us
+                for module, us in runs[-1]["imports"].items()
+                if module not in baseline_imports
+            }
+            wall_ms = statistics.median(run["wall_ms"] for run in runs)
+            results[name] = {
+                "argv": args,
+                "wall_ms": round(wall_ms, 1),
+                "startup_ms": round(wall_ms - interpreter_ms, 1),
+                "import_ms": round(sum(imports.values()) / 1000, 1),
+                "slowest_imports": {
+                    module: round(us / 1000, 1)
+                    for module, us in sorted(
+                        imports.items(), key=lambda item: item[1], reverse=True
+                    )[:5]
+                },
+                "within_budget": wall_ms - interpreter_ms < BUDGET_MS,
+            }
+
+    return {
+        "python": sys.version.split()[0],
+        "repeat": repeat,
+        "budget_ms": BUDGET_MS,
+        "interpreter_ms": round(interpreter_ms, 1),
+        "commands": results,
+    }
+
+
+def main():
+    """命令行入口: python benchmarks/cli_startup.py [重复次数] [输出JSON路径]"""
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    output_path = sys.argv[2] if len(sys.argv) > 2 else None
+
+    report = benchmark(repeat)
+    for name, result in report["commands"].items():
+        print(
+            "{} {}: 启动 {:.1f}ms（导入 {:.1f}ms）".format(
+                "✅" if result["within_budget"] else "❌",
+                name,
+                result["startup_ms"],
+                result["import_ms"],
+            ),
+            file=sys.stderr,
+        )
+
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if output_path:
+        with open(output_path, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        print(text)
+
+    sys.exit(0 if all(r["within_budget"] for r in report["commands"].values()) else 1)
+
+
+if __name__ == "__main__":
+    main()
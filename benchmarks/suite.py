@@ -0,0 +1,393 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+白皮书流水线基准测试套件
+以合成的Billboard报告与点播日志（10^3 - 10^8 行）计时解析、聚合、各分析函数、
+模板渲染、各图表及端到端 run_complete_pipeline，结果按提交保存为JSON，
+compare 子命令对比两次结果并标出性能回退
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import warnings
+from datetime import datetime
+from typing import Callable, Dict, List
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(PROJECT_DIR)
+
+from benchmarks.synthetic import write_billboard_report, write_play_logs
+
+SCENARIOS = ("parse", "aggregate", "analyze", "render", "chart", "pipeline")
+
+# analyze 场景计时的分析函数（MusicDataAnalyzer 的方法）
+ANALYZERS = [
+    "analyze_top_songs",
+    "analyze_user_demographics",
+    "analyze_regional_trends",
+    "analyze_time_patterns",
+    "analyze_tag_trends",
+    "generate_business_recommendations",
+    "generate_comprehensive_report",
+]
+
+MIN_ROWS, MAX_ROWS = 10**3, 10**8
+
+# 耗时低于该值（秒）的结果不参与回退判断，避免计时噪声
+MIN_COMPARE_SECONDS = 0.001
+
+
+def git_revision() -> Dict:
+    """当前提交与工作区是否有未提交的修改"""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=PROJECT_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+        status = subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"],
+            cwd=PROJECT_DIR,
+            capture_output=True,
+            text=True,
+        ).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return {"commit": None, "dirty": None}
+    return {"commit": commit, "dirty": bool(status.strip())}
+
+
+class BenchmarkSuite:
+    """按数据规模依次运行各场景"""
+
+    def __init__(self, data_dir: str, repeat: int = 3, seed: int = 0):
+        self.data_dir = data_dir
+        self.repeat = repeat
+        self.seed = seed
+        self.results = []
+
+    def report_path(self, rows: int) -> str:
+        """合成报告（确定性生成，已存在时直接复用）"""
+        path = os.path.join(
+            self.data_dir, "billboard_{}_s{}.md".format(rows, self.seed)
+        )
+        if not os.path.exists(path):
+            write_billboard_report(path, rows, self.seed)
+        return path
+
+    def play_log_path(self, rows: int) -> str:
+        """合成点播日志（确定性生成，已存在时直接复用）"""
+        path = os.path.join(
+            self.data_dir, "play_logs_{}_s{}.parquet".format(rows, self.seed)
+        )
+        if not os.path.exists(path):
+            write_play_logs(path, rows, self.seed)
+        return path
+
+    def measure(
+        self, scenario: str, name: str, rows: int, action: Callable, repeat=None
+    ):
+        """重复执行并记录耗时，返回最后一次的结果"""
+        seconds = []
+        for _ in range(repeat or self.repeat):
+            started = time.perf_counter()
+            value = action()
+            seconds.append(time.perf_counter() - started)
+        median = statistics.median(seconds)
+        self.results.append(
+            {
+                "scenario": scenario,
+                "name": name,
+                "rows": rows,
+                "repeat": len(seconds),
+                "median_s": round(median, 6),
+                "min_s": round(min(seconds), 6),
+                "rows_per_s": round(rows / median, 1) if median > 0 else None,
+            }
+        )
+        print(
+            "  {}/{} @ {:,} 行: {:.4f}s".format(scenario, name, rows, median),
+            file=sys.stderr,
+        )
+        return value
+
+    def run(self, sizes: List[int], scenarios: List[str]):
+        from analysis.data_analyzer import MusicDataAnalyzer
+
+        for rows in sizes:
+            print("📏 数据规模: {:,} 行".format(rows), file=sys.stderr)
+            analyzer = MusicDataAnalyzer()
+
+            if "parse" in scenarios or "analyze" in scenarios:
+                report_file = self.report_path(rows)
+                self.measure(
+                    "parse",
+                    "load_billboard_data",
+                    rows,
+                    lambda: analyzer.load_billboard_data(report_file),
+                    repeat=None if "parse" in scenarios else 1,
+                )
+                if "analyze" in scenarios:
+                    self._analyzers(analyzer, "billboard", rows)
+
+            needs_logs = {"aggregate", "analyze", "render", "chart"}
+            if needs_logs & set(scenarios):
+                log_file = self.play_log_path(rows)
+                self.measure(
+                    "aggregate",
+                    "load_play_logs",
+                    rows,
+                    lambda: analyzer.load_play_logs(log_file),
+                    repeat=None if "aggregate" in scenarios else 1,
+                )
+                if "analyze" in scenarios:
+                    self._analyzers(analyzer, "play_logs", rows)
+                report = analyzer.generate_comprehensive_report()
+                if "render" in scenarios:
+                    self._render(report, rows)
+                if "chart" in scenarios:
+                    self._charts(report, rows)
+
+            if "pipeline" in scenarios:
+                self._pipeline(self.play_log_path(rows), rows)
+
+        # 只保留被选中的场景（为准备数据执行的加载不计入结果）
+        self.results = [r for r in self.results if r["scenario"] in scenarios]
+
+    def _analyzers(self, analyzer, source: str, rows: int):
+        for name in ANALYZERS:
+            self.measure(
+                "analyze", "{}.{}".format(source, name), rows, getattr(analyzer, name)
+            )
+
+    def _render(self, report: Dict, rows: int):
+        from content.content_generator import WHITEPAPER_SECTIONS, ContentGenerator
+
+        with tempfile.TemporaryDirectory() as tmp:
+            generator = ContentGenerator(bytecode_cache_dir=os.path.join(tmp, "jinja2"))
+            for section, _ in WHITEPAPER_SECTIONS:
+                self.measure(
+                    "render",
+                    section,
+                    rows,
+                    lambda: generator.render_section(section, report),
+                )
+            self.measure(
+                "render",
+                "complete_whitepaper",
+                rows,
+                lambda: generator.generate_complete_whitepaper(report),
+            )
+
+    def _charts(self, report: Dict, rows: int):
+        import matplotlib
+
+        matplotlib.use("Agg")
+        from visualization.chart_generator import ChartGenerator
+        from visualization.render_profiles import RENDER_TARGETS
+
+        # 未安装中文字体的机器上每个字形都会告警，不影响计时
+        warnings.filterwarnings("ignore", message="Glyph .* missing from font")
+
+        # 默认目标沿用图表名，其他输出目标记为 "图表名@目标"
+        with tempfile.TemporaryDirectory() as tmp:
+            for target in RENDER_TARGETS:
+                generator = ChartGenerator(output_dir=tmp, targets=(target,))
+                for name, (create_chart, chart_data) in generator.chart_specs(
+                    report
+                ).items():
+                    if target != "standard":
+                        if name == "dashboard":
+                            continue
+                        name = "{}@{}".format(name, target)
+                    self.measure("chart", name, rows, lambda: create_chart(chart_data))
+
+            # 复用图形模板（常驻服务）：先构建一次模板，只计更新数据后的渲染，
+            # 记为 "图表名@reuse" 与 "图表名@draft+reuse"
+            for target, suffix in (("standard", "reuse"), ("draft", "draft+reuse")):
+                generator = ChartGenerator(
+                    output_dir=tmp, targets=(target,), reuse_figures=True
+                )
+                for name, (create_chart, chart_data) in generator.chart_specs(
+                    report
+                ).items():
+                    if name in generator.parallel_charts:
+                        create_chart(chart_data)
+                        self.measure(
+                            "chart",
+                            "{}@{}".format(name, suffix),
+                            rows,
+                            lambda: create_chart(chart_data),
+                        )
+
+    def _pipeline(self, log_file: str, rows: int):
+        """在项目的临时副本中以子进程运行完整流程（--no-cache），不改写仓库中的产物"""
+        with tempfile.TemporaryDirectory() as tmp:
+            workdir = os.path.join(tmp, "project")
+            shutil.copytree(
+                PROJECT_DIR,
+                workdir,
+                ignore=shutil.ignore_patterns(
+                    ".git", ".cache", "__pycache__", "backup", "processed", "profiles"
+                ),
+            )
+            command = [sys.executable, "main.py", "run", log_file, "--no-cache"]
+
+            def run_pipeline():
+                result = subprocess.run(
+                    command, cwd=workdir, capture_output=True, text=True
+                )
+                if result.returncode != 0:
+                    raise RuntimeError(
+                        "完整流程运行失败:\n{}".format(result.stderr[-2000:])
+                    )
+
+            self.measure("pipeline", "run_complete_pipeline", rows, run_pipeline)
+
+
+def parse_sizes(text: str) -> List[int]:
+    """解析逗号分隔的数据规模，支持 1e5 写法"""
+    sizes = [int(float(size)) for size in text.split(",") if size.strip()]
+    for size in sizes:
+        if not MIN_ROWS <= size <= MAX_ROWS:
+            raise argparse.ArgumentTypeError(
+                "数据规模需在 {:.0e} - {:.0e} 行之间: {}".format(
+                    MIN_ROWS, MAX_ROWS, size
+                )
+            )
+    return sizes
+
+
+def run_benchmarks(args) -> Dict:
+    scenarios = args.scenarios.split(",")
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        raise SystemExit("未知的场景: {}".format(", ".join(sorted(unknown))))
+
+    suite = BenchmarkSuite(args.data_dir, args.repeat, args.seed)
+    started_at = datetime.now()
+    suite.run(args.sizes, scenarios)
+
+    result = {
+        **git_revision(),
+        "started_at": started_at.isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "seed": args.seed,
+        "sizes": args.sizes,
+        "scenarios": scenarios,
+        "results": suite.results,
+    }
+
+    output_path = args.output or os.path.join(
+        PROJECT_DIR,
+        "benchmarks",
+        "results",
+        "bench_{}_{:%Y%m%d_%H%M%S}.json".format(
+            result["commit"] or "unknown", started_at
+        ),
+    )
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+    print("✓ 基准结果已保存: {}".format(output_path), file=sys.stderr)
+    return result
+
+
+def compare(base_path: str, head_path: str, threshold: float = 0.10) -> bool:
+    """对比两次基准结果，返回是否存在超过阈值的回退"""
+    with open(base_path, "r", encoding="utf-8") as f:
+        base = json.load(f)
+    with open(head_path, "r", encoding="utf-8") as f:
+        head = json.load(f)
+
+    def key(result):
+        return result["scenario"], result["name"], result["rows"]
+
+    base_results = {key(result): result for result in base["results"]}
+    regressions = []
+    print("基准对比: {} → {}".format(base.get("commit"), head.get("commit")))
+    for result in head["results"]:
+        previous = base_results.get(key(result))
+        if previous is None:
+            continue
+        ratio = result["median_s"] / previous["median_s"] if previous["median_s"] else 1
+        regressed = (
+            ratio > 1 + threshold
+            and max(result["median_s"], previous["median_s"]) >= MIN_COMPARE_SECONDS
+        )
+        if regressed:
+            regressions.append(result)
+        print(
+            "{} {}/{} @ {:,} 行: {:.4f}s → {:.4f}s ({:+.1%})".format(
+                "⚠️" if regressed else "  ",
+                result["scenario"],
+                result["name"],
+                result["rows"],
+                previous["median_s"],
+                result["median_s"],
+                ratio - 1,
+            )
+        )
+    print(
+        "共 {} 项回退超过 {:.0%}".format(len(regressions), threshold)
+        if regressions
+        else "✅ 无超过 {:.0%} 的回退".format(threshold)
+    )
+    return bool(regressions)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="音乐白皮书流水线基准测试")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="运行基准测试")
+    run.add_argument(
+        "--sizes",
+        type=parse_sizes,
+        default=[10**3, 10**4, 10**5],
+        help="逗号分隔的数据规模（行），范围 1e3 - 1e8，默认 1e3,1e4,1e5",
+    )
+    run.add_argument(
+        "--scenarios",
+        default=",".join(SCENARIOS),
+        help="逗号分隔的场景: {}".format(", ".join(SCENARIOS)),
+    )
+    run.add_argument("--repeat", type=int, default=3, help="每项重复次数（取中位数）")
+    run.add_argument("--seed", type=int, default=0, help="合成数据的随机种子")
+    run.add_argument(
+        "--data-dir",
+        default=os.path.join(PROJECT_DIR, ".cache", "benchmarks"),
+        help="合成数据目录（相同规模与种子的数据会被复用）",
+    )
+    run.add_argument(
+        "--output",
+        help="结果JSON路径，默认 benchmarks/results/bench_<提交>_<时间>.json",
+    )
+
+    diff = commands.add_parser("compare", help="对比两次基准结果")
+    diff.add_argument("base", help="基线结果JSON")
+    diff.add_argument("head", help="待比较的结果JSON")
+    diff.add_argument(
+        "--threshold", type=float, default=0.10, help="判定为回退的变慢比例，默认0.10"
+    )
+
+    args = parser.parse_args()
+    if args.command == "run":
+        run_benchmarks(args)
+    else:
+        sys.exit(1 if compare(args.base, args.head, args.threshold) else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+基准测试数据生成器
+按给定行数确定性地生成Billboard格式的Markdown报告与终端点播日志，
+相同的 (行数, 种子) 总是生成完全相同的文件；分块写出，10^8 行也不会占满内存
+"""
+
+import os
+import sys
+from datetime import date, datetime, timezone
+from typing import List
+
+import numpy as np
+import pandas as pd
+
+TAGS = [
+    "emo",
+    "怀旧",
+    "对唱",
+    "表白",
+    "嗨歌",
+    "粤语",
+    "港风",
+    "古风",
+    "演唱会",
+    "翻唱",
+    "女声",
+    "独唱",
+    "抖音",
+    "本地化",
+    "动漫",
+    "DJ",
+]
+CITY_TYPES = ["一线城市", "新一线城市", "二线城市", "三线城市"]
+DEVICES = ["商业KTV", "家庭音响系统", "拉杆便携音响", "共享K歌亭"]
+
+# 24小时点播分布（晚间高峰、午间次高峰、凌晨低谷）
+HOUR_WEIGHTS = np.array(
+    [3, 2, 1, 1, 1, 1, 1, 2, 3, 4, 5, 6, 8, 8, 6, 5, 6, 7, 9, 12, 13, 13, 10, 6],
+    dtype=float,
+)
+HOUR_WEIGHTS /= HOUR_WEIGHTS.sum()
+
+DAY_SECONDS = 24 * 3600
+
+# 终端所在时区 Asia/Shanghai（analysis.periods.DEFAULT_TIMEZONE）相对UTC的偏移，无夏令时；
+# 点播按当地时间的日期与小时分布生成
+LOCAL_OFFSET = 8 * 3600
+
+# 每块生成的点播条数（同时是Parquet行组大小）；块划分固定，保证结果与机器无关
+CHUNK_ROWS = 1_000_000
+
+
+def catalogue_size(rows: int) -> int:
+    """点播日志的曲库规模：随行数增长，限制在 [100, 200000]"""
+    return int(min(max(rows // 100, 100), 200_000))
+
+
+def song_catalogue(songs: int, seed: int = 0) -> pd.DataFrame:
+    """确定性生成曲库：歌名、歌手、标签（"/"分隔）与发行日期"""
+    rng = np.random.default_rng([seed, 0])
+    tag_count = rng.integers(1, 4, size=songs)
+    tag_index = rng.integers(0, len(TAGS), size=(songs, 3))
+    release_days = rng.integers(0, 3650, size=songs)
+    release_base = np.datetime64("2015-07-01")
+    return pd.DataFrame(
+        {
+            "title": ["歌曲{}".format(i) for i in range(songs)],
+            "artist": [
+                "歌手{}".format(i) for i in rng.integers(0, songs // 5 + 1, songs)
+            ],
+            "tags": [
+                "/".join(dict.fromkeys(TAGS[t] for t in tag_index[i, : tag_count[i]]))
+                for i in range(songs)
+            ],
+            "release_date": (release_base + release_days).astype(str),
+        }
+    )
+
+
+def play_log_chunks(
+    rows: int,
+    seed: int = 0,
+    start: date = date(2025, 4, 1),
+    days: int = 91,
+    surge_songs: int = 5,
+):
+    """按时间顺序逐块生成点播日志
+
+    歌曲热度服从Zipf分布；最后一周有 surge_songs 首中游歌曲点播量激增，
+    使黑马榜与增长率有可检测的信号
+    """
+    songs = catalogue_size(rows)
+    catalogue = song_catalogue(songs, seed)
+    popularity = 1.0 / np.arange(1, songs + 1) ** 1.1
+    popularity /= popularity.sum()
+    # 激增的歌曲取自热度中游（有稳定的基线点播，增长率才有意义）
+    surge = np.arange(50, 50 + surge_songs)
+
+    origin = (
+        int(datetime.combine(start, datetime.min.time(), timezone.utc).timestamp())
+        - LOCAL_OFFSET
+    )
+    span = days * DAY_SECONDS
+    surge_start = origin + span - 7 * DAY_SECONDS
+    chunks = max(1, -(-rows // CHUNK_ROWS))
+
+    for index in range(chunks):
+        size = min(CHUNK_ROWS, rows - index * CHUNK_ROWS)
+        rng = np.random.default_rng([seed, index + 1])
+
+        # 每块覆盖整个时间范围的一段，整体按时间递增，贴近真实日志
+        lower = origin + span * index // chunks
+        upper = origin + span * (index + 1) // chunks
+        moments = rng.integers(lower, upper, size=size)
+        day_start = moments - (moments + LOCAL_OFFSET) % DAY_SECONDS
+        hours = rng.choice(24, size=size, p=HOUR_WEIGHTS)
+        seconds = day_start + hours * 3600 + rng.integers(0, 3600, size=size)
+        seconds = np.sort(np.clip(seconds, lower, upper - 1))
+
+        song = rng.choice(songs, size=size, p=popularity)
+        late = seconds >= surge_start
+        boosted = late & (rng.random(size) < 0.05)
+        song[boosted] = rng.choice(surge, size=int(boosted.sum()))
+
+        chunk = catalogue.iloc[song].reset_index(drop=True)
+        chunk.insert(0, "timestamp", seconds)
+        chunk.insert(4, "city_type", np.array(CITY_TYPES)[rng.integers(0, 4, size)])
+        chunk.insert(5, "device", np.array(DEVICES)[rng.integers(0, 4, size)])
+        chunk.insert(6, "plays", np.ones(size, dtype="int64"))
+        chunk.insert(7, "duration", rng.integers(60, 420, size=size))
+        yield chunk
+
+
+def write_play_logs(path: str, rows: int, seed: int = 0, **kwargs) -> str:
+    """写出点播日志，按扩展名选择 .parquet / .csv / .jsonl 格式"""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    temp_path = path + ".tmp"
+    extension = os.path.splitext(path)[1]
+
+    if extension == ".parquet":
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        writer = None
+        for chunk in play_log_chunks(rows, seed, **kwargs):
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(temp_path, table.schema, compression="zstd")
+            writer.write_table(table)
+        writer.close()
+    elif extension in (".csv", ".jsonl"):
+        with open(temp_path, "w", encoding="utf-8", newline="") as f:
+            for index, chunk in enumerate(play_log_chunks(rows, seed, **kwargs)):
+                if extension == ".csv":
+                    chunk.to_csv(f, header=index == 0, index=False)
+                else:
+                    chunk.to_json(f, orient="records", lines=True, force_ascii=False)
+    else:
+        raise ValueError("不支持的点播日志格式: {}".format(path))
+
+    os.replace(temp_path, path)
+    return path
+
+
+def _table(header: List[str], rows) -> List[str]:
+    lines = ["| " + " | ".join(header) + " |", "|" + "---|" * len(header)]
+    lines.extend("| " + " | ".join(str(cell) for cell in row) + " |" for row in rows)
+    return lines + [""]
+
+
+def billboard_report_lines(rows: int, seed: int = 0):
+    """逐行生成Billboard报告：各榜单表格合计约 rows 行，章节结构与样例报告一致"""
+    rng = np.random.default_rng([seed, 0])
+    top_rows = max(rows // 2, 10)
+    chart_rows = max(rows // 8, 5)
+
+    def tags(count: int) -> List[str]:
+        picks = rng.integers(0, len(TAGS), size=(count, 2))
+        return ["{}/{}".format(TAGS[a], TAGS[b]) for a, b in picks]
+
+    yield "# Billboard 音乐曲库研究报告：2025 Q2"
+    yield ""
+    yield "## 爆款金曲榜 TOP10"
+    yield ""
+    rates = np.sort(rng.random(top_rows) * 3)[::-1]
+    yield from _table(
+        ["排名", "歌曲名", "歌手", "标签", "点播占比"],
+        (
+            (
+                i + 1,
+                "歌曲{}".format(i),
+                "歌手{}".format(i % 997),
+                tag,
+                "{:.3f}%".format(r),
+            )
+            for i, (tag, r) in enumerate(zip(tags(top_rows), rates))
+        ),
+    )
+
+    yield "## 黑马榜（新歌及次新歌快速蹿升）"
+    yield ""
+    growth = rng.integers(50, 300, size=chart_rows)
+    yield from _table(
+        ["排名", "歌曲名", "发行时间", "最近涨幅（估算）", "评星", "黑马成因"],
+        (
+            (
+                i + 1,
+                "新歌{}".format(i),
+                "2025年3月1日",
+                "+{}%".format(g),
+                "⭐⭐⭐⭐",
+                "短视频传播",
+            )
+            for i, g in enumerate(growth)
+        ),
+    )
+
+    yield "## 谁在点歌：用户画像与地域偏好"
+    yield ""
+    male = int(rng.integers(45, 65))
+    yield "男性 ▇▇▇▇▇▇▇▇ {}%".format(male)
+    yield "女性 ▇▇▇▇▇▇ {}%".format(100 - male)
+    yield ""
+    yield from _table(
+        ["城市类型", "高频标签", "典型歌曲"],
+        (
+            (city, "、".join(TAGS[i : i + 3]), "歌曲{}、歌曲{}".format(i, i + 1))
+            for i, city in enumerate(CITY_TYPES)
+        ),
+    )
+
+    yield "## 什么时间点歌最多？"
+    yield ""
+    durations = ["1h45m", "1h15m", "58m", "42m"]
+    yield from _table(
+        ["设备类型", "活跃时段", "平均时长", "典型行为画像"],
+        (
+            (device, "19:00 - 23:00", duration, "聚会K歌")
+            for device, duration in zip(DEVICES, durations)
+        ),
+    )
+
+    yield "## 音乐标签风向标：哪些风格在上升？"
+    yield ""
+    frequency = rng.integers(1000, 10000, size=chart_rows)
+    yield from _table(
+        ["标签关键词", "出现频率", "环比涨幅", "趋势解读"],
+        (
+            (
+                "{}{}".format(TAGS[i % len(TAGS)], i // len(TAGS) or ""),
+                f,
+                "+12%",
+                "持续上升",
+            )
+            for i, f in enumerate(frequency)
+        ),
+    )
+
+    yield "## 下一首爆红歌曲预测"
+    yield ""
+    yield "- 🎯 情绪主导继续上升"
+    yield ""
+    yield "## DJ 榜单 Top10（含热播+推荐）"
+    yield ""
+    yield from _table(
+        ["排名", "歌曲名", "标签关键词", "点播占比估算/热度", "推荐理由/传播场景"],
+        (
+            (
+                i + 1,
+                "DJ 舞曲{}".format(i),
+                "电音、节奏强",
+                "{:.1f}%".format(r),
+                "短视频",
+            )
+            for i, r in enumerate(np.sort(rng.random(chart_rows) * 5)[::-1])
+        ),
+    )
+    yield from _table(
+        ["排名", "歌曲名", "标签关键词", "热度状态", "推荐理由/传播场景"],
+        (
+            (i + 1, "DJ-混音{}".format(i), "DJ/情感混音", "热播上升", "车载剪辑")
+            for i in range(chart_rows)
+        ),
+    )
+    yield "## 出品机构与版权声明"
+    yield ""
+
+
+def write_billboard_report(path: str, rows: int, seed: int = 0) -> str:
+    """写出合成的Billboard Markdown报告"""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    temp_path = path + ".tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        for line in billboard_report_lines(rows, seed):
+            f.write(line + "\n")
+    os.replace(temp_path, path)
+    return path
+
+
+def main():
+    """命令行入口: python benchmarks/synthetic.py logs|report 行数 输出路径 [种子]"""
+    if len(sys.argv) < 4 or sys.argv[1] not in ("logs", "report"):
+        print("用法: python benchmarks/synthetic.py logs|report 行数 输出路径 [种子]")
+        sys.exit(1)
+    kind, rows, path = sys.argv[1], int(float(sys.argv[2])), sys.argv[3]
+    seed = int(sys.argv[4]) if len(sys.argv) > 4 else 0
+    if kind == "logs":
+        write_play_logs(path, rows, seed)
+    else:
+        write_billboard_report(path, rows, seed)
+    print("✓ 已生成 {}（{} 行）".format(path, rows))
+
+
+if __name__ == "__main__":
+    main()
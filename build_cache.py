@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+流水线增量构建缓存
+按各阶段输入内容的哈希判断是否需要重新生成产物
+"""
+
+import hashlib
+import json
+import os
+from typing import Any, Dict, Iterator, List
+
+
+class BuildCache:
+    """基于内容哈希的构建缓存"""
+
+    def __init__(self, cache_file: str = ".cache/build_cache.json"):
+        self.cache_file = cache_file
+        self.entries = {}
+        self.hits = []
+        self.misses = []
+        self.load()
+
+    def load(self):
+        """加载缓存清单"""
+        try:
+            with open(self.cache_file, "r", encoding="utf-8") as f:
+                self.entries = json.load(f)
+        except (FileNotFoundError, ValueError):
+            self.entries = {}
+
+    def save(self):
+        """保存缓存清单"""
+        os.makedirs(os.path.dirname(self.cache_file) or ".", exist_ok=True)
+        with open(self.cache_file, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f, ensure_ascii=False, indent=2)
+
+    @staticmethod
+    def fingerprint(*parts: Any) -> str:
+        """计算输入指纹，bytes按原样参与哈希，其余对象按规范化JSON哈希"""
+        digest = hashlib.sha256()
+        for part in parts:
+            if isinstance(part, bytes):
+                data = part
+            else:
+                data = json.dumps(
+                    part, ensure_ascii=False, sort_keys=True, default=str
+                ).encode("utf-8")
+            digest.update(len(data).to_bytes(8, "little"))
+            digest.update(data)
+        return digest.hexdigest()
+
+    @staticmethod
+    def file_bytes(path: str) -> bytes:
+        """读取文件字节用于指纹计算"""
+        with open(path, "rb") as f:
+            return f.read()
+
+    @staticmethod
+    def file_signature(path: str) -> Dict[str, Any]:
+        """文件的路径、大小与修改时间，用于不宜整体读入的大文件（如点播日志）"""
+        stat = os.stat(path)
+        return {
+            "path": os.path.abspath(path),
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+        }
+
+    @staticmethod
+    def source_files(path: str, root: str) -> List[str]:
+        """path 及其直接或间接导入（含函数内延迟导入）的项目内模块源文件"""
+        seen = set()
+        pending = [os.path.abspath(path)]
+        while pending:
+            current = pending.pop()
+            if current not in seen:
+                seen.add(current)
+                pending.extend(_local_imports(current, root))
+        return sorted(seen)
+
+    @classmethod
+    def source_digest(cls, path: str, root: str) -> str:
+        """模块及其导入的全部项目内模块的源码指纹，任一模块修改都会使阶段缓存失效"""
+        return cls.fingerprint(
+            *(
+                [os.path.relpath(source, root), cls.file_bytes(source)]
+                for source in cls.source_files(path, root)
+            )
+        )
+
+    def lookup(self, stage: str, fingerprint: str) -> Any:
+        """查询阶段缓存，命中时返回记录的产物，否则返回None"""
+        entry = self.entries.get(stage)
+        if (
+            entry
+            and entry["fingerprint"] == fingerprint
+            and all(os.path.exists(path) for path in entry["files"])
+        ):
+            self.hits.append(stage)
+            return entry["outputs"]
+
+        self.misses.append(stage)
+        return None
+
+    def skip(self, stage: str):
+        """禁用缓存时记录未命中（阶段总是重新生成）"""
+        self.misses.append(stage)
+
+    def store(self, stage: str, fingerprint: str, outputs: Any, files: List[str]):
+        """记录阶段指纹及其产物"""
+        self.entries[stage] = {
+            "fingerprint": fingerprint,
+            "outputs": outputs,
+            "files": list(files),
+        }
+
+    def summary(self) -> Dict[str, List[str]]:
+        """返回本次运行的命中与未命中阶段"""
+        return {"hits": list(self.hits), "misses": list(self.misses)}
+
+
+def _local_imports(path: str, root: str) -> Iterator[str]:
+    """源文件中导入的、位于项目目录root下的模块文件"""
+    import ast
+
+    with open(path, "rb") as f:
+        tree = ast.parse(f.read(), path)
+    names = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            # "from visualization import dashboard" 导入的也可能是模块
+            names.append(node.module)
+            names.extend(node.module + "." + alias.name for alias in node.names)
+    for name in names:
+        base = os.path.join(root, *name.split("."))
+        for candidate in (base + ".py", os.path.join(base, "__init__.py")):
+            if os.path.isfile(candidate):
+                yield candidate
@@ -6,17 +6,88 @@
 """
 
 import json
+import os
+import re
+import time
+from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Tuple
+
+from jinja2 import DictLoader, Environment, FileSystemBytecodeCache, Template
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# 模板字节码缓存目录，固定在项目根目录下，与启动时的工作目录无关
+DEFAULT_BYTECODE_CACHE = os.path.join(PROJECT_DIR, ".cache", "jinja2")
+
+# 白皮书章节及其读取的分析数据路径，用于判断合作方覆盖数据影响哪些章节
+WHITEPAPER_SECTIONS = [
+    ("executive_summary", [("executive_summary",)]),
+    (
+        "market_analysis",
+        [
+            ("detailed_analysis", "top_songs_analysis"),
+            ("detailed_analysis", "user_demographics"),
+            ("detailed_analysis", "regional_trends"),
+            ("detailed_analysis", "time_patterns"),
+        ],
+    ),
+    ("business_recommendations", [("business_recommendations",)]),
+    ("trend_predictions", [("predictions",), ("detailed_analysis", "tag_trends")]),
+    ("marketing_copy", []),
+    ("technical_specs", []),
+]
+
+
+# 合作方名称中不能进入文件名的字符：路径分隔符、Windows保留字符与控制字符
+UNSAFE_FILENAME_CHARS = re.compile(r'[\\/:*?"<>|\x00-\x1f]')
+
+
+def partner_filename(name: str) -> str:
+    """合作方白皮书的文件名：不安全字符替换为 "_"，并去掉首尾的点与空白
+
+    结果不含路径分隔符、也不会是 "." 或 ".."，文件总在输出目录之内
+    """
+    safe = UNSAFE_FILENAME_CHARS.sub("_", str(name)).strip().strip(".").strip()
+    if not safe:
+        raise ValueError(
+            "不支持的合作方名称: {!r}（需包含可用于文件名的字符）".format(name)
+        )
+    return "whitepaper_{}.md".format(safe)
+
+
+def _merge_overrides(base: Dict, overrides: Dict) -> Dict:
+    """将覆盖数据递归合并到分析数据上，返回新字典"""
+    merged = dict(base)
+    for key, value in overrides.items():
+        # 分析数据可能是内存映射归档中的惰性字典（Mapping）
+        if isinstance(value, dict) and isinstance(merged.get(key), Mapping):
+            merged[key] = _merge_overrides(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
 
-from jinja2 import Template
+
+def _overrides_path(overrides: Dict, path: Tuple[str, ...]) -> bool:
+    """判断覆盖数据是否涉及指定的数据路径"""
+    node = overrides
+    for key in path:
+        if not isinstance(node, dict):
+            return True
+        if key not in node:
+            return False
+        node = node[key]
+    return True
 
 
 class ContentGenerator:
     """文案生成器"""
 
-    def __init__(self):
+    def __init__(self, bytecode_cache_dir: str = DEFAULT_BYTECODE_CACHE):
         self.templates = {}
+        self.bytecode_cache_dir = bytecode_cache_dir
+        self.env = None
+        self.compiled_templates = {}
         self.load_templates()
 
     def load_templates(self):
@@ -60,10 +131,19 @@ class ContentGenerator:
 - **{{ region.city_type }}**: 偏好{{ region.preferred_tags|join('、') }}标签，典型歌曲包括{{ region.typical_songs|join('、') }}
 {% endfor %}
 
+{% if top_songs_analysis and top_songs_analysis.emotion_shares %}
+### 情绪标签结构
+{% for tag, share in top_songs_analysis.emotion_shares.items() %}
+- **{{ tag }}**: 点播加权占比{{ (share * 100)|round(1) }}%
+{% endfor %}
+{% endif %}
+
 ### 时间使用模式
-- **高峰时段**: {{ time_patterns.peak_hours.start }} - {{ time_patterns.peak_hours.end }} (使用率{{ time_patterns.peak_hours.usage_rate|int }}%)
-- **次高峰**: {{ time_patterns.secondary_peak.start }} - {{ time_patterns.secondary_peak.end }} (使用率{{ time_patterns.secondary_peak.usage_rate|int }}%)
-- **低谷时段**: {{ time_patterns.low_usage.start }} - {{ time_patterns.low_usage.end }} (使用率{{ time_patterns.low_usage.usage_rate|int }}%)
+- **高峰时段**: {{ time_patterns.peak_hours.start }} - {{ time_patterns.peak_hours.end }}{% if time_patterns.peak_hours.usage_rate is not none %} (使用率{{ time_patterns.peak_hours.usage_rate|int }}%){% endif %}
+{% if time_patterns.secondary_peak %}
+- **次高峰**: {{ time_patterns.secondary_peak.start }} - {{ time_patterns.secondary_peak.end }}{% if time_patterns.secondary_peak.usage_rate is not none %} (使用率{{ time_patterns.secondary_peak.usage_rate|int }}%){% endif %}
+{% endif %}
+- **低谷时段**: {{ time_patterns.low_usage.start }} - {{ time_patterns.low_usage.end }}{% if time_patterns.low_usage.usage_rate is not none %} (使用率{{ time_patterns.low_usage.usage_rate|int }}%){% endif %}
 
 ---
 """,
@@ -190,26 +270,44 @@ class ContentGenerator:
 """,
         }
 
+        self.compile_templates()
+
+    def compile_templates(self):
+        """编译模板并缓存，字节码同时写入磁盘供后续进程复用"""
+        os.makedirs(self.bytecode_cache_dir, exist_ok=True)
+        self.env = Environment(
+            loader=DictLoader(self.templates),
+            bytecode_cache=FileSystemBytecodeCache(self.bytecode_cache_dir),
+            auto_reload=False,
+        )
+        self.compiled_templates = {
+            name: self.env.get_template(name) for name in self.templates
+        }
+
+    def get_template(self, name: str) -> Template:
+        """获取已编译的模板"""
+        return self.compiled_templates[name]
+
     def generate_executive_summary(self, analysis_data: Dict) -> str:
         """生成执行摘要"""
-        template = Template(self.templates["executive_summary"])
+        template = self.get_template("executive_summary")
         return template.render(**analysis_data["executive_summary"])
 
     def generate_market_analysis(self, analysis_data: Dict) -> str:
         """生成市场分析"""
-        template = Template(self.templates["market_analysis"])
+        template = self.get_template("market_analysis")
         return template.render(**analysis_data["detailed_analysis"])
 
     def generate_business_recommendations(self, analysis_data: Dict) -> str:
         """生成商业建议"""
-        template = Template(self.templates["business_recommendations"])
+        template = self.get_template("business_recommendations")
         return template.render(
             business_recommendations=analysis_data["business_recommendations"]
         )
 
     def generate_trend_predictions(self, analysis_data: Dict) -> str:
         """生成趋势预测"""
-        template = Template(self.templates["trend_predictions"])
+        template = self.get_template("trend_predictions")
         return template.render(
             predictions=analysis_data["predictions"],
             tag_trends=analysis_data["detailed_analysis"]["tag_trends"],
@@ -217,33 +315,35 @@ class ContentGenerator:
 
     def generate_marketing_copy(self) -> str:
         """生成营销文案"""
-        template = Template(self.templates["marketing_copy"])
+        template = self.get_template("marketing_copy")
         return template.render()
 
     def generate_technical_specs(self) -> str:
         """生成技术规格"""
-        template = Template(self.templates["technical_specs"])
+        template = self.get_template("technical_specs")
         return template.render()
 
-    def generate_complete_whitepaper(self, analysis_data: Dict) -> str:
-        """生成完整白皮书"""
-        sections = [
-            self.generate_executive_summary(analysis_data),
-            self.generate_market_analysis(analysis_data),
-            self.generate_business_recommendations(analysis_data),
-            self.generate_trend_predictions(analysis_data),
-            self.generate_marketing_copy(),
-            self.generate_technical_specs(),
-        ]
+    def render_section(self, name: str, analysis_data: Dict) -> str:
+        """按章节名生成白皮书章节"""
+        renderers = {
+            "executive_summary": self.generate_executive_summary,
+            "market_analysis": self.generate_market_analysis,
+            "business_recommendations": self.generate_business_recommendations,
+            "trend_predictions": self.generate_trend_predictions,
+            "marketing_copy": lambda _: self.generate_marketing_copy(),
+            "technical_specs": lambda _: self.generate_technical_specs(),
+        }
+        return renderers[name](analysis_data)
 
-        # 添加页脚
-        footer = f"""
+    def generate_whitepaper_footer(self, period_label: str = "2025年Q2") -> str:
+        """生成白皮书页脚"""
+        return f"""
 ---
 
 ## 关于本报告
 
 **数据来源**: 雷石K歌全系列终端  
-**分析周期**: 2025年Q2  
+**分析周期**: {period_label}  
 **生成时间**: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}  
 **报告版本**: v1.0  
 
@@ -257,8 +357,96 @@ class ContentGenerator:
 *本报告由雷石互联网研究院出品，基于真实用户数据生成，为硬件厂商提供专业的市场洞察和商业建议。*
 """
 
+    def generate_complete_whitepaper(self, analysis_data: Dict) -> str:
+        """生成完整白皮书"""
+        sections = [
+            self.render_section(name, analysis_data) for name, _ in WHITEPAPER_SECTIONS
+        ]
+
+        # 添加页脚，周期报告注明所分析的时间窗口
+        period = analysis_data.get("report_metadata", {}).get("period")
+        footer = (
+            self.generate_whitepaper_footer(period["label"])
+            if period
+            else self.generate_whitepaper_footer()
+        )
+
         return "\n\n".join(sections) + footer
 
+    def generate_partner_whitepapers(
+        self,
+        analysis_data: Dict,
+        partners: List[Dict],
+        output_dir: str = "reports/partners",
+        max_workers: int = 8,
+    ) -> List[Dict]:
+        """批量生成合作方定制白皮书
+
+        partners中每项为 {"name": 合作方名称, "overrides": 覆盖的分析数据,
+        "output_path": 可选输出路径}。未指定输出路径时按名称在output_dir下命名
+        （见 partner_filename），两个合作方的输出路径相同时报错。
+        未被覆盖的章节只生成一次并在所有文档间共享，文件通过线程池并发写入。
+        返回每份文档的耗时统计。
+        """
+        output_paths = [
+            partner.get("output_path")
+            or os.path.join(output_dir, partner_filename(partner["name"]))
+            for partner in partners
+        ]
+        seen = {}
+        for partner, path in zip(partners, output_paths):
+            other = seen.setdefault(os.path.normcase(os.path.abspath(path)), partner)
+            if other is not partner:
+                raise ValueError(
+                    "合作方输出路径重复: {}（{} 与 {}）".format(
+                        path, other["name"], partner["name"]
+                    )
+                )
+
+        shared_sections = {}
+        footer = self.generate_whitepaper_footer()
+        documents = []
+
+        for partner, output_path in zip(partners, output_paths):
+            start = time.perf_counter()
+            overrides = partner.get("overrides") or {}
+            partner_data = _merge_overrides(analysis_data, overrides)
+
+            sections = []
+            custom_sections = []
+            for name, inputs in WHITEPAPER_SECTIONS:
+                if any(_overrides_path(overrides, path) for path in inputs):
+                    sections.append(self.render_section(name, partner_data))
+                    custom_sections.append(name)
+                else:
+                    if name not in shared_sections:
+                        shared_sections[name] = self.render_section(name, analysis_data)
+                    sections.append(shared_sections[name])
+
+            documents.append(
+                {
+                    "partner": partner["name"],
+                    "output_path": output_path,
+                    "content": "\n\n".join(sections) + footer,
+                    "custom_sections": custom_sections,
+                    "render_seconds": time.perf_counter() - start,
+                }
+            )
+
+        def write_document(document: Dict) -> float:
+            start = time.perf_counter()
+            os.makedirs(os.path.dirname(document["output_path"]) or ".", exist_ok=True)
+            self.save_report(document.pop("content"), document["output_path"])
+            return time.perf_counter() - start
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            write_times = list(executor.map(write_document, documents))
+
+        for document, write_seconds in zip(documents, write_times):
+            document["write_seconds"] = write_seconds
+
+        return documents
+
     def generate_custom_report(self, analysis_data: Dict, report_type: str) -> str:
         """生成定制化报告"""
         if report_type == "executive":
@@ -278,12 +466,13 @@ class ContentGenerator:
 
 
 if __name__ == "__main__":
-    # 示例用法
+    # 示例用法（在项目根目录运行: python -m content.content_generator）
     generator = ContentGenerator()
 
-    # 加载分析数据
-    with open("analysis/comprehensive_analysis.json", "r", encoding="utf-8") as f:
-        analysis_data = json.load(f)
+    # 加载分析数据（存在二进制归档时直接内存映射）
+    from analysis.report_archive import load_analysis
+
+    analysis_data = load_analysis("analysis/comprehensive_analysis.json")
 
     # 生成完整白皮书
     whitepaper = generator.generate_complete_whitepaper(analysis_data)
@@ -66,6 +66,16 @@ def run_tests():
     print("✅ 测试完成")
 
 
+def run_benchmarks():
+    """运行基准测试（小规模数据，结果保存到 benchmarks/results/）"""
+    print("⏱️ 运行基准测试")
+    print("=" * 50)
+
+    run_command("python3 benchmarks/suite.py run --sizes 1e3,1e4,1e5", "基准测试")
+
+    print("✅ 基准测试完成")
+
+
 def setup_dev():
     """设置开发环境"""
     print("🛠️ 设置开发环境")
@@ -83,11 +93,12 @@ def setup_dev():
 def main():
     """主函数"""
     if len(sys.argv) < 2:
-        print("用法: python3 dev_tools.py [format|check|test|setup]")
+        print("用法: python3 dev_tools.py [format|check|test|bench|setup]")
         print("\n可用命令:")
         print("  format  - 格式化代码")
         print("  check   - 检查代码质量")
         print("  test    - 运行测试")
+        print("  bench   - 运行基准测试")
         print("  setup   - 设置开发环境")
         return
 
@@ -99,6 +110,8 @@ def main():
         check_code()
     elif command == "test":
         run_tests()
+    elif command == "bench":
+        run_benchmarks()
     elif command == "setup":
         setup_dev()
     else:
@@ -5,28 +5,162 @@
 整合数据分析、文案生成、可视化等功能
 """
 
+import inspect
 import json
 import os
 import sys
 from datetime import datetime
-from typing import Dict, List
+from typing import Dict, List, Optional, Tuple
 
 # 添加项目路径
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from analysis.data_analyzer import MusicDataAnalyzer
-from content.content_generator import ContentGenerator
-from visualization.chart_generator import ChartGenerator
+# 分析、绘图与模板依赖（pandas/matplotlib/jinja2等）在首次使用时才导入，
+# help、report 等短命令无需加载整个分析栈
+from analysis.archive_paths import ARCHIVE_MIN_BYTES, companion_path
+from analysis.periods import DEFAULT_TIMEZONE, PERIODS, ReportPeriod, get_timezone
+from build_cache import BuildCache
+from visualization.render_profiles import DEFAULT_TARGETS, parse_targets
+
+# 点播日志扩展名，与 analysis.play_logs.PLAY_LOG_EXTENSIONS 保持一致
+PLAY_LOG_EXTENSIONS = (".csv", ".jsonl", ".json", ".parquet")
+
+# 周期报告默认读取的点播日志目录（各日志分片）
+DEFAULT_PLAY_LOG_DIR = "data/raw/play_logs"
+
+# 需要取值的命令行选项，支持 "--period weekly" 与 "--period=weekly" 两种写法
+VALUE_OPTIONS = ("--period", "--as-of", "--charts", "--timezone")
+
+# --profile 的可选附加项：chrome 另存Chrome trace，memory 用tracemalloc记录峰值分配
+PROFILE_MODES = ("chrome", "memory")
 
 
 class MusicWhitepaperProject:
     """音乐白皮书项目主控制器"""
 
-    def __init__(self):
-        self.analyzer = MusicDataAnalyzer()
-        self.content_generator = ContentGenerator()
-        self.chart_generator = ChartGenerator()
+    def __init__(self, use_cache: bool = True, parallel_charts: bool = False):
+        self._analyzer = None
+        self._content_generator = None
+        self._chart_generator = None
         self.project_dir = os.path.dirname(os.path.abspath(__file__))
+        self.use_cache = use_cache
+        self.parallel_charts = parallel_charts
+        # 图表输出目标（--charts 选择，见 visualization.render_profiles）
+        self.chart_targets = DEFAULT_TARGETS
+        # 图表保留图形模板、之后只更新数据（常驻服务中启用）
+        self.reuse_figures = False
+        # 交互式仪表板引用的 plotly.js：cdn，或 local（--offline，复制到仪表板目录）
+        self.dashboard_plotly_js = "cdn"
+        # 分析结果JSON是否以紧凑格式写出（不缩进）
+        self.compact_json = False
+        # 阶段性能剖析器（--profile 启用），None表示不剖析
+        self.profiler = None
+        self.chrome_trace = False
+        # 周期报告（周报/月报/季报），None表示按全部数据生成季度白皮书
+        self.period: Optional[ReportPeriod] = None
+        # 点播时间戳按该时区划分小时、自然日与报告周期（--timezone 指定）
+        self.timezone = DEFAULT_TIMEZONE
+        self.cache = BuildCache()
+        # 常驻服务中跨任务复用的分析结果: 原始数据指纹 -> 分析报告
+        self._analysis_memo = {}
+        self._analysis_file = (None, None)  # (JSON与归档的修改时间及大小, 分析数据)
+
+    @property
+    def analyzer(self):
+        """数据分析器（首次访问时导入 pandas 等分析依赖）"""
+        if self._analyzer is None:
+            from analysis.data_analyzer import MusicDataAnalyzer
+
+            self._analyzer = self._instrument(MusicDataAnalyzer(), "analysis")
+        return self._analyzer
+
+    @property
+    def content_generator(self):
+        """文案生成器（首次访问时导入 jinja2 并编译模板）"""
+        if self._content_generator is None:
+            from content.content_generator import ContentGenerator
+
+            self._content_generator = self._instrument(ContentGenerator(), "content")
+        return self._content_generator
+
+    @property
+    def chart_generator(self):
+        """图表生成器（首次访问时导入 matplotlib 并配置字体）"""
+        if self._chart_generator is None:
+            from visualization.chart_generator import ChartGenerator
+
+            self._chart_generator = self._instrument(
+                ChartGenerator(reuse_figures=self.reuse_figures), "chart"
+            )
+        return self._chart_generator
+
+    def warm_up(self):
+        """预先加载全部依赖，供常驻服务在接收任务前完成导入"""
+        return self.analyzer, self.content_generator, self.chart_generator
+
+    def enable_profiling(
+        self, chrome_trace: bool = False, trace_allocations: bool = False
+    ):
+        """启用阶段剖析：为流水线各阶段及分析、文案、绘图组件的方法插桩"""
+        from profiler import STAGE_METHODS, StageProfiler, instrument
+
+        self.profiler = StageProfiler(trace_allocations)
+        self.chrome_trace = chrome_trace
+        self.profiler.start()
+        instrument(self, "stage", STAGE_METHODS)
+        for component, category in (
+            (self._analyzer, "analysis"),
+            (self._content_generator, "content"),
+            (self._chart_generator, "chart"),
+        ):
+            if component is not None:
+                instrument(component, category)
+
+    def _instrument(self, component, category: str):
+        """剖析启用时为新创建的组件插桩"""
+        if self.profiler is not None:
+            from profiler import instrument
+
+            instrument(component, category)
+        return component
+
+    def finish_profiling(self):
+        """停止剖析并保存结果（未启用时不做任何事）"""
+        if self.profiler is None:
+            return
+        profiler, self.profiler = self.profiler, None
+        profiler.stop()
+        paths = profiler.save(chrome=self.chrome_trace)
+
+        print("\n⏱️ 性能剖析（墙钟时间最长的步骤）:")
+        for name, total in list(profiler.summary().items())[:8]:
+            print(
+                "- {}: {:.1f}ms，CPU {:.1f}ms，{} 次".format(
+                    name, total["wall_ms"], total["cpu_ms"], total["count"]
+                )
+            )
+        print("✓ 剖析结果已保存: {}".format(", ".join(paths)))
+
+    def _stage(self, stage: str) -> str:
+        """缓存阶段名：周期报告的各阶段与完整流程分开缓存"""
+        if self.period is None:
+            return stage
+        return "{}@{}".format(stage, self.period.name)
+
+    def _lookup_cache(self, stage: str, fingerprint: str):
+        """查询阶段缓存，禁用缓存时总是未命中"""
+        if not self.use_cache:
+            self.cache.skip(self._stage(stage))
+            return None
+        return self.cache.lookup(self._stage(stage), fingerprint)
+
+    def _source_digest(self, module) -> str:
+        """阶段代码指纹：模块（或类所在模块）及其导入的全部项目模块的源码"""
+        return BuildCache.source_digest(inspect.getfile(module), self.project_dir)
+
+    def _store_cache(self, stage: str, fingerprint: str, outputs, files: List[str]):
+        """记录阶段指纹及其产物"""
+        self.cache.store(self._stage(stage), fingerprint, outputs, files)
 
     def setup_project_structure(self):
         """设置项目目录结构"""
@@ -49,15 +183,66 @@ class MusicWhitepaperProject:
         """处理原始数据"""
         print("📊 开始处理原始数据: {}".format(data_file))
 
-        # 加载数据
-        data = self.analyzer.load_billboard_data(data_file)
+        output_path = "analysis/comprehensive_analysis.json"
+        if self.period is not None:
+            output_path = "analysis/comprehensive_analysis_{}.json".format(
+                self.period.name
+            )
+        period_window = self.period.to_dict() if self.period else None
+        is_play_log = os.path.isdir(data_file) or data_file.lower().endswith(
+            PLAY_LOG_EXTENSIONS
+        )
+        if is_play_log:
+            from analysis.log_reader import expand_log_paths
+
+            # 点播日志可能远大于内存，按各分片的大小与修改时间计算指纹
+            fingerprint = BuildCache.fingerprint(
+                [
+                    BuildCache.file_signature(path)
+                    for path in expand_log_paths(data_file, PLAY_LOG_EXTENSIONS)
+                ],
+                self._source_digest(type(self.analyzer)),
+                period_window,
+                self.timezone,
+            )
+        else:
+            if self.period is not None:
+                print(
+                    "⚠️ Markdown榜单没有时间戳，{}按整份报告生成".format(
+                        PERIODS[self.period.kind]
+                    )
+                )
+            fingerprint = BuildCache.fingerprint(
+                BuildCache.file_bytes(data_file),
+                self._source_digest(type(self.analyzer)),
+                period_window,
+            )
+        if self._lookup_cache("process_raw_data", fingerprint) is not None:
+            if fingerprint not in self._analysis_memo:
+                from analysis.report_archive import load_analysis
+
+                self._analysis_memo[fingerprint] = load_analysis(output_path)
+            print("✓ 原始数据未变化，复用分析结果: {}".format(output_path))
+            return self._analysis_memo[fingerprint]
+
+        # 加载数据：Markdown榜单报告或终端点播日志
+        if is_play_log:
+            data = self.analyzer.load_play_logs(
+                data_file, period=self.period, timezone=self.timezone
+            )
+        else:
+            data = self.analyzer.load_billboard_data(data_file)
 
         # 生成分析报告
         analysis_report = self.analyzer.generate_comprehensive_report()
 
         # 保存分析结果
-        output_path = "analysis/comprehensive_analysis.json"
-        self.analyzer.save_analysis_results(output_path)
+        self.analyzer.save_analysis_results(
+            output_path, analysis_report, compact=self.compact_json
+        )
+        self._store_cache("process_raw_data", fingerprint, output_path, [output_path])
+        self.cache.save()
+        self._analysis_memo = {fingerprint: analysis_report}
 
         print("✓ 数据分析完成，结果保存到: {}".format(output_path))
         return analysis_report
@@ -66,42 +251,174 @@ class MusicWhitepaperProject:
         """生成各种报告"""
         print("📝 开始生成报告...")
 
-        # 生成完整白皮书
-        whitepaper = self.content_generator.generate_complete_whitepaper(analysis_data)
-        self.content_generator.save_report(
-            whitepaper, "reports/music_whitepaper_2025q2.md"
-        )
-        print("✓ 完整白皮书已生成")
-
-        # 生成执行摘要
-        executive_summary = self.content_generator.generate_executive_summary(
-            analysis_data
-        )
-        self.content_generator.save_report(
-            executive_summary, "reports/executive_summary.md"
-        )
-        print("✓ 执行摘要已生成")
-
-        # 生成营销文案
-        marketing_copy = self.content_generator.generate_marketing_copy()
-        self.content_generator.save_report(marketing_copy, "reports/marketing_copy.md")
-        print("✓ 营销文案已生成")
+        templates = self.content_generator.templates
+        detailed = analysis_data["detailed_analysis"]
+
+        # (名称, 输出路径, 说明, 生成函数, 指纹输入: 模板源码及所读取的分析数据；
+        #  另加生成器代码的源码指纹)
+        report_jobs = [
+            (
+                "whitepaper",
+                "reports/music_whitepaper_2025q2.md",
+                "完整白皮书",
+                lambda: self.content_generator.generate_complete_whitepaper(
+                    analysis_data
+                ),
+                (
+                    templates,
+                    analysis_data["executive_summary"],
+                    detailed,
+                    analysis_data["business_recommendations"],
+                    analysis_data["predictions"],
+                ),
+            ),
+            (
+                "executive_summary",
+                "reports/executive_summary.md",
+                "执行摘要",
+                lambda: self.content_generator.generate_executive_summary(
+                    analysis_data
+                ),
+                (templates["executive_summary"], analysis_data["executive_summary"]),
+            ),
+            (
+                "marketing_copy",
+                "reports/marketing_copy.md",
+                "营销文案",
+                self.content_generator.generate_marketing_copy,
+                (templates["marketing_copy"],),
+            ),
+            (
+                "technical_specs",
+                "reports/technical_specs.md",
+                "技术规格文档",
+                self.content_generator.generate_technical_specs,
+                (templates["technical_specs"],),
+            ),
+        ]
 
-        # 生成技术规格文档
-        technical_specs = self.content_generator.generate_technical_specs()
-        self.content_generator.save_report(
-            technical_specs, "reports/technical_specs.md"
-        )
-        print("✓ 技术规格文档已生成")
+        if self.period is not None:
+            # 周期报告只生成基于该周期数据的白皮书，营销文案等与数据无关的文档不重复生成
+            _, _, _, render, inputs = report_jobs[0]
+            report_jobs = [
+                (
+                    self.period.kind,
+                    "reports/{}_report_{}.md".format(self.period.kind, self.period.tag),
+                    "{}（{}）".format(PERIODS[self.period.kind], self.period.label),
+                    render,
+                    inputs,
+                )
+            ]
+
+        content_source = self._source_digest(type(self.content_generator))
+        for name, output_path, label, render, inputs in report_jobs:
+            stage = "report:{}".format(name)
+            fingerprint = BuildCache.fingerprint(content_source, *inputs)
+            if self._lookup_cache(stage, fingerprint) is not None:
+                print("✓ {}未变化，跳过生成".format(label))
+                continue
+
+            self.content_generator.save_report(render(), output_path)
+            self._store_cache(stage, fingerprint, output_path, [output_path])
+            self.cache.save()
+            print("✓ {}已生成".format(label))
 
     def generate_visualizations(self, analysis_data: Dict):
         """生成可视化图表"""
         print("📈 开始生成可视化图表...")
 
-        chart_paths = self.chart_generator.generate_all_charts(analysis_data)
+        # 周期图表单独输出到子目录，不覆盖完整白皮书的图表
+        chart_dir = "visualization/charts"
+        if self.period is not None:
+            chart_dir = os.path.join(chart_dir, self.period.name)
+        os.makedirs(chart_dir, exist_ok=True)
+        self.chart_generator.output_dir = chart_dir
+        self.chart_generator.use_targets(self.chart_targets)
+        self.chart_generator.plotly_js = self.dashboard_plotly_js
+
+        chart_source = self._source_digest(type(self.chart_generator))
+        chart_params = {
+            "dpi": self.chart_generator.dpi,
+            "output_dir": self.chart_generator.output_dir,
+            "targets": [
+                profile.describe() for profile in self.chart_generator.profiles
+            ],
+        }
+        # 仪表板在浏览器中绘制，只取决于内嵌的数据、页面标题区与页面模板
+        from visualization import dashboard
+
+        dashboard_source = self._source_digest(dashboard)
+
+        chart_paths = {}
+        fingerprints = {}
+        for name, (_, chart_data) in self.chart_generator.chart_specs(
+            analysis_data
+        ).items():
+            if name == "dashboard":
+                fingerprints[name] = BuildCache.fingerprint(
+                    name,
+                    dashboard.dashboard_header(analysis_data),
+                    dashboard.dashboard_payload(
+                        analysis_data,
+                        self.chart_generator.regional_engine,
+                        self.chart_generator.chart_inputs(analysis_data),
+                    ),
+                    chart_params["output_dir"],
+                    self.dashboard_plotly_js,
+                    dashboard_source,
+                )
+            else:
+                fingerprints[name] = BuildCache.fingerprint(
+                    name, chart_data, chart_params, chart_source
+                )
+            chart_paths[name] = self._lookup_cache(
+                "chart:{}".format(name), fingerprints[name]
+            )
+
+        stale = [name for name, path in chart_paths.items() if path is None]
+        rendered = self.chart_generator.generate_all_charts(
+            analysis_data, only=stale, parallel=self.parallel_charts
+        )
+        for name, path in rendered.items():
+            self._store_cache(
+                "chart:{}".format(name),
+                fingerprints[name],
+                path,
+                self.chart_generator.output_files(path),
+            )
+            chart_paths[name] = path
+        self.cache.save()
 
         for chart_name, path in chart_paths.items():
-            print("✓ {} 图表已生成: {}".format(chart_name, path))
+            if chart_name in rendered:
+                print("✓ {} 图表已生成: {}".format(chart_name, path))
+            else:
+                print("✓ {} 图表未变化，复用: {}".format(chart_name, path))
+
+    def generate_dashboard(self):
+        """只重新生成交互式仪表板（不导入绘图库、不渲染图片）"""
+        from visualization.dashboard import write_dashboard
+
+        analysis_path = "analysis/comprehensive_analysis.json"
+        chart_dir = "visualization/charts"
+        if self.period is not None:
+            analysis_path = "analysis/comprehensive_analysis_{}.json".format(
+                self.period.name
+            )
+            chart_dir = os.path.join(chart_dir, self.period.name)
+
+        try:
+            analysis_data = self.load_analysis_data(analysis_path)
+        except FileNotFoundError:
+            print("❌ 分析数据文件不存在，请先运行完整流程")
+            return
+
+        output_path = write_dashboard(
+            analysis_data,
+            os.path.join(chart_dir, "dashboard.html"),
+            plotly_js=self.dashboard_plotly_js,
+        )
+        print("✓ 交互式仪表板已生成: {}".format(output_path))
 
     def create_project_summary(self):
         """创建项目总结"""
@@ -151,9 +468,14 @@ class MusicWhitepaperProject:
         # 设置项目结构
         self.setup_project_structure()
 
-        # 确定数据文件路径
+        # 确定数据文件路径：周期报告优先使用带时间戳的点播日志
         if data_file is None:
             data_file = "data/raw/billboard_report_2025q2.md"
+            if self.period is not None and os.path.isdir(DEFAULT_PLAY_LOG_DIR):
+                data_file = DEFAULT_PLAY_LOG_DIR
+
+        if self.period is not None:
+            print("🗓️ {}: {}".format(PERIODS[self.period.kind], self.period.label))
 
         # 检查数据文件是否存在
         if not os.path.exists(data_file):
@@ -170,10 +492,32 @@ class MusicWhitepaperProject:
         self.generate_visualizations(analysis_data)
 
         # 创建项目总结
-        self.create_project_summary()
+        if self.period is None:
+            self.create_project_summary()
+
+        # 汇报构建缓存命中情况
+        cache_summary = self.cache.summary()
+        print(
+            "\n♻️ 构建缓存: 命中 {} 个阶段，重新生成 {} 个阶段".format(
+                len(cache_summary["hits"]), len(cache_summary["misses"])
+            )
+        )
+        if cache_summary["hits"]:
+            print("- 命中: {}".format(", ".join(cache_summary["hits"])))
+        if cache_summary["misses"]:
+            print("- 未命中: {}".format(", ".join(cache_summary["misses"])))
 
         print("\n🎉 项目处理完成！")
         print("\n生成的文件:")
+        if self.period is not None:
+            print(
+                "- reports/{}_report_{}.md ({})".format(
+                    self.period.kind, self.period.tag, PERIODS[self.period.kind]
+                )
+            )
+            print("- analysis/comprehensive_analysis_{}.json".format(self.period.name))
+            print("- visualization/charts/{}/ (可视化图表)".format(self.period.name))
+            return
         print("- reports/music_whitepaper_2025q2.md (完整白皮书)")
         print("- reports/executive_summary.md (执行摘要)")
         print("- reports/marketing_copy.md (营销文案)")
@@ -181,15 +525,38 @@ class MusicWhitepaperProject:
         print("- visualization/charts/ (可视化图表)")
         print("- docs/project_summary.md (项目总结)")
 
+    def load_analysis_data(
+        self, path: str = "analysis/comprehensive_analysis.json"
+    ) -> Dict:
+        """读取分析数据：结果较大时内存映射二进制归档；文件未修改时复用已加载的结果"""
+        stats = []
+        for candidate in (path, companion_path(path)):
+            try:
+                stat = os.stat(candidate)
+                stats.append((stat.st_mtime_ns, stat.st_size))
+            except FileNotFoundError:
+                stats.append(None)
+        if not any(stats):
+            raise FileNotFoundError(path)
+        if self._analysis_file[0] != stats:
+            if stats[0] is not None and stats[0][1] < ARCHIVE_MIN_BYTES:
+                # 较小的结果直接解析JSON，短命令无需导入NumPy
+                with open(path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+            else:
+                from analysis.report_archive import load_analysis
+
+                data = load_analysis(path)
+            self._analysis_file = (stats, data)
+        return self._analysis_file[1]
+
     def generate_custom_report(self, report_type: str, analysis_data: Dict = None):
         """生成定制化报告"""
-        if analysis_data is None:
+        # 营销文案与技术规格不依赖分析数据
+        if analysis_data is None and report_type in ("whitepaper", "executive"):
             # 加载分析数据
             try:
-                with open(
-                    "analysis/comprehensive_analysis.json", "r", encoding="utf-8"
-                ) as f:
-                    analysis_data = json.load(f)
+                analysis_data = self.load_analysis_data()
             except FileNotFoundError:
                 print("❌ 分析数据文件不存在，请先运行完整流程")
                 return
@@ -215,44 +582,245 @@ class MusicWhitepaperProject:
         self.content_generator.save_report(content, output_path)
         print("✓ 定制化报告已生成: {}".format(output_path))
 
+    def generate_partner_reports(self, partners_file: str):
+        """批量生成合作方定制白皮书"""
+        try:
+            analysis_data = self.load_analysis_data()
+        except FileNotFoundError:
+            print("❌ 分析数据文件不存在，请先运行完整流程")
+            return
+
+        with open(partners_file, "r", encoding="utf-8") as f:
+            partners = json.load(f)
+
+        print("📋 批量生成合作方白皮书: {} 份".format(len(partners)))
+        try:
+            documents = self.content_generator.generate_partner_whitepapers(
+                analysis_data, partners
+            )
+        except ValueError as e:
+            print("❌ {}".format(e))
+            return
+
+        for document in documents:
+            print(
+                "✓ {}: {} (定制章节 {} 个，渲染 {:.1f}ms，写入 {:.1f}ms)".format(
+                    document["partner"],
+                    document["output_path"],
+                    len(document["custom_sections"]),
+                    document["render_seconds"] * 1000,
+                    document["write_seconds"] * 1000,
+                )
+            )
+
+    def update_rising_songs(
+        self, events_file: str, state_file: str = ".cache/rising_detector.npz"
+    ):
+        """用新到达的点播增量刷新黑马榜（供每小时定时任务调用）"""
+        from analysis.log_reader import iter_log_chunks
+        from analysis.play_logs import PLAY_LOG_COLUMNS
+        from analysis.processed_store import ProcessedDataStore
+        from analysis.rising_detector import RisingSongDetector
+
+        if os.path.exists(state_file):
+            self.analyzer.rising_detector = RisingSongDetector.load(state_file)
+
+        print("📈 增量更新黑马榜: {}".format(events_file))
+        rising_songs = []
+        for chunk in iter_log_chunks(events_file, PLAY_LOG_COLUMNS):
+            rising_songs = self.analyzer.update_rising_songs(
+                chunk, timezone=self.timezone
+            )
+
+        if self.analyzer.rising_detector is None:
+            print("❌ 没有读取到点播记录")
+            return
+        self.analyzer.rising_detector.save(state_file)
+
+        # 每次更新在当周分区追加一份按小时标记的黑马榜快照
+        head_time = self.analyzer.rising_detector.head_time
+        entry = ProcessedDataStore().append(
+            "rising_songs",
+            rising_songs,
+            head_time.date(),
+            period="hourly_{:%Y%m%d%H}".format(head_time),
+        )
+
+        for song in rising_songs:
+            print(
+                "  {}. {} {}".format(song["rank"], song["title"], song["growth_rate"])
+            )
+        if entry is None:
+            print("✓ 黑马榜已更新: 暂无上榜歌曲")
+        else:
+            print("✓ 黑马榜已更新: data/processed/{}".format(entry["path"]))
+
+
+def parse_arguments(argv: List[str]) -> Tuple[List[str], Dict[str, Optional[str]]]:
+    """拆分命令行参数为 (位置参数, 选项)，开关选项的值为None"""
+    # --no-cache 强制重新生成所有阶段，--parallel 多进程绘制图表，
+    # --compact-json 以紧凑格式写出分析结果JSON，
+    # --charts standard,web,print,... 选择图表输出目标，
+    # --offline 仪表板使用复制到本地的 plotly.js，
+    # --profile[=chrome,memory] 记录各阶段耗时与内存，
+    # --period weekly|monthly|quarterly 生成周期报告，--as-of 指定周期的参考日期，
+    # --timezone 点播时间戳的时区（默认 Asia/Shanghai）
+    args = []
+    options = {}
+    tokens = iter(argv)
+    for arg in tokens:
+        if not arg.startswith("--"):
+            args.append(arg)
+            continue
+        name, has_value, value = arg.partition("=")
+        if name in VALUE_OPTIONS and not has_value:
+            value = next(tokens, None)
+        options[name] = value if name in VALUE_OPTIONS or has_value else None
+    return args, options
+
+
+def apply_options(project: MusicWhitepaperProject, options: Dict[str, Optional[str]]):
+    """将命令行选项应用到项目，周期参数无效时抛出ValueError"""
+    project.use_cache = "--no-cache" not in options
+    project.parallel_charts = "--parallel" in options
+    project.compact_json = "--compact-json" in options
+    project.dashboard_plotly_js = "local" if "--offline" in options else "cdn"
+    project.chart_targets = (
+        parse_targets(options["--charts"])
+        if options.get("--charts")
+        else DEFAULT_TARGETS
+    )
+    project.timezone = options.get("--timezone") or DEFAULT_TIMEZONE
+    get_timezone(project.timezone)  # 未知时区抛出ValueError
+    project.period = (
+        ReportPeriod.parse(
+            options["--period"], options.get("--as-of"), project.timezone
+        )
+        if options.get("--period")
+        else None
+    )
+    # 剖析最后启用，选项无效时不会留下已启动的剖析器
+    if "--profile" in options:
+        modes = set(filter(None, (options["--profile"] or "").split(",")))
+        if not modes <= set(PROFILE_MODES):
+            raise ValueError(
+                "不支持的剖析选项: {}（可选 {}）".format(
+                    ", ".join(sorted(modes - set(PROFILE_MODES))),
+                    ", ".join(PROFILE_MODES),
+                )
+            )
+        project.enable_profiling(
+            chrome_trace="chrome" in modes, trace_allocations="memory" in modes
+        )
 
-def main():
-    """主函数"""
-    project = MusicWhitepaperProject()
 
-    # 检查命令行参数
-    if len(sys.argv) > 1:
-        command = sys.argv[1]
+def run_command(project: MusicWhitepaperProject, args: List[str]):
+    """执行一条命令（命令行与常驻报告服务共用）"""
+    try:
+        _dispatch_command(project, args)
+    finally:
+        # 保存本条命令的性能剖析结果（未启用剖析时不做任何事）
+        project.finish_profiling()
+
+
+def _dispatch_command(project: MusicWhitepaperProject, args: List[str]):
+    if len(args) > 0:
+        command = args[0]
 
         if command == "run":
             # 运行完整流程
-            data_file = sys.argv[2] if len(sys.argv) > 2 else None
+            data_file = args[1] if len(args) > 1 else None
             project.run_complete_pipeline(data_file)
 
         elif command == "report":
             # 生成定制化报告
-            if len(sys.argv) > 2:
-                report_type = sys.argv[2]
+            if len(args) > 1:
+                report_type = args[1]
                 project.generate_custom_report(report_type)
             else:
                 print("请指定报告类型: whitepaper, executive, marketing, technical")
 
+        elif command == "partners":
+            # 批量生成合作方定制白皮书
+            if len(args) > 1:
+                project.generate_partner_reports(args[1])
+            else:
+                print("请指定合作方配置文件（JSON列表）")
+
+        elif command == "rising":
+            # 增量更新黑马榜
+            if len(args) > 1:
+                project.update_rising_songs(args[1])
+            else:
+                print("请指定新增点播日志文件")
+
+        elif command == "dashboard":
+            # 只重新生成交互式仪表板
+            project.generate_dashboard()
+
         elif command == "help":
-            print(
-                """
+            print("""
 音乐行业白皮书项目使用说明:
 
 1. 运行完整流程:
-   python main.py run [数据文件路径]
+   python main.py run [数据文件路径] [--no-cache] [--parallel] [--compact-json]
+   数据文件为Billboard报告(.md)或终端点播日志(.csv/.jsonl/.parquet)
+   传入日志目录时，目录下的各日志分片在多个进程中并行聚合
+   未变化的阶段会复用上次的产物，--no-cache 强制全部重新生成
+   --parallel 在多个进程中并行绘制图表
+   --compact-json 分析结果JSON不缩进（体积更小、写出更快）
+   --timezone 时区 点播时间戳按该时区统计小时、自然日与报告周期（默认 Asia/Shanghai）
+   --charts 目标[,目标...] 图表输出目标，每个目标只生成自己需要的文件:
+     standard     300dpi PNG（默认），输出到 visualization/charts/
+     draft        72dpi PNG预览，不裁剪空白边
+     web          WebP大图与缩略图，网页先加载缩略图
+     print        印刷版白皮书用的矢量PDF
+     presentation 演示文稿用的矢量SVG
+     除 standard 外输出到图表目录下的同名子目录
+   交互式仪表板 visualization/charts/dashboard.html 内嵌分析数据，
+   由 plotly.js 在浏览器中绘制，各板块滚动到可视区域时才加载
+
+   性能剖析（任意命令均可使用）:
+   python main.py run [数据文件路径] --profile[=chrome,memory]
+   记录各阶段及解析、分析、章节生成、图表绘制各步骤的墙钟时间、CPU时间、
+   峰值RSS与净增内存块数，保存到 profiles/
+   chrome 另存Chrome trace（*.trace.json，可在 chrome://tracing 或 Perfetto 打开）
+   memory 用 tracemalloc 记录各步骤的峰值分配（明显拖慢分配密集的步骤）
+   --parallel 时在子进程中绘制的图表记录子进程测得的墙钟与CPU时间（不含内存统计）
+
+   生成周期报告（周报/月报/季报）:
+   python main.py [run 数据文件路径] --period weekly|monthly|quarterly [--as-of 日期]
+   只读取 --as-of（默认今天）之前最近一个完整自然周/月/季度的点播，
+   以及此前28天用于计算增长率；默认数据为 data/raw/play_logs 目录
+   输出 reports/weekly_report_YYYYMMDD_YYYYMMDD.md 等周期报告
 
 2. 生成定制化报告:
    python main.py report [报告类型]
    报告类型: whitepaper, executive, marketing, technical
 
-3. 查看帮助:
+3. 批量生成合作方定制白皮书:
+   python main.py partners [合作方配置文件]
+   配置为JSON列表: [{"name": "合作方", "overrides": {覆盖的分析数据}}]
+
+4. 增量更新黑马榜:
+   python main.py rising [新增点播日志文件]
+   只读取新到达的点播，滚动窗口状态保存在 .cache/rising_detector.npz
+
+5. 启动常驻报告服务:
+   python main.py serve
+   保持模块、分析数据、模板与图表图形常驻内存（图表只更新数据），调度器通过本地套接字提交任务
+   python report_service.py stats 查看任务耗时统计
+   连接密钥首次启动时随机生成于 .cache/report_service.key，
+   跨机器提交（WHITEPAPER_SERVICE_ADDRESS=host:port）时两端需设置相同的 WHITEPAPER_SERVICE_KEY
+
+6. 只重新生成交互式仪表板:
+   python main.py dashboard [--period weekly|monthly|quarterly] [--offline]
+   读取已有的分析结果，不绘制图片；--offline 将 plotly.min.js 复制到
+   仪表板目录（需安装 plotly），无网络时也能打开
+
+7. 查看帮助:
    python main.py help
-            """
-            )
+            """)
 
         else:
             print("未知命令: {}".format(command))
@@ -263,5 +831,25 @@ def main():
         project.run_complete_pipeline()
 
 
+def main():
+    """主函数"""
+    args, options = parse_arguments(sys.argv[1:])
+
+    if args and args[0] == "serve":
+        # 常驻报告服务，调度器通过本地套接字提交任务
+        from report_service import serve
+
+        serve()
+        return
+
+    project = MusicWhitepaperProject()
+    try:
+        apply_options(project, options)
+    except ValueError as e:
+        print("❌ {}".format(e))
+        sys.exit(1)
+    run_command(project, args)
+
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+流水线阶段性能剖析
+记录各阶段及子步骤的墙钟时间、CPU时间、峰值RSS与内存分配，
+输出结构化JSON，可选Chrome trace格式（chrome://tracing 或 Perfetto 打开）
+"""
+
+import functools
+import json
+import os
+import re
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+from typing import Dict, List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows 没有 resource 模块，不记录峰值RSS
+    resource = None
+
+# 自动记录的方法：解析、加载、分析、生成章节/报告、保存结果与绘制图表
+# 逐行调用的 _parse_*_row 回调不插桩（每行一个区间的开销会淹没被测步骤）
+INSTRUMENTED_METHODS = re.compile(
+    r"^(?!\w+_row$)"
+    r"(_parse_\w+|load_\w+|analyze_\w+|generate_\w+|save_\w+|create_\w+)$"
+)
+
+# 主控制器的流水线阶段（MusicWhitepaperProject）
+STAGE_METHODS = re.compile(
+    r"^(run_\w+|process_\w+|update_\w+|load_\w+|generate_\w+|create_\w+)$"
+)
+
+# 当前启用的剖析器，None表示未启用（已插桩的方法直接调用原函数）
+_active = None
+
+
+def _peak_rss_mb() -> Optional[float]:
+    """进程迄今的峰值RSS（MB）"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 以KB为单位，macOS 以字节为单位
+    return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+class StageProfiler:
+    """阶段剖析器
+
+    每个区间记录墙钟与CPU时间（线程CPU时间）、结束时的进程峰值RSS及区间内的增长、
+    区间内净增的内存块数；trace_allocations为True时另用tracemalloc记录区间内
+    Python堆（含NumPy数组）的峰值分配，嵌套区间的峰值计入所有外层区间。
+    tracemalloc 会使分配密集的步骤慢一个数量级，因此默认关闭。
+    """
+
+    def __init__(self, trace_allocations: bool = False):
+        self.trace_allocations = trace_allocations
+        self.started_at = datetime.now()
+        self.origin = time.perf_counter()
+        self.origin_epoch = time.time()
+        self.spans = []
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def start(self):
+        """启用剖析器，已插桩的方法开始记录"""
+        global _active
+        if self.trace_allocations and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        _active = self
+
+    def stop(self):
+        global _active
+        if _active is self:
+            _active = None
+        if self.trace_allocations and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    def _stack(self) -> List[Dict]:
+        if not hasattr(self._local, "stack"):
+            self._local.stack = []
+        return self._local.stack
+
+    @contextmanager
+    def span(self, name: str, category: str = "step"):
+        """记录一个区间"""
+        stack = self._stack()
+        tracing = self.trace_allocations and tracemalloc.is_tracing()
+        if tracing:
+            # 先将当前峰值计入外层区间，再重置峰值从本区间开始统计
+            peak = tracemalloc.get_traced_memory()[1]
+            for outer in stack:
+                outer["_alloc_peak"] = max(outer["_alloc_peak"], peak)
+            tracemalloc.reset_peak()
+        record = {
+            "name": name,
+            "category": category,
+            "depth": len(stack),
+            "parent": stack[-1]["name"] if stack else None,
+            "thread": threading.current_thread().name,
+            "_alloc_peak": 0,
+            "_alloc_base": tracemalloc.get_traced_memory()[0] if tracing else 0,
+            "_blocks": sys.getallocatedblocks(),
+            "_rss": _peak_rss_mb(),
+            "_cpu": time.thread_time(),
+            "_start": time.perf_counter(),
+        }
+        stack.append(record)
+        try:
+            yield record
+        finally:
+            end = time.perf_counter()
+            stack.pop()
+            peak_rss = _peak_rss_mb()
+            if tracing and tracemalloc.is_tracing():
+                peak = max(record["_alloc_peak"], tracemalloc.get_traced_memory()[1])
+                for outer in stack:
+                    outer["_alloc_peak"] = max(outer["_alloc_peak"], peak)
+                alloc_peak_mb = round((peak - record["_alloc_base"]) / 1e6, 3)
+            else:
+                alloc_peak_mb = None
+            span = {
+                "name": name,
+                "category": category,
+                "depth": record["depth"],
+                "parent": record["parent"],
+                "thread": record["thread"],
+                "start_ms": round((record["_start"] - self.origin) * 1000, 3),
+                "wall_ms": round((end - record["_start"]) * 1000, 3),
+                "cpu_ms": round((time.thread_time() - record["_cpu"]) * 1000, 3),
+                "peak_rss_mb": round(peak_rss, 1) if peak_rss is not None else None,
+                "rss_growth_mb": (
+                    round(peak_rss - record["_rss"], 1)
+                    if peak_rss is not None
+                    else None
+                ),
+                "alloc_peak_mb": alloc_peak_mb,
+                "allocated_blocks": sys.getallocatedblocks() - record["_blocks"],
+            }
+            with self._lock:
+                self.spans.append(span)
+
+    def add_span(
+        self,
+        name: str,
+        category: str,
+        started_at: float,
+        wall_ms: float,
+        cpu_ms: float,
+        thread: str,
+    ):
+        """记录在其他进程中测得的区间（started_at为time.time()时间戳）
+
+        子进程的内存不计入本进程，内存相关字段为None
+        """
+        stack = self._stack()
+        with self._lock:
+            self.spans.append(
+                {
+                    "name": name,
+                    "category": category,
+                    "depth": len(stack),
+                    "parent": stack[-1]["name"] if stack else None,
+                    "thread": thread,
+                    "start_ms": round((started_at - self.origin_epoch) * 1000, 3),
+                    "wall_ms": round(wall_ms, 3),
+                    "cpu_ms": round(cpu_ms, 3),
+                    "peak_rss_mb": None,
+                    "rss_growth_mb": None,
+                    "alloc_peak_mb": None,
+                    "allocated_blocks": None,
+                }
+            )
+
+    def summary(self) -> Dict[str, Dict]:
+        """按名称汇总调用次数与耗时，按墙钟时间从高到低排列"""
+        totals = {}
+        for span in self.spans:
+            total = totals.setdefault(
+                span["name"],
+                {
+                    "category": span["category"],
+                    "count": 0,
+                    "wall_ms": 0.0,
+                    "cpu_ms": 0.0,
+                    "alloc_peak_mb": None,
+                },
+            )
+            total["count"] += 1
+            total["wall_ms"] += span["wall_ms"]
+            total["cpu_ms"] += span["cpu_ms"]
+            if span["alloc_peak_mb"] is not None:
+                total["alloc_peak_mb"] = max(
+                    total["alloc_peak_mb"] or 0, span["alloc_peak_mb"]
+                )
+        for total in totals.values():
+            total["wall_ms"] = round(total["wall_ms"], 3)
+            total["cpu_ms"] = round(total["cpu_ms"], 3)
+        return dict(
+            sorted(totals.items(), key=lambda item: item[1]["wall_ms"], reverse=True)
+        )
+
+    def to_dict(self) -> Dict:
+        spans = sorted(self.spans, key=lambda span: span["start_ms"])
+        peak_rss = _peak_rss_mb()
+        return {
+            "started_at": self.started_at.isoformat(timespec="seconds"),
+            "argv": sys.argv[1:],
+            "python": sys.version.split()[0],
+            "trace_allocations": self.trace_allocations,
+            "total_ms": round((time.perf_counter() - self.origin) * 1000, 3),
+            "peak_rss_mb": round(peak_rss, 1) if peak_rss is not None else None,
+            "summary": self.summary(),
+            "spans": spans,
+        }
+
+    def chrome_trace(self) -> Dict:
+        """Chrome trace 事件格式（完整事件 ph=X，时间单位为微秒）"""
+        threads = {}
+        events = []
+        for span in self.spans:
+            tid = threads.setdefault(span["thread"], len(threads) + 1)
+            events.append(
+                {
+                    "name": span["name"],
+                    "cat": span["category"],
+                    "ph": "X",
+                    "ts": round(span["start_ms"] * 1000, 1),
+                    "dur": round(span["wall_ms"] * 1000, 1),
+                    "pid": os.getpid(),
+                    "tid": tid,
+                    "args": {
+                        key: span[key]
+                        for key in (
+                            "cpu_ms",
+                            "peak_rss_mb",
+                            "rss_growth_mb",
+                            "alloc_peak_mb",
+                            "allocated_blocks",
+                        )
+                    },
+                }
+            )
+        for name, tid in threads.items():
+            events.append(
+                {
+                    "name": "thread_name",
+                    "ph": "M",
+                    "pid": os.getpid(),
+                    "tid": tid,
+                    "args": {"name": name},
+                }
+            )
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def save(self, output_dir: str = "profiles", chrome: bool = False) -> List[str]:
+        """保存剖析结果，返回写出的文件路径"""
+        os.makedirs(output_dir, exist_ok=True)
+        base = os.path.join(
+            output_dir, "profile_{:%Y%m%d_%H%M%S}".format(self.started_at)
+        )
+        # 常驻服务同一秒内的多个任务依次加序号，不互相覆盖
+        stem, sequence = base, 1
+        while os.path.exists(stem + ".json"):
+            stem, sequence = "{}_{}".format(base, sequence), sequence + 1
+        outputs = [(stem + ".json", self.to_dict())]
+        if chrome:
+            outputs.append((stem + ".trace.json", self.chrome_trace()))
+        for path, data in outputs:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+        return [path for path, _ in outputs]
+
+
+def span(name: str, category: str = "stage"):
+    """在启用的剖析器中记录区间，未启用时不做任何事"""
+    return _active.span(name, category) if _active is not None else nullcontext()
+
+
+def record_span(
+    name: str,
+    category: str,
+    started_at: float,
+    wall_ms: float,
+    cpu_ms: float,
+    thread: str,
+):
+    """在启用的剖析器中记录其他进程测得的区间，未启用时不做任何事"""
+    if _active is not None:
+        _active.add_span(name, category, started_at, wall_ms, cpu_ms, thread)
+
+
+def _profiled(method, name: str, category: str):
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        if _active is None:
+            return method(*args, **kwargs)
+        with _active.span(name, category):
+            return method(*args, **kwargs)
+
+    return wrapper
+
+
+def instrument(obj, category: str, pattern: re.Pattern = INSTRUMENTED_METHODS):
+    """为对象名称匹配pattern的方法插桩（只作用于该实例，重复调用无副作用）"""
+    if getattr(obj, "_profiler_instrumented", False):
+        return obj
+    for name in dir(type(obj)):
+        if not pattern.match(name) or isinstance(getattr(type(obj), name), property):
+            continue
+        method = getattr(obj, name)
+        if callable(method):
+            qualified = "{}.{}".format(type(obj).__name__, name)
+            setattr(obj, name, _profiled(method, qualified, category))
+    obj._profiler_instrumented = True
+    return obj
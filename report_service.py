@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+白皮书常驻报告服务
+在常驻进程中保持已导入的模块、已解析的分析数据与编译好的模板，
+调度器通过本地套接字提交任务，省去每次任务的解释器启动、依赖导入与数据解析
+"""
+
+import contextlib
+import importlib
+import io
+import json
+import os
+import secrets
+import socket
+import sys
+import time
+import traceback
+from collections import deque
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client, Listener
+from typing import Dict, List
+
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_SOCKET = os.path.join(PROJECT_DIR, ".cache", "report_service.sock")
+DEFAULT_TCP_ADDRESS = ("127.0.0.1", 8765)
+# 服务首次启动时生成的随机密钥，只有项目目录的所有者可读
+DEFAULT_KEY_FILE = os.path.join(PROJECT_DIR, ".cache", "report_service.key")
+
+
+def service_address():
+    """服务地址：默认使用项目 .cache 下的Unix套接字，不支持时使用本机TCP端口
+
+    可通过环境变量 WHITEPAPER_SERVICE_ADDRESS 指定套接字路径或 "host:port"。
+    """
+    address = os.environ.get("WHITEPAPER_SERVICE_ADDRESS")
+    if address:
+        host, _, port = address.rpartition(":")
+        return (host, int(port)) if port.isdigit() else address
+    return DEFAULT_SOCKET if hasattr(socket, "AF_UNIX") else DEFAULT_TCP_ADDRESS
+
+
+def service_authkey(create: bool = False) -> bytes:
+    """连接认证密钥：环境变量 WHITEPAPER_SERVICE_KEY，否则读取 .cache 下的密钥文件
+
+    不内置默认密钥；create为True（服务端）且密钥文件不存在时生成随机密钥，
+    同一台机器上的客户端读取该文件，其他机器上的客户端需设置环境变量。
+    """
+    key = os.environ.get("WHITEPAPER_SERVICE_KEY")
+    if key:
+        return key.encode("utf-8")
+    if not os.path.exists(DEFAULT_KEY_FILE):
+        if not create:
+            raise RuntimeError(
+                "未找到服务密钥 {}，请先启动服务或设置 WHITEPAPER_SERVICE_KEY".format(
+                    DEFAULT_KEY_FILE
+                )
+            )
+        os.makedirs(os.path.dirname(DEFAULT_KEY_FILE), exist_ok=True)
+        # O_EXCL: 多个服务同时启动时只有一个写入密钥
+        with contextlib.suppress(FileExistsError):
+            fd = os.open(DEFAULT_KEY_FILE, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+            with os.fdopen(fd, "w") as f:
+                f.write(secrets.token_hex(32))
+    with open(DEFAULT_KEY_FILE, encoding="utf-8") as f:
+        return f.read().strip().encode("utf-8")
+
+
+class LatencyStats:
+    """按命令统计任务耗时，只保留最近 window 次记录"""
+
+    def __init__(self, window: int = 1000):
+        self.window = window
+        self.durations = {}
+        self.counts = {}
+        self.errors = {}
+
+    def record(self, command: str, seconds: float, ok: bool):
+        self.durations.setdefault(command, deque(maxlen=self.window)).append(seconds)
+        self.counts[command] = self.counts.get(command, 0) + 1
+        if not ok:
+            self.errors[command] = self.errors.get(command, 0) + 1
+
+    @staticmethod
+    def _percentile(ordered: List[float], fraction: float) -> float:
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+    def summary(self) -> Dict[str, Dict]:
+        """各命令的次数、失败数与耗时分位数（毫秒）"""
+        summary = {}
+        for command, durations in self.durations.items():
+            ordered = sorted(durations)
+            summary[command] = {
+                "count": self.counts[command],
+                "errors": self.errors.get(command, 0),
+                "last_ms": round(durations[-1] * 1000, 2),
+                "mean_ms": round(sum(ordered) / len(ordered) * 1000, 2),
+                "p50_ms": round(self._percentile(ordered, 0.5) * 1000, 2),
+                "p95_ms": round(self._percentile(ordered, 0.95) * 1000, 2),
+            }
+        return summary
+
+
+class ReportService:
+    """常驻报告服务：任务按到达顺序在同一个预热好的项目实例上串行执行"""
+
+    def __init__(self, address: tuple = None, authkey: bytes = None):
+        started = time.perf_counter()
+        self.address = address or service_address()
+        self.authkey = authkey or service_authkey(create=True)
+        # 在服务进程中一次性导入主程序及其依赖（pandas/matplotlib/jinja2等）
+        self.cli = importlib.import_module("main")
+        self.project = self.cli.MusicWhitepaperProject()
+        # 图表图形在服务进程中常驻，后续任务只更新数据
+        self.project.reuse_figures = True
+        self.project.warm_up()
+        self.latency = LatencyStats()
+        self.started_at = time.time()
+        self.startup_seconds = time.perf_counter() - started
+        self.running = False
+
+    def handle(self, job: Dict) -> Dict:
+        """执行一个任务，job为 {"argv": [与 main.py 相同的命令行参数]}"""
+        argv = list(job.get("argv", []))
+        args, options = self.cli.parse_arguments(argv)
+        command = args[0] if args else "run"
+
+        if command == "stats":
+            return {"status": "ok", "stats": self.stats()}
+        if command == "shutdown":
+            self.running = False
+            return {"status": "ok", "output": "服务已停止"}
+
+        output = io.StringIO()
+        started = time.perf_counter()
+        status = "ok"
+        with contextlib.redirect_stdout(output):
+            try:
+                self.cli.apply_options(self.project, options)
+                self.cli.run_command(self.project, args)
+            except Exception:
+                status = "error"
+                traceback.print_exc(file=output)
+        duration = time.perf_counter() - started
+
+        self.latency.record(command, duration, status == "ok")
+        return {
+            "status": status,
+            "command": command,
+            "output": output.getvalue(),
+            "duration_ms": round(duration * 1000, 2),
+        }
+
+    def stats(self) -> Dict:
+        """服务运行状态与任务耗时统计"""
+        return {
+            "pid": os.getpid(),
+            "uptime_seconds": round(time.time() - self.started_at, 1),
+            "startup_seconds": round(self.startup_seconds, 3),
+            "jobs": self.latency.summary(),
+        }
+
+    def serve_forever(self):
+        """监听本地套接字并依次处理任务
+
+        单个连接认证失败、提前断开或收发出错时只记录并跳过该连接，服务继续运行。
+        """
+        self.running = True
+        if isinstance(self.address, str):
+            # 清理上次异常退出遗留的套接字文件
+            os.makedirs(os.path.dirname(self.address), exist_ok=True)
+            if os.path.exists(self.address):
+                os.remove(self.address)
+        with Listener(self.address, authkey=self.authkey) as listener:
+            print(
+                "🟢 报告服务已启动: {} (预热 {:.2f}s)".format(
+                    listener.address, self.startup_seconds
+                )
+            )
+            while self.running:
+                try:
+                    connection = listener.accept()
+                except (AuthenticationError, EOFError, OSError) as e:
+                    print("⚠️ 拒绝连接: {}: {}".format(type(e).__name__, e))
+                    continue
+                with connection:
+                    try:
+                        job = connection.recv()
+                        response = self.handle(job)
+                        connection.send(response)
+                    except (EOFError, OSError) as e:
+                        print("⚠️ 连接中断: {}: {}".format(type(e).__name__, e))
+                        continue
+                if response.get("command"):
+                    print(
+                        "✓ {} {} ({:.1f}ms)".format(
+                            response["command"],
+                            response["status"],
+                            response["duration_ms"],
+                        )
+                    )
+        print("🔴 报告服务已停止")
+
+
+def serve():
+    """启动常驻报告服务（与调度器子进程一致，以项目根目录为工作目录）"""
+    os.chdir(PROJECT_DIR)
+    ReportService().serve_forever()
+
+
+def submit(argv: List[str], address: tuple = None, authkey: bytes = None) -> Dict:
+    """向报告服务提交一个任务并等待结果，附带客户端测得的往返耗时"""
+    started = time.perf_counter()
+    with Client(
+        address or service_address(), authkey=authkey or service_authkey()
+    ) as c:
+        c.send({"argv": list(argv)})
+        response = c.recv()
+    response["latency_ms"] = round((time.perf_counter() - started) * 1000, 2)
+    return response
+
+
+def main():
+    """命令行入口: serve | stats | stop | submit <main.py 参数...>"""
+    command = sys.argv[1] if len(sys.argv) > 1 else "serve"
+
+    if command == "serve":
+        serve()
+    elif command == "stats":
+        print(json.dumps(submit(["stats"])["stats"], ensure_ascii=False, indent=2))
+    elif command == "stop":
+        print(submit(["shutdown"])["output"])
+    elif command == "submit":
+        response = submit(sys.argv[2:])
+        print(response.get("output", ""), end="")
+        print(
+            "⏱️ 任务耗时 {}ms，往返耗时 {}ms".format(
+                response.get("duration_ms"), response["latency_ms"]
+            )
+        )
+        sys.exit(0 if response["status"] == "ok" else 1)
+    else:
+        print("用法: python report_service.py [serve|stats|stop|submit <参数...>]")
+
+
+if __name__ == "__main__":
+    main()
@@ -11,11 +11,14 @@ import os
 import subprocess
 import sys
 import time
-from datetime import datetime, timedelta
+from datetime import datetime
+from multiprocessing import AuthenticationError
 from pathlib import Path
 
 import schedule
 
+from analysis.periods import ReportPeriod
+
 # 设置日志
 logging.basicConfig(
     level=logging.INFO,
@@ -30,30 +33,47 @@ class WhitepaperScheduler:
         self.reports_dir = self.project_root / "reports"
         self.data_dir = self.project_root / "data"
 
-    def generate_weekly_report(self):
-        """生成周报"""
-        try:
-            logging.info("开始生成周报...")
-            current_date = datetime.now()
-            week_start = current_date - timedelta(days=current_date.weekday())
-            week_end = week_start + timedelta(days=6)
+    def run_main(self, argv):
+        """执行 main.py 命令：优先提交给常驻报告服务，服务不可用时回退到子进程
 
-            report_name = f"weekly_report_{week_start.strftime('%Y%m%d')}_{week_end.strftime('%Y%m%d')}.md"
-            report_path = self.reports_dir / report_name
+        服务未启动、从未启动过（尚无密钥文件）或密钥不匹配都视为不可用。
+        返回 (是否成功, 错误信息)。
+        """
+        try:
+            from report_service import submit
 
-            # 运行主程序生成报告
+            response = submit(argv)
+        except (ConnectionError, OSError, RuntimeError, AuthenticationError) as e:
+            logging.info(f"报告服务不可用（{type(e).__name__}），改用子进程执行")
             result = subprocess.run(
-                [sys.executable, "main.py", "--period", "weekly"],
+                [sys.executable, "main.py"] + argv,
                 capture_output=True,
                 text=True,
                 cwd=self.project_root,
             )
+            return result.returncode == 0, result.stderr
+
+        logging.info(
+            f"报告服务任务完成: 执行 {response.get('duration_ms')}ms，"
+            f"往返 {response['latency_ms']}ms"
+        )
+        return response["status"] == "ok", response.get("output", "")
+
+    def generate_weekly_report(self):
+        """生成周报"""
+        try:
+            logging.info("开始生成周报...")
+            # 周报覆盖刚结束的上一个自然周，与 main.py --period weekly 的输出一致
+            report_name = f"weekly_report_{ReportPeriod('weekly').tag}.md"
+
+            # 运行主程序生成报告
+            ok, error = self.run_main(["--period", "weekly"])
 
-            if result.returncode == 0:
+            if ok:
                 logging.info(f"周报生成成功: {report_name}")
                 self.commit_to_git(f"Add weekly report: {report_name}")
             else:
-                logging.error(f"周报生成失败: {result.stderr}")
+                logging.error(f"周报生成失败: {error}")
 
         except Exception as e:
             logging.error(f"生成周报时出错: {str(e)}")
@@ -62,27 +82,16 @@ class WhitepaperScheduler:
         """生成月报"""
         try:
             logging.info("开始生成月报...")
-            current_date = datetime.now()
-            month_start = current_date.replace(day=1)
-            next_month = (month_start + timedelta(days=32)).replace(day=1)
-            month_end = next_month - timedelta(days=1)
-
-            report_name = f"monthly_report_{month_start.strftime('%Y%m')}.md"
-            report_path = self.reports_dir / report_name
+            report_name = f"monthly_report_{ReportPeriod('monthly').tag}.md"
 
             # 运行主程序生成报告
-            result = subprocess.run(
-                [sys.executable, "main.py", "--period", "monthly"],
-                capture_output=True,
-                text=True,
-                cwd=self.project_root,
-            )
+            ok, error = self.run_main(["--period", "monthly"])
 
-            if result.returncode == 0:
+            if ok:
                 logging.info(f"月报生成成功: {report_name}")
                 self.commit_to_git(f"Add monthly report: {report_name}")
             else:
-                logging.error(f"月报生成失败: {result.stderr}")
+                logging.error(f"月报生成失败: {error}")
 
         except Exception as e:
             logging.error(f"生成月报时出错: {str(e)}")
@@ -91,38 +100,16 @@ class WhitepaperScheduler:
         """生成季报"""
         try:
             logging.info("开始生成季报...")
-            current_date = datetime.now()
-            quarter = (current_date.month - 1) // 3 + 1
-            year = current_date.year
-
-            quarter_start_month = (quarter - 1) * 3 + 1
-            quarter_start = current_date.replace(month=quarter_start_month, day=1)
-
-            if quarter == 4:
-                quarter_end = current_date.replace(
-                    year=year + 1, month=1, day=1
-                ) - timedelta(days=1)
-            else:
-                quarter_end = current_date.replace(
-                    month=quarter_start_month + 3, day=1
-                ) - timedelta(days=1)
-
-            report_name = f"quarterly_report_{year}Q{quarter}.md"
-            report_path = self.reports_dir / report_name
+            report_name = f"quarterly_report_{ReportPeriod('quarterly').tag}.md"
 
             # 运行主程序生成报告
-            result = subprocess.run(
-                [sys.executable, "main.py", "--period", "quarterly"],
-                capture_output=True,
-                text=True,
-                cwd=self.project_root,
-            )
+            ok, error = self.run_main(["--period", "quarterly"])
 
-            if result.returncode == 0:
+            if ok:
                 logging.info(f"季报生成成功: {report_name}")
                 self.commit_to_git(f"Add quarterly report: {report_name}")
             else:
-                logging.error(f"季报生成失败: {result.stderr}")
+                logging.error(f"季报生成失败: {error}")
 
         except Exception as e:
             logging.error(f"生成季报时出错: {str(e)}")
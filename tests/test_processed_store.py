@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""分区结构化数据按清单读取"""
+
+from datetime import date
+
+from analysis.processed_store import ProcessedDataStore
+
+
+def test_read_loads_requested_snapshots_and_columns(tmp_path):
+    store = ProcessedDataStore(str(tmp_path))
+    for snapshot, plays in [
+        (date(2024, 12, 30), 10),
+        (date(2025, 6, 2), 20),
+        (date(2026, 1, 5), 30),
+    ]:
+        store.append(
+            "top_songs",
+            [{"title": "歌", "plays": plays, "artist": "歌手"}],
+            snapshot,
+        )
+
+    # 2024-12-30 属于2025年第1周
+    assert store.entries("top_songs")[0]["partition"] == "year=2025/quarter=1/week=01"
+
+    frame = store.read(
+        "top_songs", columns=["plays"], start=date(2025, 1, 1), end=date(2025, 12, 31)
+    )
+    assert list(frame.columns) == ["snapshot", "period", "plays"]
+    assert frame["plays"].tolist() == [20]
+
+    frame = store.read("top_songs", columns=["missing"])
+    assert frame.empty
+
+
+def test_empty_nested_values_are_saved_as_json(tmp_path):
+    store = ProcessedDataStore(str(tmp_path))
+    # 播放日志缺少device列时device_hourly为空字典
+    store.append(
+        "time_analysis",
+        {"hourly_plays": {"20": 5}, "device_hourly": {}, "avg_duration": None},
+        date(2025, 6, 2),
+    )
+
+    entry = store.entries("time_analysis")[0]
+    assert "device_hourly" in entry["json_columns"]
+    assert "hourly_plays" not in entry["json_columns"]
+
+    frame = store.read("time_analysis")
+    assert frame["device_hourly"][0] == {}
+    assert frame["hourly_plays"][0] == {"20": 5}
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""黑马榜环形缓冲区：滚动窗口合计对照按时间直接统计的结果（按UTC小时分桶）"""
+
+import numpy as np
+import pandas as pd
+
+from analysis.rising_detector import HOUR_SECONDS, RisingSongDetector
+
+
+def _events(rows: int = 5000, hours: int = 400, seed: int = 3) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    song = rng.integers(0, 60, rows)
+    return pd.DataFrame(
+        {
+            "timestamp": np.sort(
+                1748822400 + rng.integers(0, hours * HOUR_SECONDS, rows)
+            ),
+            "title": ["歌曲{}".format(i) for i in song],
+            "artist": ["歌手{}".format(i % 7) for i in song],
+            "plays": rng.integers(1, 5, rows),
+        }
+    )
+
+
+def _window_totals(events: pd.DataFrame, first: int, last: int) -> pd.Series:
+    """分桶编号在 [first, last] 内的各歌曲点播合计"""
+    buckets = events["timestamp"] // HOUR_SECONDS
+    rows = events[(buckets >= first) & (buckets <= last)]
+    return rows.groupby(["title", "artist"])["plays"].sum()
+
+
+def _assert_windows(detector: RisingSongDetector, events: pd.DataFrame):
+    head = detector.head
+    recent = _window_totals(events, head - detector.recent_buckets + 1, head)
+    baseline = _window_totals(
+        events, head - detector.n_buckets + 1, head - detector.recent_buckets
+    )
+    rates = detector.growth_rates()
+    expected_recent = recent.reindex(rates.index, fill_value=0)
+    expected_baseline = baseline.reindex(rates.index, fill_value=0)
+    np.testing.assert_array_equal(rates["recent"], expected_recent)
+    np.testing.assert_allclose(
+        rates["baseline"],
+        expected_baseline * detector.recent_buckets / detector.baseline_buckets,
+    )
+
+
+def test_rolling_windows_match_direct_counts():
+    events = _events()
+    detector = RisingSongDetector(
+        recent_buckets=12, baseline_buckets=48, timezone="UTC"
+    )
+    for start in range(0, len(events), 700):
+        detector.update(events.iloc[start : start + 700])
+        _assert_windows(detector, events.iloc[: start + 700])
+
+
+def test_gap_longer_than_buffer_clears_windows():
+    events = _events(rows=500, hours=30)
+    detector = RisingSongDetector(recent_buckets=6, baseline_buckets=12, timezone="UTC")
+    detector.update(events)
+    detector.advance(
+        pd.Timestamp(events["timestamp"].max() + 40 * HOUR_SECONDS, unit="s")
+    )
+
+    rates = detector.growth_rates()
+    assert (rates["recent"] == 0).all()
+    assert (rates["baseline"] == 0).all()
+
+
+def test_saved_state_resumes_updates(tmp_path):
+    events = _events(seed=5)
+    half = len(events) // 2
+    detector = RisingSongDetector(
+        recent_buckets=12, baseline_buckets=48, timezone="UTC"
+    )
+    detector.update(events.iloc[:half])
+    detector.save(str(tmp_path / "state.npz"))
+
+    resumed = RisingSongDetector.load(str(tmp_path / "state.npz"))
+    resumed.update(events.iloc[half:])
+    _assert_windows(resumed, events)
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""点播时间按终端所在时区分桶"""
+
+from datetime import date
+
+import pandas as pd
+
+from analysis.periods import ReportPeriod
+from analysis.play_logs import PlayLogAggregator
+from analysis.time_patterns import UsageHistogram
+
+# 2025-06-02 12:00 UTC，即北京时间 20:00
+NOON_UTC = 1748865600
+
+
+def test_hours_are_counted_in_local_time():
+    histogram = UsageHistogram()
+    histogram.update(pd.Series([NOON_UTC] * 3))
+    assert histogram.hourly.argmax() == 20
+
+    utc = UsageHistogram("UTC")
+    utc.update(pd.Series([NOON_UTC] * 3))
+    assert utc.hourly.argmax() == 12
+
+
+def test_naive_time_text_is_local_time():
+    histogram = UsageHistogram()
+    histogram.update(pd.Series(["2025-06-02 20:15:00"]))
+    assert histogram.hourly.argmax() == 20
+
+
+def test_days_and_periods_start_at_local_midnight():
+    # 北京时间 2025-06-30 00:30 属于6月30日所在的周，而不是UTC的6月29日
+    seconds = int(pd.Timestamp("2025-06-30 00:30", tz="Asia/Shanghai").timestamp())
+    aggregator = PlayLogAggregator()
+    chunk = aggregator._prepare(pd.DataFrame({"timestamp": [seconds], "title": ["歌"]}))
+    assert chunk["day"][0] == (pd.Timestamp("2025-06-30") - pd.Timestamp(0)).days
+
+    start, end = ReportPeriod("weekly", date(2025, 7, 1)).seconds()
+    assert start == int(pd.Timestamp("2025-06-23", tz="Asia/Shanghai").timestamp())
+    assert end == int(pd.Timestamp("2025-06-30", tz="Asia/Shanghai").timestamp())
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""热门榜单草图：估计值与复核结果对照精确计数"""
+
+import numpy as np
+import pandas as pd
+
+from analysis.topk_sketch import ALL_CITIES, CountMinSketch, TopKSketch
+
+WEEK_SECONDS = 7 * 24 * 3600
+# 2025-06-02（周一）00:00 UTC
+MONDAY = 1748822400
+
+
+def _play_log(rows: int = 20000, songs: int = 300, seed: int = 7) -> pd.DataFrame:
+    """两周的合成点播：歌曲热度服从Zipf分布"""
+    rng = np.random.default_rng(seed)
+    song = np.minimum(rng.zipf(1.3, rows), songs) - 1
+    return pd.DataFrame(
+        {
+            "seconds": MONDAY + rng.integers(0, 2 * WEEK_SECONDS, rows),
+            "title": ["歌曲{}".format(i) for i in song],
+            "artist": ["歌手{}".format(i % 40) for i in song],
+            "tags": ["标签{}".format(i % 5) for i in song],
+            "plays": rng.integers(1, 4, rows),
+            "city_type": rng.choice(["一线城市", "二线城市"], rows),
+        }
+    )
+
+
+def _segment_rows(
+    log: pd.DataFrame, city_type: str, window: str, timezone: str
+) -> pd.DataFrame:
+    """分段内的原始点播：窗口起始日（本地零点）起的7天，"全部"包含所有城市等级"""
+    start = int(pd.Timestamp(window, tz=timezone).timestamp())
+    rows = log[(log["seconds"] >= start) & (log["seconds"] < start + WEEK_SECONDS)]
+    if city_type != ALL_CITIES:
+        rows = rows[rows["city_type"] == city_type]
+    return rows
+
+
+def _chunks(log: pd.DataFrame, parts: int):
+    bounds = np.linspace(0, len(log), parts + 1).astype(int)
+    return [log.iloc[start:end] for start, end in zip(bounds[:-1], bounds[1:])]
+
+
+def test_count_min_never_underestimates():
+    rng = np.random.default_rng(1)
+    keys = rng.integers(0, 1 << 62, 500, dtype=np.int64).astype(np.uint64)
+    counts = rng.integers(1, 100, 500)
+    sketch = CountMinSketch(epsilon=1e-3, delta=1e-3)
+    sketch.update(keys, counts)
+
+    estimates = sketch.estimate(keys)
+    assert (estimates >= counts).all()
+    assert (estimates - counts <= sketch.error_bound).mean() > 0.99
+
+
+def test_recheck_matches_exact_counts():
+    log = _play_log()
+    charts = TopKSketch(capacity=50)
+    for chunk in _chunks(log, 4):
+        charts.update(chunk)
+    charts.recheck(_chunks(log, 3), top_n=10)
+
+    assert charts.exact
+    for city_type, window in charts.segments():
+        rows = _segment_rows(log, city_type, window, charts.timezone)
+        expected = rows.groupby(["title", "artist"])["plays"].sum().nlargest(10)
+        chart = charts.hot_chart(city_type, window, top_n=10)
+        assert [song["plays"] for song in chart] == expected.tolist()
+        assert charts.segment_totals[(city_type, window)] == rows["plays"].sum()
+
+
+def test_merged_shards_match_single_pass():
+    log = _play_log(seed=11)
+    single = TopKSketch(capacity=50)
+    single.update(log)
+
+    merged = TopKSketch(capacity=50)
+    for shard in _chunks(log, 3):
+        partial = TopKSketch(capacity=50)
+        partial.update(shard)
+        merged.merge(partial)
+
+    assert merged.segments() == single.segments()
+    for city_type, window in single.segments():
+        # 点播数相同的歌曲先后顺序可能不同，按 (点播数, 歌曲) 比较
+        expected = single.hot_chart(city_type, window)
+        actual = merged.hot_chart(city_type, window)
+        assert [song["plays"] for song in actual] == [
+            song["plays"] for song in expected
+        ]
+        plays = {song["title"]: song["plays"] for song in expected}
+        for song in actual:
+            assert plays.get(song["title"], song["plays"]) == song["plays"]
+
+
+def test_windows_follow_monday_weeks_and_skip_partial_baselines():
+    # 周四开始的三周数据：首个自然周只覆盖4天，不能作为趋势榜的基线
+    log = _play_log(seed=3)
+    log["seconds"] += 3 * 24 * 3600
+    charts = TopKSketch(capacity=50, timezone="UTC")
+    charts.update(log)
+
+    windows = sorted({window for _, window in charts.segments()})
+    assert windows == ["2025-06-02", "2025-06-09", "2025-06-16"]
+    assert all(pd.Timestamp(window).dayofweek == 0 for window in windows)
+    assert charts.coverage("2025-06-02") == 4 / 7
+    assert charts.coverage("2025-06-09") == 1.0
+
+    assert charts.trending_chart(ALL_CITIES, "2025-06-09") == []
+    # 完整的上一周作基线；当前周只覆盖3天，按整周折算，平稳的热门歌曲不应出现爆发增长
+    trending = charts.trending_chart(ALL_CITIES, "2025-06-16", min_previous=300)
+    assert trending
+    assert all(song["heat_status"] != "爆发增长" for song in trending)
+
+
+def test_sharded_recheck_matches_exact_counts(tmp_path):
+    from analysis.play_logs import PlayLogAggregator
+
+    log = _play_log(seed=5)
+    log.insert(0, "timestamp", log.pop("seconds"))
+    for index, shard in enumerate(_chunks(log, 3)):
+        shard.to_csv(tmp_path / "part-{}.csv".format(index), index=False)
+
+    aggregator = PlayLogAggregator.from_path(
+        str(tmp_path), max_workers=2, sketch_options={"capacity": 50}
+    )
+    charts = aggregator.charts
+    assert charts.exact
+    log = log.rename(columns={"timestamp": "seconds"})
+    for city_type, window in charts.segments():
+        rows = _segment_rows(log, city_type, window, charts.timezone)
+        expected = rows.groupby(["title", "artist"])["plays"].sum().nlargest(10)
+        chart = charts.hot_chart(city_type, window, top_n=10)
+        assert [song["plays"] for song in chart] == expected.tolist()
+
+
+def test_top_and_rising_songs_come_from_rechecked_sketch(tmp_path):
+    from analysis.play_logs import PlayLogAggregator
+
+    # 歌曲5在第三周点播量翻几倍，应登上黑马榜
+    log = _play_log(rows=30000, seed=9)
+    log["seconds"] = MONDAY + (log["seconds"] - MONDAY) * 3 // 2
+    surge = log[log["seconds"] >= MONDAY + 2 * WEEK_SECONDS].head(600)
+    log = pd.concat([log, surge.assign(title="歌曲5", artist="歌手5")])
+    log.insert(0, "timestamp", log.pop("seconds"))
+    log.to_csv(tmp_path / "plays.csv", index=False)
+
+    aggregator = PlayLogAggregator.from_path(
+        str(tmp_path / "plays.csv"), sketch_options={"capacity": 50}, timezone="UTC"
+    )
+    assert not hasattr(aggregator, "song_day_plays")
+
+    expected = log.groupby(["title", "artist"])["plays"].sum().nlargest(10)
+    top_songs = aggregator.top_songs()
+    assert [song["title"] for song in top_songs] == [
+        title for title, _ in expected.index
+    ]
+    assert top_songs[0]["playback_rate"] == round(
+        expected.iloc[0] / log["plays"].sum() * 100, 1
+    )
+
+    rising = aggregator.rising_songs()
+    assert rising[0]["title"] == "歌曲5"
+    last_week = log[log["timestamp"] >= MONDAY + 2 * WEEK_SECONDS]
+    recent = last_week.loc[last_week["title"] == "歌曲5", "plays"].sum()
+    assert "点播{}次".format(recent) in rising[0]["reason"]
@@ -5,126 +5,327 @@
 用于生成图表和仪表板
 """
 
-import json
+import io
+import multiprocessing
 import os
-from typing import Any, Dict, List
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Tuple
 
 import matplotlib.font_manager as fm
 import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
-import seaborn as sns
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from PIL import Image, features
+
+from analysis.chart_store import Records, songs_frame, tag_trends_frame
+from analysis.regional_engine import RegionalPreferenceEngine
+from analysis.report_archive import load_analysis
+from profiler import record_span
+from visualization.chart_inputs import chart_inputs, device_durations
+from visualization.dashboard import write_dashboard
+from visualization.render_profiles import DEFAULT_TARGETS, build_profiles
+
+# Pillow 未编译WebP支持时，WebP输出以PNG代替
+WEBP_SUPPORTED = features.check("webp")
+
+# 栅格格式的Pillow编码参数
+RASTER_OPTIONS = {
+    "png": {"format": "PNG"},
+    "webp": {"format": "WEBP", "quality": 85, "method": 4},
+}
+
+
+def setup_fonts():
+    """设置中文字体"""
+    plt.rcParams["font.sans-serif"] = ["SimHei", "Arial Unicode MS", "DejaVu Sans"]
+    plt.rcParams["axes.unicode_minus"] = False
+
+
+setup_fonts()
+
+
+def _init_chart_worker():
+    """图表子进程初始化：使用无界面的Agg后端并设置字体"""
+    plt.switch_backend("Agg")
+    setup_fonts()
+
+
+def _render_chart(
+    output_dir: str,
+    dpi: int,
+    targets: Tuple[str, ...],
+    method_name: str,
+    chart_data: Any,
+) -> Tuple[str, Dict]:
+    """在子进程中绘制单个图表，返回输出路径与耗时（供主进程的剖析器记录）"""
+    started_at, start, cpu = time.time(), time.perf_counter(), time.process_time()
+    generator = ChartGenerator(output_dir=output_dir, dpi=dpi, targets=targets)
+    path = getattr(generator, method_name)(chart_data)
+    timing = {
+        "started_at": started_at,
+        "wall_ms": (time.perf_counter() - start) * 1000,
+        "cpu_ms": (time.process_time() - cpu) * 1000,
+        "thread": "chart-worker-{}".format(os.getpid()),
+    }
+    return path, timing
+
+
+def _bar_labels(ax, bars, **style) -> List:
+    """为每根柱子创建数值标签（位置与文字由 _set_bar_values 填入）"""
+    return [ax.text(0, 0, "", **style) for _ in bars]
+
+
+def _set_bar_values(
+    ax,
+    bars,
+    labels: List,
+    values: List,
+    text: str,
+    offset: float,
+    horizontal: bool = False,
+):
+    """更新柱子长度及末端的数值标签，并按新数据重新计算坐标范围"""
+    for bar, label, value in zip(bars, labels, values):
+        if horizontal:
+            bar.set_width(value)
+            label.set_position((value + offset, bar.get_y() + bar.get_height() / 2))
+        else:
+            bar.set_height(value)
+            label.set_position(
+                (bar.get_x() + bar.get_width() / 2, bar.get_height() + offset)
+            )
+        label.set_text(text.format(value))
+    ax.relim()
+    ax.autoscale_view()
+
+
+def _tight_layout(fig):
+    """从默认边距开始计算紧凑布局
+
+    数值标签可能超出坐标轴，tight_layout 的结果依赖当前边距；复用的图形先恢复默认边距，
+    与新建图形的布局一致
+    """
+    fig.subplots_adjust(
+        **{
+            key: plt.rcParams["figure.subplot." + key]
+            for key in ("left", "right", "bottom", "top", "wspace", "hspace")
+        }
+    )
+    fig.tight_layout()
 
-# 设置中文字体
-plt.rcParams["font.sans-serif"] = ["SimHei", "Arial Unicode MS", "DejaVu Sans"]
-plt.rcParams["axes.unicode_minus"] = False
+
+def _draw_pie(ax, values, labels, colors, title: str):
+    """重绘饼图（扇区数随数据变化，不复用图元）"""
+    ax.clear()
+    ax.pie(values, labels=labels, autopct="%1.1f%%", colors=colors)
+    ax.set_title(title, fontsize=14, fontweight="bold")
 
 
 class ChartGenerator:
     """图表生成器"""
 
-    def __init__(self):
-        self.output_dir = "visualization/charts"
+    # 可在子进程中并行绘制的图表（仪表板只写HTML，留在主进程）
+    parallel_charts = (
+        "top_songs",
+        "user_demographics",
+        "regional_trends",
+        "time_patterns",
+        "tag_trends",
+    )
+
+    def __init__(
+        self,
+        output_dir: str = "visualization/charts",
+        dpi: int = 300,
+        targets: Iterable[str] = DEFAULT_TARGETS,
+        reuse_figures: bool = False,
+    ):
+        self.output_dir = output_dir
+        self.dpi = dpi
+        self.use_targets(targets)
+        # 图形模板复用（常驻服务、批量生成）: 图表名 -> (布局, 图形与图元)
+        self.reuse_figures = reuse_figures
+        self._templates = {}
+        # 仪表板引用的plotly.js："cdn" 或 "local"（复制到图表目录，离线可用）
+        self.plotly_js = "cdn"
+        self.regional_engine = RegionalPreferenceEngine()
+        # 最近一次整理的图表输入: (分析数据, 输入)，同一份分析数据只整理一次
+        self._inputs = (None, None)
         os.makedirs(self.output_dir, exist_ok=True)
 
-    def create_top_songs_chart(self, songs_data: List[Dict]) -> str:
-        """创建热门歌曲排行榜图表"""
-        fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(15, 8))
+    def use_targets(self, targets: Iterable[str]):
+        """设置输出目标（见 render_profiles.RENDER_TARGETS），第一个目标的主文件为返回路径"""
+        self.targets = tuple(targets)
+        self.profiles = build_profiles(self.targets, self.dpi, WEBP_SUPPORTED)
+
+    def output_files(self, path: str) -> List[str]:
+        """由图表的返回路径得到所有目标写出的文件（仪表板为HTML及本地 plotly.js）"""
+        if not path.endswith("_chart.{}".format(self.profiles[0].formats[0])):
+            if self.plotly_js == "local":
+                return [path, os.path.join(os.path.dirname(path), "plotly.min.js")]
+            return [path]
+        stem = os.path.basename(path).rsplit(".", 1)[0]
+        return [
+            file
+            for profile in self.profiles
+            for file in profile.paths(self.output_dir, stem).values()
+        ]
 
-        # 提取数据
-        songs = [song["song_name"] for song in songs_data]
-        playback_rates = [
-            float(song["playback_rate"].rstrip("%")) for song in songs_data
+    def _save_figure(self, fig, stem: str) -> str:
+        """按各输出目标保存图表（复用模式下保留图形），返回第一个目标的主文件路径
+
+        每个目标的栅格图只绘制一次：PNG/WebP与缩略图都由同一份像素编码，
+        缩略图直接缩小该图像，不重新绘制；矢量格式由matplotlib单独输出。
+        """
+        try:
+            for profile in self.profiles:
+                paths = profile.paths(self.output_dir, stem)
+                os.makedirs(profile.output_dir(self.output_dir), exist_ok=True)
+
+                if profile.raster_formats or profile.thumbnail:
+                    png_bytes, image = self._rasterize(fig, profile)
+                    for fmt in profile.raster_formats:
+                        if fmt == "png" and png_bytes is not None:
+                            with open(paths[fmt], "wb") as f:
+                                f.write(png_bytes)
+                        else:
+                            image.save(paths[fmt], **RASTER_OPTIONS[fmt])
+                    if profile.thumbnail:
+                        thumbnail = image.copy()
+                        thumbnail.thumbnail(
+                            (profile.thumbnail, profile.thumbnail * 4),
+                            Image.LANCZOS,
+                        )
+                        thumbnail.save(
+                            paths["thumbnail"],
+                            **RASTER_OPTIONS[profile.thumbnail_format],
+                        )
+
+                for fmt in profile.vector_formats:
+                    fig.savefig(
+                        paths[fmt],
+                        format=fmt,
+                        dpi=profile.dpi,
+                        bbox_inches="tight" if profile.tight else None,
+                    )
+        finally:
+            # 复用的图形留作下次渲染的模板
+            if not self.reuse_figures:
+                plt.close(fig)
+
+        return self.profiles[0].paths(self.output_dir, stem)[
+            self.profiles[0].formats[0]
         ]
-        artists = [song["artist"] for song in songs_data]
 
-        # 柱状图
-        bars = ax1.barh(songs, playback_rates, color="skyblue", alpha=0.7)
+    @staticmethod
+    def _rasterize(fig, profile) -> Tuple[Any, Image.Image]:
+        """按目标分辨率绘制一次，返回 (PNG字节或None, 像素图像)
+
+        裁剪空白边的目标沿用 savefig(bbox_inches="tight") 的PNG输出（与原先的文件一致），
+        其余目标直接取Agg画布的像素，省去裁剪所需的额外绘制与PNG往返
+        """
+        if profile.tight:
+            buffer = io.BytesIO()
+            fig.savefig(buffer, format="png", dpi=profile.dpi, bbox_inches="tight")
+            png_bytes = buffer.getvalue()
+            return png_bytes, Image.open(io.BytesIO(png_bytes))
+
+        dpi = fig.dpi
+        fig.set_dpi(profile.dpi)
+        canvas = FigureCanvasAgg(fig)
+        canvas.draw()
+        image = Image.frombuffer(
+            "RGBA", canvas.get_width_height(), canvas.buffer_rgba(), "raw", "RGBA", 0, 1
+        )
+        # 复用的图形恢复原分辨率，不影响下一个目标与下次渲染
+        fig.set_dpi(dpi)
+        return None, image
+
+    def _figure(self, name: str, build: Callable, *layout) -> Dict:
+        """返回图表的图形与待更新的图元
+
+        build(*layout) 创建图形、坐标轴样式与数据图元；复用模式下同一图表只在
+        布局（柱子数量等）变化时重新构建，否则直接返回上次的模板，调用方只更新数据
+        """
+        cached = self._templates.pop(name, None)
+        if cached is not None and cached[0] == layout:
+            chart = cached[1]
+        else:
+            if cached is not None:
+                plt.close(cached[1]["fig"])
+            chart = build(*layout)
+        if self.reuse_figures:
+            self._templates[name] = (layout, chart)
+        return chart
+
+    def _layout_top_songs(self, count: int) -> Dict:
+        fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(15, 8))
+
+        bars = ax1.barh(range(count), np.zeros(count), color="skyblue", alpha=0.7)
+        ax1.set_yticks(range(count))
         ax1.set_xlabel("点播占比 (%)")
         ax1.set_title("热门歌曲排行榜 TOP10", fontsize=16, fontweight="bold")
         ax1.grid(True, alpha=0.3)
 
-        # 添加数值标签
-        for i, (bar, rate) in enumerate(zip(bars, playback_rates)):
-            ax1.text(
-                rate + 0.05,
-                bar.get_y() + bar.get_height() / 2,
-                f"{rate}%",
-                va="center",
-                fontsize=10,
-            )
+        return {
+            "fig": fig,
+            "ax1": ax1,
+            "ax2": ax2,
+            "bars": bars,
+            "labels": _bar_labels(ax1, bars, va="center", fontsize=10),
+        }
+
+    def create_top_songs_chart(self, songs_data: Records) -> str:
+        """创建热门歌曲排行榜图表"""
+        # 提取数据（直接读取列式存储的数值列）
+        songs_table = songs_frame(songs_data)
+        songs = songs_table["title"].tolist()
+        playback_rates = songs_table["playback_rate"].tolist()
+        chart = self._figure("top_songs", self._layout_top_songs, len(songs))
+
+        # 柱状图及数值标签
+        _set_bar_values(
+            chart["ax1"],
+            chart["bars"],
+            chart["labels"],
+            playback_rates,
+            "{}%",
+            0.05,
+            horizontal=True,
+        )
+        chart["ax1"].set_yticklabels(songs)
 
         # 歌手分布饼图
-        artist_counts = pd.Series(artists).value_counts()
+        artist_counts = songs_table["artist"].value_counts()
+        artist_counts = artist_counts[artist_counts > 0]
         colors = plt.cm.Set3(np.linspace(0, 1, len(artist_counts)))
-
-        wedges, texts, autotexts = ax2.pie(
-            artist_counts.values,
-            labels=artist_counts.index,
-            autopct="%1.1f%%",
-            colors=colors,
+        _draw_pie(
+            chart["ax2"], artist_counts.values, artist_counts.index, colors, "歌手分布"
         )
-        ax2.set_title("歌手分布", fontsize=14, fontweight="bold")
-
-        plt.tight_layout()
-        output_path = f"{self.output_dir}/top_songs_chart.png"
-        plt.savefig(output_path, dpi=300, bbox_inches="tight")
-        plt.close()
 
-        return output_path
+        _tight_layout(chart["fig"])
+        return self._save_figure(chart["fig"], "top_songs_chart")
 
-    def create_user_demographics_chart(self, demographics: Dict) -> str:
-        """创建用户画像图表"""
+    def _layout_user_demographics(self, ages: int, user_types: int) -> Dict:
         fig, ((ax1, ax2), (ax3, ax4)) = plt.subplots(2, 2, figsize=(16, 12))
 
-        # 性别分布
-        gender_data = demographics["gender"]
-        ax1.pie(
-            gender_data.values(),
-            labels=gender_data.keys(),
-            autopct="%1.1f%%",
-            colors=["lightblue", "lightpink"],
-        )
-        ax1.set_title("性别分布", fontsize=14, fontweight="bold")
-
         # 年龄分布
-        age_data = demographics["age_groups"]
-        age_groups = list(age_data.keys())
-        age_values = list(age_data.values())
-
-        bars = ax2.bar(age_groups, age_values, color="lightgreen", alpha=0.7)
+        age_bars = ax2.bar(range(ages), np.zeros(ages), color="lightgreen", alpha=0.7)
+        ax2.set_xticks(range(ages))
         ax2.set_title("年龄分布", fontsize=14, fontweight="bold")
         ax2.set_ylabel("占比 (%)")
 
-        # 添加数值标签
-        for bar, value in zip(bars, age_values):
-            ax2.text(
-                bar.get_x() + bar.get_width() / 2,
-                bar.get_height() + 0.5,
-                f"{value}%",
-                ha="center",
-                va="bottom",
-            )
-
         # 用户类型分布
-        user_types = demographics["user_types"]
-        user_names = list(user_types.keys())
-        user_values = list(user_types.values())
-
-        bars = ax3.barh(user_names, user_values, color="lightcoral", alpha=0.7)
+        type_bars = ax3.barh(
+            range(user_types), np.zeros(user_types), color="lightcoral", alpha=0.7
+        )
+        ax3.set_yticks(range(user_types))
         ax3.set_title("用户类型分布", fontsize=14, fontweight="bold")
         ax3.set_xlabel("占比 (%)")
 
-        # 添加数值标签
-        for bar, value in zip(bars, user_values):
-            ax3.text(
-                value + 0.5,
-                bar.get_y() + bar.get_height() / 2,
-                f"{value}%",
-                va="center",
-            )
-
-        # 情绪标签分布（模拟数据）
+        # 情绪标签分布（模拟数据，只在构建时绘制）
         emotions = ["怀旧", "emo", "深情", "伤感", "青春", "励志"]
         emotion_values = [25, 20, 15, 15, 12, 13]
 
@@ -132,114 +333,158 @@ class ChartGenerator:
         ax4.set_title("情绪标签分布", fontsize=14, fontweight="bold")
         ax4.set_ylabel("占比 (%)")
         ax4.tick_params(axis="x", rotation=45)
+        _set_bar_values(
+            ax4,
+            bars,
+            _bar_labels(ax4, bars, ha="center", va="bottom"),
+            emotion_values,
+            "{}%",
+            0.5,
+        )
 
-        # 添加数值标签
-        for bar, value in zip(bars, emotion_values):
-            ax4.text(
-                bar.get_x() + bar.get_width() / 2,
-                bar.get_height() + 0.5,
-                f"{value}%",
-                ha="center",
-                va="bottom",
-            )
+        return {
+            "fig": fig,
+            "ax1": ax1,
+            "ax2": ax2,
+            "ax3": ax3,
+            "age_bars": age_bars,
+            "age_labels": _bar_labels(ax2, age_bars, ha="center", va="bottom"),
+            "type_bars": type_bars,
+            "type_labels": _bar_labels(ax3, type_bars, va="center"),
+        }
 
-        plt.tight_layout()
-        output_path = f"{self.output_dir}/user_demographics_chart.png"
-        plt.savefig(output_path, dpi=300, bbox_inches="tight")
-        plt.close()
+    def create_user_demographics_chart(self, demographics: Dict) -> str:
+        """创建用户画像图表"""
+        age_data = demographics["age_groups"]
+        user_types = demographics["user_types"]
+        chart = self._figure(
+            "user_demographics",
+            self._layout_user_demographics,
+            len(age_data),
+            len(user_types),
+        )
 
-        return output_path
+        # 性别分布
+        gender_data = demographics["gender"]
+        _draw_pie(
+            chart["ax1"],
+            gender_data.values(),
+            gender_data.keys(),
+            ["lightblue", "lightpink"],
+            "性别分布",
+        )
 
-    def create_regional_trends_chart(self, regional_data: List[Dict]) -> str:
-        """创建地域偏好趋势图表"""
-        fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(16, 8))
+        # 年龄分布
+        _set_bar_values(
+            chart["ax2"],
+            chart["age_bars"],
+            chart["age_labels"],
+            list(age_data.values()),
+            "{}%",
+            0.5,
+        )
+        chart["ax2"].set_xticklabels(list(age_data.keys()))
 
-        # 市场占有率
-        city_types = [region["city_type"] for region in regional_data]
-        market_shares = [region["market_share"] for region in regional_data]
+        # 用户类型分布
+        _set_bar_values(
+            chart["ax3"],
+            chart["type_bars"],
+            chart["type_labels"],
+            list(user_types.values()),
+            "{}%",
+            0.5,
+            horizontal=True,
+        )
+        chart["ax3"].set_yticklabels(list(user_types.keys()))
 
-        bars = ax1.bar(city_types, market_shares, color="lightsteelblue", alpha=0.7)
+        _tight_layout(chart["fig"])
+        return self._save_figure(chart["fig"], "user_demographics_chart")
+
+    def _layout_regional_trends(self, regions: int, heatmap_shape: Tuple) -> Dict:
+        fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(16, 8))
+
+        # 市场占有率（仅在有点播记录计算出占有率时绘制）
+        bars = labels = None
+        if regions:
+            bars = ax1.bar(
+                range(regions), np.zeros(regions), color="lightsteelblue", alpha=0.7
+            )
+            ax1.set_xticks(range(regions))
+            labels = _bar_labels(ax1, bars, ha="center", va="bottom")
+        else:
+            ax1.text(0.5, 0.5, "暂无点播数据", ha="center", va="center")
+            ax1.set_xticks([])
+            ax1.set_yticks([])
         ax1.set_title("各城市等级市场占有率", fontsize=14, fontweight="bold")
         ax1.set_ylabel("市场占有率 (%)")
         ax1.tick_params(axis="x", rotation=45)
 
-        # 添加数值标签
-        for bar, share in zip(bars, market_shares):
-            ax1.text(
-                bar.get_x() + bar.get_width() / 2,
-                bar.get_height() + 0.5,
-                f"{share}%",
-                ha="center",
-                va="bottom",
-            )
-
-        # 标签偏好热力图（模拟数据）
-        tags = ["怀旧", "emo", "对唱", "演唱会", "港风", "翻红"]
-        city_types_short = ["一线", "新一线", "二线", "三线"]
-
-        # 模拟偏好矩阵
-        preference_matrix = np.array(
-            [
-                [0.8, 0.3, 0.2, 0.9, 0.1, 0.4],
-                [0.4, 0.9, 0.7, 0.3, 0.2, 0.8],
-                [0.2, 0.5, 0.9, 0.4, 0.8, 0.6],
-                [0.1, 0.2, 0.3, 0.1, 0.4, 0.9],
-            ]
+        # 标签偏好热力图
+        im = ax2.imshow(
+            np.zeros(heatmap_shape), cmap="YlOrRd", aspect="auto", vmin=0, vmax=1
         )
-
-        im = ax2.imshow(preference_matrix, cmap="YlOrRd", aspect="auto")
-        ax2.set_xticks(range(len(tags)))
-        ax2.set_yticks(range(len(city_types_short)))
-        ax2.set_xticklabels(tags, rotation=45)
-        ax2.set_yticklabels(city_types_short)
+        ax2.set_xticks(range(heatmap_shape[1]))
+        ax2.set_yticks(range(heatmap_shape[0]))
         ax2.set_title("地域标签偏好热力图", fontsize=14, fontweight="bold")
 
-        # 添加颜色条
+        # 添加颜色条（色阶固定为0-1，数据更新时不变）
         plt.colorbar(im, ax=ax2, label="偏好强度")
 
-        plt.tight_layout()
-        output_path = f"{self.output_dir}/regional_trends_chart.png"
-        plt.savefig(output_path, dpi=300, bbox_inches="tight")
-        plt.close()
+        return {
+            "fig": fig,
+            "ax1": ax1,
+            "ax2": ax2,
+            "bars": bars,
+            "labels": labels,
+            "image": im,
+        }
 
-        return output_path
+    def create_regional_trends_chart(self, regional_data: List[Dict]) -> str:
+        """创建地域偏好趋势图表"""
+        shared = [region for region in regional_data if "market_share" in region]
+
+        # 标签偏好热力图（由地域偏好数据计算，结果按输入缓存）
+        matrix = self.regional_engine.preference_matrix(regional_data)
+        tags = RegionalPreferenceEngine.top_tags(matrix, limit=12)
+        preference_matrix = matrix[tags].to_numpy()
+        city_types_short = [
+            str(city_type).replace("城市", "") for city_type in matrix.index
+        ]
 
-    def create_time_patterns_chart(self, time_data: Dict) -> str:
-        """创建时间使用模式图表"""
-        fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(16, 8))
+        chart = self._figure(
+            "regional_trends",
+            self._layout_regional_trends,
+            len(shared),
+            preference_matrix.shape,
+        )
 
-        # 24小时使用曲线
-        hours = list(range(24))
-        # 模拟使用率数据
-        usage_rates = [
-            0.05,
-            0.03,
-            0.02,
-            0.01,
-            0.01,
-            0.02,
-            0.05,
-            0.15,
-            0.25,
-            0.35,
-            0.45,
-            0.55,
-            0.65,
-            0.75,
-            0.85,
-            0.90,
-            0.85,
-            0.75,
-            0.65,
-            0.55,
-            0.45,
-            0.35,
-            0.25,
-            0.15,
-        ]
+        if shared:
+            _set_bar_values(
+                chart["ax1"],
+                chart["bars"],
+                chart["labels"],
+                [region["market_share"] for region in shared],
+                "{}%",
+                0.5,
+            )
+            chart["ax1"].set_xticklabels([region["city_type"] for region in shared])
+
+        chart["image"].set_data(preference_matrix)
+        chart["ax2"].set_xticklabels(tags, rotation=45)
+        chart["ax2"].set_yticklabels(city_types_short)
+
+        _tight_layout(chart["fig"])
+        return self._save_figure(chart["fig"], "regional_trends_chart")
+
+    def _layout_time_patterns(self, has_usage: bool, devices: int) -> Dict:
+        fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(16, 8))
 
-        ax1.plot(hours, usage_rates, "b-", linewidth=2, marker="o")
-        ax1.fill_between(hours, usage_rates, alpha=0.3, color="skyblue")
+        # 24小时使用曲线（填充区域随数据重建）
+        line = None
+        if has_usage:
+            (line,) = ax1.plot(range(24), np.zeros(24), "b-", linewidth=2, marker="o")
+        else:
+            ax1.text(12, 0.5, "暂无点播时间数据", ha="center", va="center")
         ax1.set_xlabel("时间 (小时)")
         ax1.set_ylabel("使用率")
         ax1.set_title("24小时使用模式", fontsize=14, fontweight="bold")
@@ -247,82 +492,74 @@ class ChartGenerator:
         ax1.set_xticks(range(0, 24, 2))
 
         # 设备使用时长对比
-        devices = list(time_data["device_usage"].keys())
-        durations = []
-        device_names = []
-
-        for device, info in time_data["device_usage"].items():
-            duration_str = info["avg_duration"]
-            # 简单解析时长（实际应用中需要更复杂的解析）
-            if "h" in duration_str:
-                hours = int(duration_str.split("h")[0])
-                minutes = (
-                    int(duration_str.split("h")[1].split("m")[0])
-                    if "m" in duration_str.split("h")[1]
-                    else 0
-                )
-                total_minutes = hours * 60 + minutes
-            else:
-                total_minutes = int(duration_str.split("m")[0])
-
-            durations.append(total_minutes)
-            device_names.append(device.replace("_", " ").title())
-
-        bars = ax2.bar(device_names, durations, color="lightgreen", alpha=0.7)
+        bars = ax2.bar(range(devices), np.zeros(devices), color="lightgreen", alpha=0.7)
+        ax2.set_xticks(range(devices))
         ax2.set_title("设备平均使用时长", fontsize=14, fontweight="bold")
         ax2.set_ylabel("时长 (分钟)")
         ax2.tick_params(axis="x", rotation=45)
 
-        # 添加数值标签
-        for bar, duration in zip(bars, durations):
-            ax2.text(
-                bar.get_x() + bar.get_width() / 2,
-                bar.get_height() + 2,
-                f"{duration}分钟",
-                ha="center",
-                va="bottom",
+        return {
+            "fig": fig,
+            "ax1": ax1,
+            "ax2": ax2,
+            "line": line,
+            "fill": None,
+            "bars": bars,
+            "labels": _bar_labels(ax2, bars, ha="center", va="bottom"),
+        }
+
+    def create_time_patterns_chart(self, time_data: Dict) -> str:
+        """创建时间使用模式图表"""
+        # 24小时使用曲线（由点播事件直方图统计）
+        hours = list(range(24))
+        usage_rates = time_data.get("hourly_usage")
+
+        # 设备使用时长对比
+        device_names, durations = device_durations(time_data["device_usage"])
+
+        chart = self._figure(
+            "time_patterns",
+            self._layout_time_patterns,
+            bool(usage_rates),
+            len(durations),
+        )
+
+        if usage_rates:
+            ax1 = chart["ax1"]
+            chart["line"].set_ydata(usage_rates)
+            if chart["fill"] is not None:
+                chart["fill"].remove()
+            ax1.relim()
+            chart["fill"] = ax1.fill_between(
+                hours, usage_rates, alpha=0.3, color="skyblue"
             )
+            ax1.autoscale_view()
 
-        plt.tight_layout()
-        output_path = f"{self.output_dir}/time_patterns_chart.png"
-        plt.savefig(output_path, dpi=300, bbox_inches="tight")
-        plt.close()
+        _set_bar_values(
+            chart["ax2"], chart["bars"], chart["labels"], durations, "{}分钟", 2
+        )
+        chart["ax2"].set_xticklabels(device_names)
 
-        return output_path
+        _tight_layout(chart["fig"])
+        return self._save_figure(chart["fig"], "time_patterns_chart")
 
-    def create_tag_trends_chart(self, tag_data: List[Dict]) -> str:
-        """创建标签趋势图表"""
+    def _layout_tag_trends(self, count: int) -> Dict:
         fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(16, 8))
 
         # 标签频率柱状图
-        tags = [tag["tag"] for tag in tag_data]
-        frequencies = [tag["frequency"] for tag in tag_data]
-
-        bars = ax1.bar(tags, frequencies, color="lightcoral", alpha=0.7)
+        bars = ax1.bar(range(count), np.zeros(count), color="lightcoral", alpha=0.7)
+        ax1.set_xticks(range(count))
         ax1.set_title("标签出现频率", fontsize=14, fontweight="bold")
         ax1.set_ylabel("出现次数")
         ax1.tick_params(axis="x", rotation=45)
 
-        # 添加数值标签
-        for bar, freq in zip(bars, frequencies):
-            ax1.text(
-                bar.get_x() + bar.get_width() / 2,
-                bar.get_height() + 100,
-                f"{freq:,}",
-                ha="center",
-                va="bottom",
-            )
-
         # 增长率对比
-        growth_rates = [tag["growth_rate"] for tag in tag_data]
-        predicted_growth = [tag["predicted_growth"] for tag in tag_data]
-
-        x = np.arange(len(tags))
+        x = np.arange(count)
         width = 0.35
 
         bars1 = ax2.bar(
             x - width / 2,
-            growth_rates,
+            np.zeros(count),
             width,
             label="当前增长率",
             color="lightblue",
@@ -330,7 +567,7 @@ class ChartGenerator:
         )
         bars2 = ax2.bar(
             x + width / 2,
-            predicted_growth,
+            np.zeros(count),
             width,
             label="预测增长率",
             color="lightgreen",
@@ -340,143 +577,161 @@ class ChartGenerator:
         ax2.set_title("标签增长率对比", fontsize=14, fontweight="bold")
         ax2.set_ylabel("增长率 (%)")
         ax2.set_xticks(x)
-        ax2.set_xticklabels(tags, rotation=45)
         ax2.legend()
         ax2.grid(True, alpha=0.3)
 
-        # 添加数值标签
-        for bar, rate in zip(bars1, growth_rates):
-            ax2.text(
-                bar.get_x() + bar.get_width() / 2,
-                bar.get_height() + 0.5,
-                f"{rate}%",
-                ha="center",
-                va="bottom",
-            )
-
-        for bar, rate in zip(bars2, predicted_growth):
-            ax2.text(
-                bar.get_x() + bar.get_width() / 2,
-                bar.get_height() + 0.5,
-                f"{rate}%",
-                ha="center",
-                va="bottom",
-            )
-
-        plt.tight_layout()
-        output_path = f"{self.output_dir}/tag_trends_chart.png"
-        plt.savefig(output_path, dpi=300, bbox_inches="tight")
-        plt.close()
+        return {
+            "fig": fig,
+            "ax1": ax1,
+            "ax2": ax2,
+            "bars": bars,
+            "labels": _bar_labels(ax1, bars, ha="center", va="bottom"),
+            "growth_bars": bars1,
+            "growth_labels": _bar_labels(ax2, bars1, ha="center", va="bottom"),
+            "predicted_bars": bars2,
+            "predicted_labels": _bar_labels(ax2, bars2, ha="center", va="bottom"),
+        }
+
+    def create_tag_trends_chart(self, tag_data: Records) -> str:
+        """创建标签趋势图表"""
+        # 标签频率与增长率（直接读取列式存储的数值列）
+        tag_table = tag_trends_frame(tag_data)
+        tags = tag_table["tag"].astype(str).tolist()
+        chart = self._figure("tag_trends", self._layout_tag_trends, len(tags))
+
+        _set_bar_values(
+            chart["ax1"],
+            chart["bars"],
+            chart["labels"],
+            tag_table["frequency"].tolist(),
+            "{:,}",
+            100,
+        )
+        chart["ax1"].set_xticklabels(tags)
+
+        _set_bar_values(
+            chart["ax2"],
+            chart["growth_bars"],
+            chart["growth_labels"],
+            tag_table["growth_rate"].tolist(),
+            "{:g}%",
+            0.5,
+        )
+        _set_bar_values(
+            chart["ax2"],
+            chart["predicted_bars"],
+            chart["predicted_labels"],
+            tag_table["predicted_growth"].tolist(),
+            "{:g}%",
+            0.5,
+        )
+        chart["ax2"].set_xticklabels(tags, rotation=45)
 
-        return output_path
+        _tight_layout(chart["fig"])
+        return self._save_figure(chart["fig"], "tag_trends_chart")
 
     def create_dashboard(self, analysis_data: Dict) -> str:
-        """创建综合仪表板"""
-        # 这里可以创建一个包含多个子图的综合仪表板
-        # 为了简化，我们创建一个包含所有图表的HTML报告
-
-        dashboard_html = """
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <title>音乐行业数据仪表板</title>
-            <style>
-                body { font-family: Arial, sans-serif; margin: 20px; }
-                .chart-container { margin: 20px 0; }
-                .chart-title { font-size: 18px; font-weight: bold; margin-bottom: 10px; }
-                img { max-width: 100%; height: auto; }
-            </style>
-        </head>
-        <body>
-            <h1>音乐行业数据仪表板</h1>
-            <p>基于雷石K歌全系列终端数据分析</p>
-            
-            <div class="chart-container">
-                <div class="chart-title">热门歌曲排行榜</div>
-                <img src="charts/top_songs_chart.png" alt="热门歌曲排行榜">
-            </div>
-            
-            <div class="chart-container">
-                <div class="chart-title">用户画像分析</div>
-                <img src="charts/user_demographics_chart.png" alt="用户画像分析">
-            </div>
-            
-            <div class="chart-container">
-                <div class="chart-title">地域偏好趋势</div>
-                <img src="charts/regional_trends_chart.png" alt="地域偏好趋势">
-            </div>
-            
-            <div class="chart-container">
-                <div class="chart-title">时间使用模式</div>
-                <img src="charts/time_patterns_chart.png" alt="时间使用模式">
-            </div>
-            
-            <div class="chart-container">
-                <div class="chart-title">标签趋势分析</div>
-                <img src="charts/tag_trends_chart.png" alt="标签趋势分析">
-            </div>
-        </body>
-        </html>
-        """
-
-        output_path = f"{self.output_dir}/dashboard.html"
-        with open(output_path, "w", encoding="utf-8") as f:
-            f.write(dashboard_html)
-
-        return output_path
+        """创建交互式综合仪表板（内嵌数据、在浏览器中绘制，不依赖已生成的图片）"""
+        return write_dashboard(
+            analysis_data,
+            f"{self.output_dir}/dashboard.html",
+            plotly_js=self.plotly_js,
+            regional_engine=self.regional_engine,
+            inputs=self.chart_inputs(analysis_data),
+        )
 
-    def generate_all_charts(self, analysis_data: Dict) -> Dict[str, str]:
-        """生成所有图表"""
+    def chart_inputs(self, analysis_data: Dict) -> Dict[str, Any]:
+        """各图表的输入数据；PNG图表、仪表板与缓存指纹共用同一份（按对象判断）"""
+        source, inputs = self._inputs
+        if source is not analysis_data:
+            inputs = chart_inputs(analysis_data)
+            self._inputs = (analysis_data, inputs)
+        return inputs
+
+    def chart_specs(self, analysis_data: Dict) -> Dict[str, Tuple[Callable, Any]]:
+        """返回各图表的绘制函数及其输入数据"""
+        inputs = self.chart_inputs(analysis_data)
+        specs = {
+            name: (getattr(self, "create_{}_chart".format(name)), data)
+            for name, data in inputs.items()
+        }
+        specs["dashboard"] = (self.create_dashboard, analysis_data)
+        return specs
+
+    def generate_all_charts(
+        self,
+        analysis_data: Dict,
+        only: Iterable[str] = None,
+        parallel: bool = False,
+        max_workers: int = None,
+    ) -> Dict[str, str]:
+        """生成所有图表，可通过only只生成指定图表，parallel启用多进程绘制"""
+        chart_paths = {}
+        specs = self.chart_specs(analysis_data)
+        names = list(specs) if only is None else [n for n in specs if n in only]
+
+        if parallel:
+            pool_names = [n for n in names if n in self.parallel_charts]
+        else:
+            pool_names = []
+
+        futures = {}
+        if pool_names:
+            executor = ProcessPoolExecutor(
+                max_workers=max_workers or min(len(pool_names), os.cpu_count() or 1),
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_chart_worker,
+            )
+            with executor:
+                for name in pool_names:
+                    create_chart, chart_data = specs[name]
+                    futures[name] = executor.submit(
+                        _render_chart,
+                        self.output_dir,
+                        self.dpi,
+                        self.targets,
+                        create_chart.__name__,
+                        chart_data,
+                    )
+                chart_paths.update(self._render_serial(specs, names, pool_names))
+                rendered = {}
+                for name, future in futures.items():
+                    rendered[name], timing = future.result()
+                    # 子进程中绘制的图表按主进程插桩的命名计入剖析结果
+                    record_span(
+                        "ChartGenerator.{}".format(specs[name][0].__name__),
+                        "chart",
+                        **timing,
+                    )
+        else:
+            rendered = self._render_serial(specs, names, pool_names)
+
+        # 按图表定义顺序返回结果
+        chart_paths.update(rendered)
+        return {name: chart_paths[name] for name in names}
+
+    def _render_serial(
+        self, specs: Dict[str, Tuple[Callable, Any]], names: List[str], skip: List[str]
+    ) -> Dict[str, str]:
+        """在当前进程中依次生成图表"""
         chart_paths = {}
-
-        # 模拟数据用于图表生成
-        songs_data = [
-            {
-                "song_name": "漂洋过海来看你",
-                "artist": "李宗盛",
-                "playback_rate": "2.9%",
-            },
-            {"song_name": "想你的夜", "artist": "关喆", "playback_rate": "2.7%"},
-            {"song_name": "那女孩对我说", "artist": "黄义达", "playback_rate": "2.6%"},
-            {"song_name": "后来", "artist": "刘若英", "playback_rate": "2.4%"},
-            {"song_name": "演员", "artist": "薛之谦", "playback_rate": "2.3%"},
-            {
-                "song_name": "你就不要想起我",
-                "artist": "田馥甄",
-                "playback_rate": "2.2%",
-            },
-            {"song_name": "一路向北", "artist": "周杰伦", "playback_rate": "2.1%"},
-            {"song_name": "平凡之路", "artist": "朴树", "playback_rate": "2.0%"},
-            {"song_name": "起风了", "artist": "买辣椒也用券", "playback_rate": "1.9%"},
-            {"song_name": "说好的幸福呢", "artist": "周杰伦", "playback_rate": "1.8%"},
-        ]
 
         # 生成各种图表
-        chart_paths["top_songs"] = self.create_top_songs_chart(songs_data)
-        chart_paths["user_demographics"] = self.create_user_demographics_chart(
-            analysis_data["detailed_analysis"]["user_demographics"]
-        )
-        chart_paths["regional_trends"] = self.create_regional_trends_chart(
-            analysis_data["detailed_analysis"]["regional_trends"]
-        )
-        chart_paths["time_patterns"] = self.create_time_patterns_chart(
-            analysis_data["detailed_analysis"]["time_patterns"]
-        )
-        chart_paths["tag_trends"] = self.create_tag_trends_chart(
-            analysis_data["detailed_analysis"]["tag_trends"]
-        )
-        chart_paths["dashboard"] = self.create_dashboard(analysis_data)
+        for name in names:
+            if name in skip:
+                continue
+            create_chart, chart_data = specs[name]
+            chart_paths[name] = create_chart(chart_data)
 
         return chart_paths
 
 
 if __name__ == "__main__":
-    # 示例用法
+    # 示例用法（在项目根目录运行: python -m visualization.chart_generator）
     generator = ChartGenerator()
 
-    # 加载分析数据
-    with open("analysis/comprehensive_analysis.json", "r", encoding="utf-8") as f:
-        analysis_data = json.load(f)
+    # 加载分析数据（存在二进制归档时直接内存映射）
+    analysis_data = load_analysis("analysis/comprehensive_analysis.json")
 
     # 生成所有图表
     chart_paths = generator.generate_all_charts(analysis_data)
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+图表输入数据
+从分析报告中取出各图表读取的数据切片，PNG图表与交互式仪表板共用，不依赖绘图库
+"""
+
+import re
+from collections.abc import Mapping
+from typing import Any, Dict, List, Optional, Tuple
+
+# 模拟数据：早期的分析报告中没有逐曲的点播占比，图表以此代替
+SAMPLE_TOP_SONGS = [
+    {"song_name": "漂洋过海来看你", "artist": "李宗盛", "playback_rate": "2.9%"},
+    {"song_name": "想你的夜", "artist": "关喆", "playback_rate": "2.7%"},
+    {"song_name": "那女孩对我说", "artist": "黄义达", "playback_rate": "2.6%"},
+    {"song_name": "后来", "artist": "刘若英", "playback_rate": "2.4%"},
+    {"song_name": "演员", "artist": "薛之谦", "playback_rate": "2.3%"},
+    {"song_name": "你就不要想起我", "artist": "田馥甄", "playback_rate": "2.2%"},
+    {"song_name": "一路向北", "artist": "周杰伦", "playback_rate": "2.1%"},
+    {"song_name": "平凡之路", "artist": "朴树", "playback_rate": "2.0%"},
+    {"song_name": "起风了", "artist": "买辣椒也用券", "playback_rate": "1.9%"},
+    {"song_name": "说好的幸福呢", "artist": "周杰伦", "playback_rate": "1.8%"},
+]
+
+
+def chart_inputs(analysis_data: Dict) -> Dict[str, Any]:
+    """各图表的输入数据，按图表顺序
+
+    热门歌曲取分析报告中的榜单前列歌曲（Markdown榜单或点播日志），报告中没有时使用模拟数据
+    """
+    detailed = analysis_data["detailed_analysis"]
+    top_songs = detailed.get("top_songs_analysis", {}).get("top_songs")
+    return {
+        "top_songs": top_songs or SAMPLE_TOP_SONGS,
+        "user_demographics": detailed["user_demographics"],
+        "regional_trends": detailed["regional_trends"],
+        "time_patterns": detailed["time_patterns"],
+        "tag_trends": detailed["tag_trends"],
+    }
+
+
+def duration_minutes(duration: Optional[str]) -> Optional[int]:
+    """将 "1h45m"、"58m" 形式的时长转换为分钟数，缺失或无法解析时返回None"""
+    match = re.fullmatch(r"\s*(?:(\d+)h)?\s*(?:(\d+)m)?\s*", duration or "")
+    if not match or not any(match.groups()):
+        return None
+    hours, minutes = match.groups()
+    return int(hours or 0) * 60 + int(minutes or 0)
+
+
+def device_durations(device_usage) -> Tuple[List[str], List[int]]:
+    """各设备的显示名称与平均使用时长（分钟）
+
+    device_usage 可以是 {设备: 信息} 映射，也可以是带 type 字段的设备列表；
+    缺少时长（如点播日志没有duration列）的设备不参与对比
+    """
+    if not isinstance(device_usage, Mapping):
+        device_usage = {device["type"]: device for device in device_usage}
+    names, durations = [], []
+    for device, info in device_usage.items():
+        minutes = duration_minutes(info.get("avg_duration"))
+        if minutes is not None:
+            names.append(device.replace("_", " ").title())
+            durations.append(minutes)
+    return names, durations
@@ -0,0 +1,384 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+交互式数据仪表板
+将各图表读取的分析数据以紧凑JSON内嵌到页面中，由 plotly.js 在浏览器中绘制；
+各板块滚动到可视区域时才加载 plotly.js 并绘制，不依赖服务端生成的图片
+"""
+
+import html
+import json
+import os
+from typing import Dict, List
+
+from analysis.json_writer import dumps
+from visualization.chart_inputs import chart_inputs, device_durations
+
+# 仪表板各板块 (图表名, 标题)，按页面顺序
+DASHBOARD_SECTIONS = [
+    ("top_songs", "热门歌曲排行榜"),
+    ("user_demographics", "用户画像分析"),
+    ("regional_trends", "地域偏好趋势"),
+    ("time_patterns", "时间使用模式"),
+    ("tag_trends", "标签趋势分析"),
+]
+
+PLOTLY_CDN = "https://cdn.plot.ly/plotly-{version}.min.js"
+
+# 未安装 plotly 时CDN引用的 plotly.js 版本
+DEFAULT_PLOTLY_JS_VERSION = "2.35.2"
+
+PLOTLY_JS_MODES = ("cdn", "local")
+
+# 与PNG热力图一致，只展示偏好强度之和最高的标签
+HEATMAP_TAGS = 12
+
+
+def _column(series) -> List:
+    """列转换为可JSON序列化的列表，缺失值记为null"""
+    values = series.astype(object)
+    return values.where(series.notna(), None).tolist()
+
+
+def dashboard_payload(
+    analysis_data: Dict, regional_engine=None, inputs: Dict = None
+) -> Dict:
+    """仪表板内嵌的数据：各图表的输入切片，按列存放
+
+    与PNG图表使用相同的输入与计算（榜单列式表、地域偏好矩阵、设备时长解析）；
+    inputs为已整理好的图表输入（见 chart_inputs），省略时由analysis_data整理
+    """
+    from analysis.chart_store import songs_frame, tag_trends_frame
+    from analysis.regional_engine import RegionalPreferenceEngine
+    from analysis.report_archive import to_python
+
+    inputs = inputs or chart_inputs(analysis_data)
+
+    songs = songs_frame(inputs["top_songs"])
+    tags = tag_trends_frame(inputs["tag_trends"])
+
+    regional = to_python(inputs["regional_trends"])
+    engine = regional_engine or RegionalPreferenceEngine()
+    matrix = engine.preference_matrix(regional)
+    heatmap_tags = RegionalPreferenceEngine.top_tags(matrix, limit=HEATMAP_TAGS)
+    shared = [region for region in regional if "market_share" in region]
+
+    time_data = inputs["time_patterns"]
+    devices, minutes = device_durations(time_data["device_usage"])
+    hourly_usage = time_data.get("hourly_usage")
+
+    return {
+        "top_songs": {
+            "title": _column(songs["title"]),
+            "artist": _column(songs["artist"]),
+            "playback_rate": _column(songs["playback_rate"]),
+        },
+        "user_demographics": to_python(inputs["user_demographics"]),
+        "regional_trends": {
+            "city_type": [region["city_type"] for region in shared],
+            "market_share": [region["market_share"] for region in shared],
+            "tiers": [str(tier).replace("城市", "") for tier in matrix.index],
+            "tags": heatmap_tags,
+            "preference": (
+                matrix[heatmap_tags].round(3).to_numpy().tolist()
+                if heatmap_tags
+                else []
+            ),
+        },
+        "time_patterns": {
+            "hourly_usage": to_python(hourly_usage) if hourly_usage else None,
+            "devices": devices,
+            "minutes": minutes,
+        },
+        "tag_trends": {
+            column: _column(tags[column])
+            for column in ("tag", "frequency", "growth_rate", "predicted_growth")
+        },
+    }
+
+
+def plotly_script(output_dir: str, plotly_js: str = "cdn") -> str:
+    """页面引用的 plotly.js 地址
+
+    cdn 使用与已安装 plotly 包相同版本的CDN地址；local 将 plotly 包自带的
+    plotly.min.js 复制到仪表板目录（已存在时复用），离线环境也能打开
+    """
+    if plotly_js not in PLOTLY_JS_MODES:
+        raise ValueError(
+            "不支持的 plotly.js 来源: {}（可选 {}）".format(
+                plotly_js, ", ".join(PLOTLY_JS_MODES)
+            )
+        )
+    try:
+        from plotly import offline
+    except ImportError:
+        offline = None
+
+    if plotly_js == "local":
+        if offline is None:
+            raise ValueError("离线仪表板需要安装 plotly: pip install plotly")
+        path = os.path.join(output_dir, "plotly.min.js")
+        if not os.path.exists(path):
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(offline.get_plotlyjs())
+        return "plotly.min.js"
+
+    version = (
+        offline.get_plotlyjs_version()
+        if offline is not None
+        else DEFAULT_PLOTLY_JS_VERSION
+    )
+    return PLOTLY_CDN.format(version=version)
+
+
+def dashboard_header(analysis_data: Dict) -> Dict:
+    """页面标题区的内容：数据来源、报告周期与核心发现"""
+    metadata = analysis_data.get("report_metadata") or {}
+    period = metadata.get("period")
+    subtitle = metadata.get("data_source") or "基于雷石K歌全系列终端数据分析"
+    if period:
+        subtitle = "{}（{}）".format(subtitle, period["label"])
+    summary = analysis_data.get("executive_summary") or {}
+    return {
+        "subtitle": subtitle,
+        "key_findings": [str(finding) for finding in summary.get("key_findings", [])],
+    }
+
+
+def render_dashboard(
+    analysis_data: Dict, plotly_src: str, regional_engine=None, inputs: Dict = None
+) -> str:
+    """生成仪表板HTML"""
+    header = dashboard_header(analysis_data)
+    findings = "".join(
+        "<li>{}</li>".format(html.escape(finding)) for finding in header["key_findings"]
+    )
+    sections = "".join(
+        SECTION_TEMPLATE.format(name=name, title=html.escape(title))
+        for name, title in DASHBOARD_SECTIONS
+    )
+    # 紧凑JSON内嵌在 <script> 中，转义 "<" 避免数据中的 "</script>" 提前结束标签
+    payload = dumps(
+        dashboard_payload(analysis_data, regional_engine, inputs), compact=True
+    ).decode("utf-8")
+    payload = payload.replace("<", "\\u003c")
+
+    # 数据最后替换，其中出现的占位符文本不会被再次替换
+    return (
+        DASHBOARD_TEMPLATE.replace("__TITLE__", "音乐行业数据仪表板")
+        .replace("__SUBTITLE__", html.escape(header["subtitle"]))
+        .replace("__FINDINGS__", findings)
+        .replace("__SECTIONS__", sections)
+        .replace("__PLOTLY_SRC__", json.dumps(plotly_src).replace("<", "\\u003c"))
+        .replace("__DASHBOARD_DATA__", payload)
+    )
+
+
+def write_dashboard(
+    analysis_data: Dict,
+    output_path: str,
+    plotly_js: str = "cdn",
+    regional_engine=None,
+    inputs: Dict = None,
+) -> str:
+    """写出交互式仪表板，返回文件路径"""
+    output_dir = os.path.dirname(output_path) or "."
+    os.makedirs(output_dir, exist_ok=True)
+    document = render_dashboard(
+        analysis_data, plotly_script(output_dir, plotly_js), regional_engine, inputs
+    )
+    with open(output_path, "w", encoding="utf-8") as f:
+        f.write(document)
+    return output_path
+
+
+SECTION_TEMPLATE = """
+    <section class="chart-container" data-chart="{name}">
+        <h2 class="chart-title">{title}</h2>
+        <div class="plots"><p class="placeholder">图表加载中…</p></div>
+    </section>"""
+
+DASHBOARD_TEMPLATE = """<!DOCTYPE html>
+<html lang="zh-CN">
+<head>
+    <meta charset="utf-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1">
+    <title>__TITLE__</title>
+    <style>
+        body { font-family: Arial, "PingFang SC", "Microsoft YaHei", sans-serif; margin: 20px; color: #222; }
+        .findings { margin: 0 0 24px; padding-left: 20px; }
+        .chart-container { margin: 24px 0; }
+        .chart-title { font-size: 18px; font-weight: bold; margin: 0 0 10px; }
+        .plots { display: grid; grid-template-columns: repeat(auto-fit, minmax(420px, 1fr)); gap: 16px; min-height: 380px; }
+        .plot { min-height: 380px; }
+        .placeholder, .empty { color: #888; align-self: center; justify-self: center; }
+    </style>
+</head>
+<body>
+    <h1>__TITLE__</h1>
+    <p>__SUBTITLE__</p>
+    <ul class="findings">__FINDINGS__</ul>
+__SECTIONS__
+    <script type="application/json" id="dashboard-data">__DASHBOARD_DATA__</script>
+    <script>
+    (function () {
+        "use strict";
+        var DATA = JSON.parse(document.getElementById("dashboard-data").textContent);
+        var PLOTLY_SRC = __PLOTLY_SRC__;
+        var CONFIG = { responsive: true, displaylogo: false };
+        // 与PNG热力图相同的 YlOrRd 色阶（0为浅黄，1为深红）
+        var YL_OR_RD = [[0, "#ffffcc"], [0.25, "#fed976"], [0.5, "#fd8d3c"], [0.75, "#e31a1c"], [1, "#800026"]];
+        var plotlyReady = null;
+
+        // plotly.js 在第一个板块进入可视区域时才加载，且只加载一次
+        function loadPlotly() {
+            if (!plotlyReady) {
+                plotlyReady = new Promise(function (resolve, reject) {
+                    var script = document.createElement("script");
+                    script.src = PLOTLY_SRC;
+                    script.onload = resolve;
+                    script.onerror = function () {
+                        plotlyReady = null;
+                        reject(new Error("plotly.js 加载失败: " + PLOTLY_SRC));
+                    };
+                    document.head.appendChild(script);
+                });
+            }
+            return plotlyReady;
+        }
+
+        function layout(title, extra) {
+            return Object.assign({
+                title: { text: title },
+                margin: { t: 48, r: 16, b: 72, l: 64 },
+                height: 380
+            }, extra || {});
+        }
+
+        function axis(title, extra) {
+            return Object.assign({ title: { text: title }, automargin: true }, extra || {});
+        }
+
+        function bar(x, y, color, labels, extra) {
+            return Object.assign({
+                type: "bar", x: x, y: y, text: labels, textposition: "outside",
+                cliponaxis: false, marker: { color: color, opacity: 0.7 }
+            }, extra || {});
+        }
+
+        function suffix(values, unit) {
+            return values.map(function (value) { return value === null ? "" : value + unit; });
+        }
+
+        function pie(labels, values) {
+            return { type: "pie", labels: labels, values: values, textinfo: "label+percent" };
+        }
+
+        var RENDERERS = {
+            top_songs: function (d) {
+                var counts = {};
+                d.artist.forEach(function (artist) { counts[artist] = (counts[artist] || 0) + 1; });
+                return [
+                    [[bar(d.playback_rate, d.title, "skyblue", suffix(d.playback_rate, "%"), { orientation: "h" })],
+                     layout("热门歌曲排行榜 TOP10", { xaxis: axis("点播占比 (%)"), yaxis: axis("", { autorange: "reversed" }) })],
+                    [[pie(Object.keys(counts), Object.values(counts))], layout("歌手分布")]
+                ];
+            },
+            user_demographics: function (d) {
+                return [
+                    [[Object.assign(pie(Object.keys(d.gender), Object.values(d.gender)),
+                                    { marker: { colors: ["lightblue", "lightpink"] } })],
+                     layout("性别分布")],
+                    [[bar(Object.keys(d.age_groups), Object.values(d.age_groups), "lightgreen",
+                          suffix(Object.values(d.age_groups), "%"))],
+                     layout("年龄分布", { yaxis: axis("占比 (%)") })],
+                    [[bar(Object.values(d.user_types), Object.keys(d.user_types), "lightcoral",
+                          suffix(Object.values(d.user_types), "%"), { orientation: "h" })],
+                     layout("用户类型分布", { xaxis: axis("占比 (%)"), yaxis: axis("", { autorange: "reversed" }) })]
+                ];
+            },
+            regional_trends: function (d) {
+                var plots = [];
+                if (d.city_type.length) {
+                    plots.push([[bar(d.city_type, d.market_share, "lightsteelblue", suffix(d.market_share, "%"))],
+                                layout("各城市等级市场占有率", { yaxis: axis("市场占有率 (%)") })]);
+                } else {
+                    plots.push("暂无点播数据");
+                }
+                if (d.tags.length) {
+                    plots.push([[{
+                        type: "heatmap", z: d.preference, x: d.tags, y: d.tiers, zmin: 0, zmax: 1,
+                        colorscale: YL_OR_RD, colorbar: { title: { text: "偏好强度" } }
+                    }], layout("地域标签偏好热力图", { yaxis: axis("", { autorange: "reversed" }) })]);
+                }
+                return plots;
+            },
+            time_patterns: function (d) {
+                var plots = [];
+                if (d.hourly_usage) {
+                    var hours = d.hourly_usage.map(function (_, hour) { return hour; });
+                    plots.push([[{
+                        type: "scatter", mode: "lines+markers", x: hours, y: d.hourly_usage,
+                        fill: "tozeroy", line: { color: "blue", width: 2 }, fillcolor: "rgba(135,206,235,0.3)"
+                    }], layout("24小时使用模式", { xaxis: axis("时间 (小时)", { dtick: 2 }), yaxis: axis("使用率") })]);
+                } else {
+                    plots.push("暂无点播时间数据");
+                }
+                plots.push([[bar(d.devices, d.minutes, "lightgreen", suffix(d.minutes, "分钟"))],
+                            layout("设备平均使用时长", { yaxis: axis("时长 (分钟)") })]);
+                return plots;
+            },
+            tag_trends: function (d) {
+                return [
+                    [[bar(d.tag, d.frequency, "lightcoral",
+                          d.frequency.map(function (value) { return value.toLocaleString(); }))],
+                     layout("标签出现频率", { yaxis: axis("出现次数") })],
+                    [[bar(d.tag, d.growth_rate, "lightblue", suffix(d.growth_rate, "%"), { name: "当前增长率" }),
+                      bar(d.tag, d.predicted_growth, "lightgreen", suffix(d.predicted_growth, "%"), { name: "预测增长率" })],
+                     layout("标签增长率对比", { barmode: "group", yaxis: axis("增长率 (%)") })]
+                ];
+            }
+        };
+
+        function render(section) {
+            var name = section.getAttribute("data-chart");
+            var container = section.querySelector(".plots");
+            container.textContent = "";
+            RENDERERS[name](DATA[name]).forEach(function (plot) {
+                var element = document.createElement("div");
+                container.appendChild(element);
+                if (typeof plot === "string") {
+                    element.className = "empty";
+                    element.textContent = plot;
+                } else {
+                    element.className = "plot";
+                    Plotly.newPlot(element, plot[0], plot[1], CONFIG);
+                }
+            });
+        }
+
+        function show(section) {
+            loadPlotly().then(function () { render(section); }, function (error) {
+                section.querySelector(".plots").textContent = error.message;
+            });
+        }
+
+        var sections = Array.prototype.slice.call(document.querySelectorAll("section[data-chart]"));
+        if ("IntersectionObserver" in window) {
+            var observer = new IntersectionObserver(function (entries) {
+                entries.forEach(function (entry) {
+                    if (entry.isIntersecting) {
+                        observer.unobserve(entry.target);
+                        show(entry.target);
+                    }
+                });
+            }, { rootMargin: "200px 0px" });
+            sections.forEach(function (section) { observer.observe(section); });
+        } else {
+            sections.forEach(show);
+        }
+    })();
+    </script>
+</body>
+</html>
+"""
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+图表渲染配置
+按输出目标（网页嵌入、印刷白皮书、演示文稿等）决定图表的格式、分辨率与缩略图，
+每个目标只生成自己需要的文件
+"""
+
+import os
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# 输出目标: 格式（第一个为主文件）、栅格分辨率、是否裁剪空白边、缩略图宽度（像素）
+RENDER_TARGETS = {
+    # 默认输出，与原先一致：300dpi PNG，裁剪空白边
+    "standard": {"formats": ("png",), "dpi": 300, "tight": True},
+    # 预览草图：低分辨率PNG，不做裁剪计算
+    "draft": {"formats": ("png",), "dpi": 72, "tight": False},
+    # 网页嵌入：WebP大图加缩略图，页面先加载缩略图
+    "web": {
+        "formats": ("webp",),
+        "dpi": 100,
+        "tight": False,
+        "thumbnail": 360,
+    },
+    # 印刷版白皮书：矢量PDF
+    "print": {"formats": ("pdf",), "dpi": 300, "tight": True},
+    # 演示文稿：矢量SVG，投影时任意缩放不失真
+    "presentation": {"formats": ("svg",), "dpi": 150, "tight": True},
+}
+
+DEFAULT_TARGETS = ("standard",)
+
+RASTER_FORMATS = ("png", "webp")
+VECTOR_FORMATS = ("svg", "pdf")
+
+
+class RenderProfile:
+    """单个输出目标的渲染配置"""
+
+    def __init__(
+        self,
+        target: str,
+        formats: Tuple[str, ...],
+        dpi: int,
+        tight: bool = True,
+        thumbnail: Optional[int] = None,
+    ):
+        unknown = [f for f in formats if f not in RASTER_FORMATS + VECTOR_FORMATS]
+        if not formats or unknown:
+            raise ValueError("不支持的图表格式: {}".format(", ".join(unknown)))
+        self.target = target
+        self.formats = tuple(formats)
+        self.dpi = dpi
+        self.tight = tight
+        self.thumbnail = thumbnail
+
+    @classmethod
+    def for_target(cls, target: str, dpi: int = None) -> "RenderProfile":
+        """按目标名称构造，dpi 覆盖该目标的默认分辨率"""
+        if target not in RENDER_TARGETS:
+            raise ValueError(
+                "不支持的图表输出目标: {}（可选 {}）".format(
+                    target, ", ".join(RENDER_TARGETS)
+                )
+            )
+        settings = dict(RENDER_TARGETS[target])
+        if dpi is not None:
+            settings["dpi"] = dpi
+        return cls(target, **settings)
+
+    @property
+    def raster_formats(self) -> List[str]:
+        return [f for f in self.formats if f in RASTER_FORMATS]
+
+    @property
+    def vector_formats(self) -> List[str]:
+        return [f for f in self.formats if f in VECTOR_FORMATS]
+
+    @property
+    def thumbnail_format(self) -> str:
+        """缩略图与主栅格格式一致，只有矢量格式时使用PNG"""
+        return (self.raster_formats or ["png"])[0]
+
+    def output_dir(self, base_dir: str) -> str:
+        """默认目标直接输出到图表目录，其他目标输出到同名子目录"""
+        if self.target == "standard":
+            return base_dir
+        return os.path.join(base_dir, self.target)
+
+    def paths(self, base_dir: str, stem: str) -> Dict[str, str]:
+        """各格式（及缩略图）的输出路径，按 formats 顺序"""
+        directory = self.output_dir(base_dir)
+        paths = {
+            f: os.path.join(directory, "{}.{}".format(stem, f)) for f in self.formats
+        }
+        if self.thumbnail:
+            paths["thumbnail"] = os.path.join(
+                directory, "{}_thumb.{}".format(stem, self.thumbnail_format)
+            )
+        return paths
+
+    def describe(self) -> Dict:
+        """参与构建缓存指纹的配置"""
+        return {
+            "target": self.target,
+            "formats": list(self.formats),
+            "dpi": self.dpi,
+            "tight": self.tight,
+            "thumbnail": self.thumbnail,
+        }
+
+
+def parse_targets(text: str) -> Tuple[str, ...]:
+    """解析逗号分隔的输出目标，未知目标抛出ValueError"""
+    targets = tuple(
+        dict.fromkeys(t.strip() for t in (text or "").split(",") if t.strip())
+    )
+    unknown = [t for t in targets if t not in RENDER_TARGETS]
+    if not targets or unknown:
+        raise ValueError(
+            "不支持的图表输出目标: {}（可选 {}）".format(
+                ", ".join(unknown) or text, ", ".join(RENDER_TARGETS)
+            )
+        )
+    return targets
+
+
+def build_profiles(
+    targets: Iterable[str], dpi: int = None, webp: bool = True
+) -> List[RenderProfile]:
+    """各目标的渲染配置
+
+    dpi 只覆盖默认目标（ChartGenerator 的 dpi 参数）；
+    webp 为False（Pillow 未编译WebP支持）时以PNG代替WebP
+    """
+    profiles = []
+    for target in targets:
+        profile = RenderProfile.for_target(
+            target, dpi if target == "standard" else None
+        )
+        if not webp and "webp" in profile.formats:
+            profile.formats = tuple(
+                dict.fromkeys("png" if f == "webp" else f for f in profile.formats)
+            )
+        profiles.append(profile)
+    return profiles